@@ -0,0 +1,61 @@
+'''Measure the import time of unifi_video with python -X importtime
+
+Exits with status 1 if the cumulative import time of the package exceeds
+the budget, so it can guard against import time regressions in CI. Skipped
+(with status 0) on Pythons older than 3.7, which lack -X importtime.
+
+Usage: python benchmarks/import_time.py [budget in ms] [rounds]
+'''
+
+from __future__ import print_function
+
+import json
+import os.path
+import subprocess
+import sys
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def import_time_us(statement):
+    '''Run statement in a fresh interpreter and sum the cumulative times
+    of the top-level imports -X importtime reports for it
+    '''
+
+    proc = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=root, stderr=subprocess.PIPE, universal_newlines=True)
+    _, stderr = proc.communicate()
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nested imports are indented and already part of their
+        # parent's cumulative time
+        if name.startswith('  ') or not cumulative.strip().isdigit():
+            continue
+        total += int(cumulative)
+    return total
+
+def main(budget_ms=150, rounds=5):
+    def best_ms(statement):
+        return min(import_time_us(statement) for _ in range(rounds)) / 1000.0
+
+    startup_ms = best_ms('pass')
+    results = {
+        'budget_ms': budget_ms,
+        'import_unifi_video_ms': round(
+            best_ms('import unifi_video') - startup_ms, 1),
+        'import_api_ms': round(
+            best_ms('from unifi_video import UnifiVideoAPI') - startup_ms, 1),
+    }
+
+    print(json.dumps(results, indent=2))
+    return results['import_api_ms'] <= budget_ms
+
+if __name__ == '__main__':
+    if sys.version_info < (3, 7):
+        print('Skipped: -X importtime needs Python 3.7+')
+        sys.exit(0)
+    if not main(*[int(arg) for arg in sys.argv[1:]]):
+        sys.exit(1)
@@ -0,0 +1,82 @@
+'''Benchmark JSON backends against scaled up test fixtures
+
+Decodes a recording listing, a camera listing and a bootstrap response
+built from the fixtures in tests/files with every installed backend, and
+compares against the former ``json.loads(body.decode('utf8'))`` path.
+
+Usage: python benchmarks/json_backends.py [recording count] [camera count] [rounds]
+'''
+
+from __future__ import print_function
+
+import json
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from unifi_video import json_backend
+
+files_dir = os.path.join(os.path.dirname(__file__), '..', 'tests', 'files')
+
+def read_fp(basename):
+    with open(os.path.join(files_dir, basename), 'r') as f:
+        return json.loads(f.read())
+
+def scaled(basename, count):
+    payload = read_fp(basename)
+    samples = payload['data']
+    payload['data'] = []
+    for i in range(count):
+        item = dict(samples[i % len(samples)])
+        item['_id'] = '{:024x}'.format(i)
+        payload['data'].append(item)
+    return json.dumps(payload).encode('utf8')
+
+def scaled_bootstrap(camera_count):
+    payload = read_fp('bootstrap.json')
+    cameras = read_fp('camera.json')['data']
+    payload['data'][0]['cameras'] = [
+        dict(cameras[0], _id='{:024x}'.format(i))
+        for i in range(camera_count)]
+    return json.dumps(payload).encode('utf8')
+
+def main(recording_count=100000, camera_count=1000, rounds=5):
+    bodies = {
+        'recording': scaled('recordings.json', recording_count),
+        'camera': scaled('camera.json', camera_count),
+        'bootstrap': scaled_bootstrap(camera_count),
+    }
+
+    def best_of(fn, body):
+        return min(timeit.repeat(lambda: fn(body), number=1,
+            repeat=rounds)) * 1000
+
+    results = {
+        'recordings': recording_count,
+        'cameras': camera_count,
+        'bytes': dict((k, len(v)) for k, v in bodies.items()),
+        'backends': {},
+    }
+
+    results['backends']['json (decode + loads)'] = dict(
+        (k, best_of(lambda b: json.loads(b.decode('utf8')), v))
+        for k, v in bodies.items())
+
+    for name in json_backend.available_backends():
+        json_backend.set_backend(name)
+        results['backends'][name] = dict(
+            (k, best_of(json_backend.loads, v)) for k, v in bodies.items())
+        results['backends'][name + ' (object hook)'] = {
+            'recording': best_of(
+                lambda b: json_backend.loads(b, object_hook=lambda d: d),
+                bodies['recording']),
+        }
+
+    json_backend.set_backend()
+    print(json.dumps(results, indent=2))
+    return results
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,97 @@
+'''Benchmark UnifiVideoAPI.refresh_cameras() against 1,000 synthetic cameras
+
+Usage: python benchmarks/refresh_cameras.py [camera count] [rounds]
+'''
+
+from __future__ import print_function
+
+import json
+import os.path
+import sys
+import timeit
+
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    from mock import patch
+except ImportError:
+    from unittest.mock import patch
+
+from unifi_video import UnifiVideoAPI
+
+files_dir = os.path.join(os.path.dirname(__file__), '..', 'tests', 'files')
+
+def read_fp(basename):
+    with open(os.path.join(files_dir, basename), 'r') as f:
+        return json.loads(f.read())
+
+def synthetic_cameras(count):
+    sample = read_fp('camera.json')['data'][0]
+    cameras = []
+    for i in range(count):
+        camera = deepcopy(sample)
+        camera['_id'] = '{:024x}'.format(i)
+        camera['name'] = 'Camera {}'.format(i)
+        camera['state'] = 'CONNECTED' if i % 10 else 'DISCONNECTED'
+        cameras.append(camera)
+    return cameras
+
+def main(count=1000, rounds=20):
+    bootstrap = read_fp('bootstrap_postsetup-nocams_3.10.13.json')
+    payload = {'data': synthetic_cameras(count)}
+    responses = {
+        'bootstrap': bootstrap,
+        'camera': payload,
+        'recording': {'data': []},
+    }
+
+    def get(self, url, *args, **kwargs):
+        return responses[url.split('?')[0].split('/')[0]]
+
+    with patch.object(UnifiVideoAPI, 'get', get):
+        uva = UnifiVideoAPI(api_key='****')
+
+        # Each round gets its own copy of the payload, the way a real
+        # response would be freshly parsed JSON
+        def refresh(camera_payload):
+            responses['camera'] = camera_payload
+            uva.refresh_cameras()
+
+        def time_refreshes(payload_for_round):
+            payloads = [payload_for_round(i) for i in range(rounds)]
+            return min(
+                timeit.repeat(lambda: refresh(payloads.pop()), number=1,
+                    repeat=rounds))
+
+        unchanged = time_refreshes(lambda _: deepcopy(payload))
+
+        def changed_tenth(i):
+            p = deepcopy(payload)
+            for camera in p['data'][i % 10::10]:
+                camera['lastSeen'] += i + 1
+            return p
+
+        changed = time_refreshes(changed_tenth)
+
+        def state_flip(i):
+            p = deepcopy(payload)
+            for camera in p['data'][i % 10::10]:
+                camera['state'] = 'CONNECTED' \
+                    if camera['state'] != 'CONNECTED' else 'DISCONNECTED'
+            return p
+
+        membership = time_refreshes(state_flip)
+
+    results = {
+        'cameras': count,
+        'unchanged_ms': unchanged * 1000,
+        'tenth_changed_ms': changed * 1000,
+        'tenth_state_changed_ms': membership * 1000,
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,96 @@
+'''Benchmark parsing and collection code against recorded UniFi Video traffic
+
+Records a fixed workload (``UnifiVideoAPI`` init, ``refresh_cameras()``,
+``get_recordings()``) to a cassette, then replays the cassette to time the
+same workload without an NVR. Record against a real NVR or, without an
+address, against the synthetic server from tests/simulator.py.
+
+Replays default to speed 0: recorded network time is not waited out, so
+the timings are of client code alone.
+
+Usage:
+    python benchmarks/replay.py record <cassette> [addr] [port] [api key]
+    python benchmarks/replay.py <cassette> [speed] [rounds]
+'''
+
+from __future__ import print_function
+
+import json
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from unifi_video import UnifiVideoAPI
+from unifi_video.cassette import RecordingTransport, ReplayTransport
+
+recording_limit = 10000
+
+def workload(connect):
+    '''Run the workload, timing each step
+
+    Arguments:
+        connect (callable): Returns a new ``UnifiVideoAPI``
+    '''
+
+    timings = {}
+
+    def timed(name, fn):
+        started = timeit.default_timer()
+        result = fn()
+        timings[name] = (timeit.default_timer() - started) * 1000
+        return result
+
+    uva = timed('init_ms', connect)
+    timed('refresh_cameras_ms', uva.refresh_cameras)
+    timed('get_recordings_ms',
+        lambda: list(uva.get_recordings(limit=recording_limit)))
+    return timings
+
+def record(path, addr=None, port=7080, api_key='****'):
+    if addr is None:
+        from simulator import SyntheticNVR
+        nvr = SyntheticNVR(cameras=100, recordings=recording_limit).start()
+        addr, port = nvr.addr, nvr.port
+    else:
+        nvr = None
+
+    try:
+        with RecordingTransport(path, max_body_bytes=0) as transport:
+            timings = workload(lambda: UnifiVideoAPI(api_key=api_key,
+                addr=addr, port=int(port), transport=transport))
+    finally:
+        if nvr is not None:
+            nvr.stop()
+
+    results = {
+        'cassette': path,
+        'bytes': os.path.getsize(path),
+        'exchanges': transport.exchanges,
+        'recorded': timings,
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+def replay(path, speed=0, rounds=5):
+    transport = ReplayTransport(path, speed=float(speed))
+    runs = [
+        workload(lambda: UnifiVideoAPI(api_key='****', transport=transport))
+        for _ in range(int(rounds))]
+
+    results = {
+        'cassette': path,
+        'speed': float(speed),
+        'rounds': int(rounds),
+        'best': dict((k, min(run[k] for run in runs)) for k in runs[0]),
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['record']:
+        record(*sys.argv[2:])
+    else:
+        replay(*sys.argv[1:])
@@ -0,0 +1,130 @@
+'''End-to-end benchmarks against a synthetic UniFi Video server
+
+Starts the server from tests/simulator.py on a local port and, over real
+HTTP, times:
+
+* ``UnifiVideoAPI`` init (bootstrap, camera listing, first 300 recordings)
+* ``UnifiVideoAPI.refresh_cameras()``
+* ``UnifiVideoAPI.get_recordings()`` for 1k, 100k and 1M recordings
+  (1M streamed only, as the non-streaming listing holds every recording)
+* recording download throughput
+* camera setter round trips (``PUT camera/:id`` plus verification)
+
+Results are printed as JSON.
+
+Usage: python benchmarks/suite.py [camera count] [max recordings] [download MiB] [rounds]
+'''
+
+from __future__ import print_function
+
+import json
+import os
+import os.path
+import platform
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from simulator import SyntheticNVR
+from unifi_video import UnifiVideoAPI, json_backend
+
+recording_scales = (1000, 100000, 1000000)
+stream_only_above = 100000
+
+def best_of(fn, rounds):
+    return min(timeit.repeat(fn, number=1, repeat=rounds))
+
+def bench_startup(nvr, rounds):
+    def init():
+        UnifiVideoAPI(api_key='****', addr=nvr.addr, port=nvr.port)
+
+    return {'ms': best_of(init, rounds) * 1000}
+
+def bench_refresh_cameras(uva, rounds):
+    return {'ms': best_of(uva.refresh_cameras, rounds) * 1000}
+
+def bench_recordings(uva, nvr, max_recordings, rounds):
+    results = {}
+    for count in recording_scales:
+        if count > max_recordings:
+            break
+        nvr.recording_count = count
+        # Listing 1M recordings takes a while; once is enough
+        reps = rounds if count < stream_only_above else 1
+
+        modes = [True] if count > stream_only_above else [False, True]
+        for stream in modes:
+            def listing():
+                n = 0
+                for _ in uva.get_recordings(limit=count, stream=stream):
+                    n += 1
+                assert n == count, n
+
+            seconds = best_of(listing, reps)
+            results['{}{}'.format(count, ' (stream)' if stream else '')] = {
+                'ms': seconds * 1000,
+                'recordings_per_s': count / seconds,
+            }
+    return results
+
+def bench_download(uva, nvr, download_mib, rounds):
+    nvr.recording_count = 1
+    nvr.download_size = download_mib << 20
+    fd, path = tempfile.mkstemp(suffix='.mp4')
+    os.close(fd)
+    try:
+        seconds = best_of(
+            lambda: uva.get('recording/{}/download'.format(
+                nvr.recording(0)['_id']), path),
+            rounds)
+        assert os.path.getsize(path) == nvr.download_size
+    finally:
+        os.remove(path)
+    return {
+        'bytes': nvr.download_size,
+        'ms': seconds * 1000,
+        'mib_per_s': download_mib / seconds,
+    }
+
+def bench_setters(uva, rounds):
+    camera = next(iter(uva.cameras))
+    values = [40 + i % 20 for i in range(rounds * 10)]
+
+    def set_brightness():
+        camera.brightness(values.pop())
+
+    times = timeit.repeat(set_brightness, number=1, repeat=len(values))
+    times.sort()
+    return {
+        'round_trips': len(times),
+        'mean_ms': sum(times) / len(times) * 1000,
+        'p50_ms': times[len(times) // 2] * 1000,
+        'p95_ms': times[int(len(times) * .95)] * 1000,
+    }
+
+def main(camera_count=100, max_recordings=1000000, download_mib=64,
+        rounds=5):
+    results = {
+        'python': platform.python_version(),
+        'json_backend': json_backend.get_backend().name,
+        'cameras': camera_count,
+    }
+
+    with SyntheticNVR(cameras=camera_count, recordings=1000) as nvr:
+        results['startup'] = bench_startup(nvr, rounds)
+        uva = UnifiVideoAPI(api_key='****', addr=nvr.addr, port=nvr.port)
+        results['refresh_cameras'] = bench_refresh_cameras(uva, rounds)
+        results['get_recordings'] = bench_recordings(uva, nvr,
+            max_recordings, rounds)
+        results['download'] = bench_download(uva, nvr, download_mib, rounds)
+        results['setters'] = bench_setters(uva, rounds)
+        results['requests'] = nvr.requests
+
+    print(json.dumps(results, indent=2))
+    return results
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -10,6 +10,18 @@ for test_program in [
             unittest.main(module='camera_tests', exit=False),
             unittest.main(module='api', exit=False),
             unittest.main(module='utils_tests', exit=False),
+            unittest.main(module='archiver_tests', exit=False),
+            unittest.main(module='snapshots_tests', exit=False),
+            unittest.main(module='reconciler_tests', exit=False),
+            unittest.main(module='retention_tests', exit=False),
+            unittest.main(module='feed_tests', exit=False),
+            unittest.main(module='batching_tests', exit=False),
+            unittest.main(module='cache_tests', exit=False),
+            unittest.main(module='json_backend_tests', exit=False),
+            unittest.main(module='import_tests', exit=False),
+            unittest.main(module='simulator_tests', exit=False),
+            unittest.main(module='instrumentation_tests', exit=False),
+            unittest.main(module='cassette_tests', exit=False),
         ]:
     errors_and_failures += len(test_program.result.errors)
     errors_and_failures += len(test_program.result.failures)
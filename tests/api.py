@@ -6,6 +6,8 @@ import unittest
 import os.path
 import json
 import sys
+import threading
+import time
 
 from copy import deepcopy
 
@@ -29,8 +31,10 @@ from helpers import mocked_response, get_ufva_w_mocked_urlopen, \
         empty_response, read_fp
 from unifi_video import UnifiVideoAPI, CameraModelError, \
     UnifiVideoVersionError
+from unifi_video.cassette import default_transport
 
 import files
+from simulator import SyntheticNVR, recording_id
 
 
 py3 = sys.version_info[0] == 3
@@ -249,6 +253,387 @@ class CollectionTests(unittest.TestCase):
                     set([oid(i) for i in expected['ids']]),
                     set([cam._id for cam in getattr(uva, coll_name)]))
 
+    @patch('unifi_video.api.urlopen')
+    def test_in_place_refresh(self, mocked_urlopen):
+        '''Refreshing cameras should update existing camera objects in
+        place instead of replacing them
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****')
+        camera = list(uva.cameras)[0]
+        data = camera._data
+
+        uva.refresh_cameras()
+        self.assertIs(uva.cameras[camera._id], camera)
+        self.assertIs(uva.active_cameras[camera._id], camera)
+        self.assertIs(camera._data, data)
+
+        changed = json.loads(responses['camera'].decode('utf8'))
+        changed['data'][0]['state'] = 'DISCONNECTED'
+        changed['data'][0]['name'] = 'Renamed'
+        mocked_urlopen.side_effect = mocked_response(
+            json.dumps(changed).encode('utf8'))
+
+        uva.refresh_cameras()
+        self.assertIs(uva.cameras[camera._id], camera)
+        self.assertIs(uva.managed_cameras[camera._id], camera)
+        self.assertNotIn(camera._id, uva.active_cameras)
+        self.assertEqual(camera.name, 'Renamed')
+        self.assertFalse(camera.connected)
+
+class CoalescingTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_coalesced_gets(self, mocked_urlopen):
+        '''Identical concurrent GETs to coalesced endpoints should share
+        a single upstream request
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****', coalesce_gets=['camera'])
+
+        respond = mocked_response()
+
+        def slow_response(req):
+            time.sleep(0.05)
+            return respond(req)
+
+        mocked_urlopen.reset_mock()
+        mocked_urlopen.side_effect = slow_response
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(uva.get('camera')))
+            for _ in range(5)
+        ] + [
+            threading.Thread(target=uva.get, args=('recording',))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mocked_urlopen.call_count, 3)
+        self.assertEqual(len(results), 5)
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+            self.assertIsNot(result, results[0])
+
+from unifi_video.json_backend import loads as _json_loads
+
+class ConditionalGetTests(unittest.TestCase):
+
+    @patch('unifi_video.api.json_loads')
+    @patch('unifi_video.api.urlopen')
+    def test_revalidation(self, mocked_urlopen, mocked_loads):
+        '''Revalidated endpoints should send validators, serve 304s from
+        memory and skip parsing identical bodies
+        '''
+
+        mocked_loads.side_effect = _json_loads
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****',
+            conditional_gets=['camera', 'bootstrap'])
+
+        respond = mocked_response()
+        sent_headers = []
+
+        def etag_response(req):
+            sent_headers.append(dict(req.header_items()))
+            res = respond(req)
+            res.headers['ETag'] = '"v1"'
+            return res
+
+        def not_modified(req):
+            sent_headers.append(dict(req.header_items()))
+            raise HTTPError(req.get_full_url(), 304, 'Not Modified', {}, None)
+
+        mocked_urlopen.side_effect = etag_response
+        first = uva.get('camera')
+        self.assertNotIn('If-none-match', sent_headers[-1])
+
+        mocked_urlopen.side_effect = not_modified
+        mocked_loads.reset_mock()
+        second = uva.get('camera')
+        self.assertEqual(sent_headers[-1].get('If-none-match'), '"v1"')
+        self.assertEqual(second, first)
+        self.assertIsNot(second, first)
+        self.assertEqual(mocked_loads.call_count, 0)
+
+        # No validators from the server: identical bodies aren't parsed
+        mocked_urlopen.side_effect = respond
+        uva.get('camera')
+        mocked_loads.reset_mock()
+        self.assertEqual(uva.get('camera'), first)
+        self.assertEqual(mocked_loads.call_count, 0)
+
+        # Other endpoints are left alone
+        uva.get('recording')
+        self.assertEqual(mocked_loads.call_count, 1)
+
+class CompressionTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_compressed_responses(self, mocked_urlopen):
+        '''JSON requests should accept gzip and deflate compressed responses
+        and decompress them; raw requests should be left alone
+        '''
+
+        import io
+        import zlib
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****', conditional_gets=False)
+
+        body = json.dumps(read_fp('recordings.json')).encode('utf8')
+        respond = mocked_response()
+        sent_headers = []
+        encodings = {
+            'gzip': lambda: zlib.compressobj(9, zlib.DEFLATED, 31),
+            'deflate': lambda: zlib.compressobj(9, zlib.DEFLATED, 15),
+            'raw deflate': lambda: zlib.compressobj(9, zlib.DEFLATED, -15),
+        }
+
+        for name, compressor in encodings.items():
+            c = compressor()
+            compressed = c.compress(body) + c.flush()
+
+            reads = []
+
+            def compressed_response(req):
+                sent_headers.append(dict(req.header_items()))
+                res = respond(req)
+                stream = io.BytesIO(compressed)
+                res.read.side_effect = \
+                    lambda size=-1: reads.append(size) or stream.read(size)
+                res.headers['Content-Encoding'] = name.split()[-1]
+                return res
+
+            mocked_urlopen.side_effect = compressed_response
+            self.assertEqual(uva.get('recording'), json.loads(body))
+            self.assertIn('gzip', sent_headers[-1].get('Accept-encoding', ''))
+            self.assertTrue(reads and all(0 < size for size in reads))
+
+        def raw_response(req):
+            sent_headers.append(dict(req.header_items()))
+            return respond(req)
+
+        mocked_urlopen.side_effect = raw_response
+        uva.get('recording/x/download', True)
+        self.assertNotIn('Accept-encoding', sent_headers[-1])
+
+class StreamingTests(unittest.TestCase):
+
+    def test_iter_json_array(self):
+        '''Array items should be decoded correctly no matter where chunk
+        boundaries fall
+        '''
+
+        import io
+        from unifi_video._streaming import iter_json_array
+
+        doc = {
+            'meta': {'totalCount': 3, 'note': '"data": [1, 2]', 'x': [{}]},
+            'data': [
+                {'_id': 'a', 'name': 'k\u00e4ytt\u00e4v\u00e4 ]}{,\\"', 'n': [1.5e3]},
+                12345,
+                'plain',
+                [],
+            ],
+            'tail': None,
+        }
+        text = json.dumps(doc, ensure_ascii=False, indent=1).encode('utf8')
+
+        for chunk_size in (1, 2, 3, 7, 64 * 1024):
+            self.assertEqual(list(iter_json_array(
+                io.BytesIO(text), chunk_size=chunk_size)), doc['data'])
+
+        self.assertEqual(list(iter_json_array(io.BytesIO(b'{}'))), [])
+        self.assertEqual(
+            list(iter_json_array(io.BytesIO(b' {"data" : [ ] } '))), [])
+
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.BytesIO(b'{"data": [{"a": 1}'), 'data', 4))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.BytesIO(b'[1, 2]')))
+
+    @patch('unifi_video.api.urlopen')
+    def test_streamed_recordings(self, mocked_urlopen):
+        import io
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****')
+
+        respond = mocked_response()
+        body = json.dumps(read_fp('recordings.json')).encode('utf8')
+
+        def streamed_response(req):
+            res = respond(req)
+            res.read.side_effect = io.BytesIO(body).read
+            return res
+
+        expected = [r._id for r in uva.get_recordings()]
+        calls = mocked_urlopen.call_count
+
+        mocked_urlopen.side_effect = streamed_response
+        recordings = uva.get_recordings(stream=True, limit=10)
+        self.assertEqual(mocked_urlopen.call_count, calls)
+        self.assertEqual([r._id for r in recordings], expected)
+        self.assertEqual(mocked_urlopen.call_count, calls + 1)
+
+        mocked_urlopen.side_effect = HTTPError('', 500, 'Error', {}, None)
+        with self.assertRaises(ValueError):
+            list(uva.get_recordings(stream=True))
+
+class BulkRecordingTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_delete_recordings(self, mocked_urlopen):
+        '''Bulk deletion should pack IDs into as few requests as the URL
+        length limit allows and drop deleted recordings from the collection
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****')
+        existing = list(uva.recordings.keys())
+        ids = existing + ['{:024d}'.format(i) for i in range(200)]
+
+        mocked_urlopen.reset_mock()
+        results = uva.delete_recordings(ids, max_url_length=600)
+
+        urls = [c[0][0].get_full_url() for c in mocked_urlopen.call_args_list]
+        self.assertEqual(len(urls), len(results))
+        self.assertTrue(all(len(url) <= 600 for url in urls))
+        self.assertTrue(all(
+            c[0][0].get_method() == 'DELETE'
+            for c in mocked_urlopen.call_args_list))
+        self.assertLess(len(results), len(ids) / 10)
+        self.assertEqual(
+            sum((r['ids'] for r in results), []), ids)
+        self.assertTrue(all(r['success'] for r in results))
+        self.assertEqual(len(uva.recordings), 0)
+
+    @patch('unifi_video.api.urlopen')
+    def test_lock_recordings(self, mocked_urlopen):
+        '''Bulk locking should skip recordings already locked and verify
+        with a single listing request
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****')
+        recordings = list(uva.recordings)
+        recordings[0]._data['locked'] = True
+        recordings[0]._load_data(recordings[0]._data)
+
+        locked = json.loads(responses['recordings'].decode('utf8'))
+        for rec in locked['data']:
+            rec['locked'] = rec['_id'] != recordings[-1]._id
+
+        with patch('unifi_video.api.UnifiVideoAPI.put') as put:
+            put.side_effect = lambda url, data, *args, **kwargs: \
+                {'data': [data]}
+            mocked_urlopen.reset_mock()
+            mocked_urlopen.side_effect = mocked_response(
+                json.dumps(locked).encode('utf8'))
+
+            results = uva.lock_recordings(recordings, verify=True)
+
+        self.assertEqual(put.call_count, len(recordings) - 1)
+        self.assertEqual(mocked_urlopen.call_count, 1)
+        self.assertEqual(
+            [rec_id for rec_id, success in results.items() if not success],
+            [recordings[-1]._id])
+        self.assertFalse(recordings[-1].locked)
+        self.assertTrue(recordings[1].locked)
+
+    def test_lock_recordings_wide_span(self):
+        '''Verifying locks should page the listing by start time, skip
+        recordings between far apart ones and not refetch recordings one
+        by one when untargeted recordings share their span
+        '''
+
+        requests = []
+
+        def transport(req, context=None):
+            requests.append((req.get_method(),
+                req.get_full_url().split('/api/2.0/')[1].split('?')[0]))
+            return default_transport(req, context)
+
+        with SyntheticNVR(cameras=1, recordings=5000) as nvr:
+            uva = UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port,
+                transport=transport)
+            nvr.locked.update(range(1000, 1200, 2))
+
+            for indexes, puts, listings in (
+                    ((10, 11), 2, 1),
+                    ((0, 2500, 4999), 3, 3),
+                    (range(1000, 1200), 100, 2)):
+                ids = [recording_id(i) for i in indexes]
+                recordings = [
+                    uva._recording_from_data(uva.get(
+                        'recording/{}'.format(rec_id))['data'][0])
+                    for rec_id in ids]
+                del requests[:]
+
+                results = uva.lock_recordings(recordings, verify=True)
+                self.assertEqual(results, dict((i, True) for i in ids))
+                self.assertTrue(all(r.locked for r in recordings))
+                self.assertEqual(
+                    [r for r in requests if r[0] == 'GET'],
+                    [('GET', 'recording')] * listings)
+                self.assertEqual(
+                    len([r for r in requests if r[0] == 'PUT']), puts)
+
+            self.assertEqual(nvr.locked, set([0, 10, 11, 2500, 4999]) |
+                set(range(1000, 1200)))
+
+    @patch('unifi_video.api.urlopen')
+    def test_bulk_lock_needs_recordings_or_query(self, mocked_urlopen):
+        '''Bulk (un)locking should not act on every recording when given
+        neither recordings nor a query
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****')
+        mocked_urlopen.reset_mock()
+
+        self.assertRaises(ValueError, uva.lock_recordings)
+        self.assertRaises(ValueError, uva.unlock_recordings, verify=True)
+        self.assertEqual(mocked_urlopen.call_count, 0)
+
+class RecordingIdentityTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_identity_map(self, mocked_urlopen):
+        '''Overlapping listings should return the same recording objects,
+        reloaded only when their data changed
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****')
+
+        first = dict((r._id, r) for r in uva.get_recordings())
+        for rec_id, recording in first.items():
+            self.assertIs(uva.recordings[rec_id], recording)
+
+        changed = json.loads(responses['recordings'].decode('utf8'))
+        changed['data'][0]['locked'] = True
+        mocked_urlopen.side_effect = mocked_response(
+            json.dumps(changed).encode('utf8'))
+
+        second = list(uva.get_recordings())
+        for recording in second:
+            self.assertIs(first[recording._id], recording)
+        self.assertTrue(first[changed['data'][0]['_id']].locked)
+
+        uva.recordings.clear()
+        first_ids = set(first.keys())
+        del first, second, recording
+        self.assertEqual(
+            len([i for i in first_ids if i in uva._recording_identities]), 0)
+
 class DatetimeTimezoneTests(unittest.TestCase):
 
     sample_camera = json.loads(responses['camera'].decode('utf8'))
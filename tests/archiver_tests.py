@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import shutil
+import tempfile
+import json
+import os
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import get_ufva_w_mocked_urlopen, mocked_response, read_fp
+from unifi_video.archiver import UnifiVideoArchiver
+
+class FakeRecording(object):
+
+    def __init__(self, index, in_progress=False):
+        self._id = 'rec{:04d}'.format(index)
+        self._data = {'startTime': 1000000000000 + index * 100}
+        self.in_progress = in_progress
+
+    def download(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(b'\x00')
+        return True
+
+class FakeAPI(object):
+
+    utc_offset = 0
+
+    def __init__(self, recordings):
+        self.recordings = recordings
+        self.listings = 0
+
+    def get_recordings(self, start_time=None, limit=0, **kwargs):
+        self.listings += 1
+        return iter([r for r in self.recordings
+            if r._data['startTime'] >= start_time * 1000][:limit])
+
+class ArchiverTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @patch('unifi_video.recording.UnifiVideoRecording.download')
+    @patch('unifi_video.api.urlopen')
+    def test_tick(self, mocked_urlopen, mocked_download):
+        '''Archiver should download completed recordings only, advance
+        the high-water mark no further than the oldest in-progress
+        recording and not re-download after a restart
+        '''
+
+        recordings = read_fp('recordings.json')['data']
+        in_progress = [r for r in recordings if r['inProgress']]
+        completed = [r for r in recordings if not r['inProgress']]
+
+        def download(filename):
+            with open(filename, 'wb') as f:
+                f.write(b'\x00')
+            return True
+
+        mocked_download.side_effect = download
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+
+        archiver = UnifiVideoArchiver(ufva, self.directory, start_time=0)
+        archived = archiver.tick()
+
+        self.assertEqual(
+            sorted(archived), sorted(r['_id'] for r in completed))
+        self.assertEqual(mocked_download.call_count, len(completed))
+        self.assertEqual(
+            archiver.high_water_mark,
+            min(r['startTime'] for r in in_progress))
+        self.assertEqual(
+            len([f for f in os.listdir(self.directory)
+                if f.endswith('.mp4')]),
+            len(completed))
+
+        # Only one listing request per tick, regardless of camera count
+        calls_before = mocked_urlopen.call_count
+        restarted = UnifiVideoArchiver(ufva, self.directory)
+        self.assertEqual(restarted.high_water_mark, archiver.high_water_mark)
+        self.assertEqual(restarted.tick(), [])
+        self.assertEqual(mocked_urlopen.call_count - calls_before, 1)
+        self.assertEqual(mocked_download.call_count, len(completed))
+
+    def test_more_than_limit_in_window(self):
+        '''Archiver should page past ``limit`` archived or in-progress
+        recordings instead of stalling the high-water mark
+        '''
+
+        recordings = [FakeRecording(i) for i in range(150)]
+        api = FakeAPI(recordings)
+        archiver = UnifiVideoArchiver(api, self.directory, limit=100,
+            start_time=1000000000, filename=lambda rec: rec._id)
+
+        self.assertEqual(len(archiver.tick()), 150)
+        self.assertEqual(archiver.high_water_mark,
+            recordings[-1]._data['startTime'])
+        self.assertEqual(archiver.tick(), [])
+
+        # Behind an in-progress recording
+        recordings[150:] = [FakeRecording(150, in_progress=True)] + \
+            [FakeRecording(i) for i in range(151, 400)]
+        self.assertEqual(len(archiver.tick()), 249)
+        self.assertEqual(archiver.high_water_mark,
+            recordings[150]._data['startTime'])
+
+        recordings[150].in_progress = False
+        self.assertEqual(archiver.tick(), [recordings[150]._id])
+        self.assertEqual(archiver.high_water_mark,
+            recordings[-1]._data['startTime'])
+        self.assertEqual(archiver.tick(), [])
+        self.assertEqual(len(os.listdir(self.directory)), 401)
+
+if __name__ == '__main__':
+    unittest.main()
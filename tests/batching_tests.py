@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import threading
+import json
+
+from copy import deepcopy
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import mocked_response, read_fp
+from simulator import SyntheticNVR, recording_id
+from unifi_video import UnifiVideoAPI
+from unifi_video.cassette import default_transport
+
+def three_cameras():
+    camera = read_fp('camera.json')['data'][0]
+    cameras = []
+    for i in range(3):
+        c = deepcopy(camera)
+        c['_id'] = '{:024d}'.format(i)
+        cameras.append(c)
+    return json.dumps({'data': cameras}).encode('utf8')
+
+class RefreshBatcherTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_batch_scope(self, mocked_urlopen):
+        '''Refreshes inside a batch scope should be served by one
+        collection-level request per object type
+        '''
+
+        mocked_urlopen.side_effect = mocked_response(
+            arg_pile=[{}, {'data': three_cameras()}, {}])
+        uva = UnifiVideoAPI(api_key='****')
+
+        self.assertEqual(len(uva.cameras), 3)
+        self.assertEqual(len(uva.recordings), 4)
+
+        mocked_urlopen.side_effect = mocked_response(three_cameras())
+        mocked_urlopen.reset_mock()
+        with uva.refresh_batcher.batch():
+            for camera in uva.cameras:
+                camera._data['name'] = 'Stale'
+                camera.update()
+            self.assertEqual(mocked_urlopen.call_count, 0)
+
+        self.assertEqual(mocked_urlopen.call_count, 1)
+        self.assertTrue(all(c._data['name'] != 'Stale' for c in uva.cameras))
+        self.assertTrue(mocked_urlopen.call_args[0][0].get_full_url()\
+            .split('?')[0].endswith('/camera'))
+
+        mocked_urlopen.side_effect = mocked_response(
+            json.dumps(read_fp('recordings.json')).encode('utf8'))
+        mocked_urlopen.reset_mock()
+        with uva.refresh_batcher.batch():
+            for recording in uva.recordings:
+                recording.refresh()
+
+        self.assertEqual(mocked_urlopen.call_count, 1)
+        self.assertEqual(uva.refresh_batcher.requests_saved, 2 + 3)
+
+    @patch('unifi_video.api.urlopen')
+    def test_batch_window(self, mocked_urlopen):
+        '''Concurrent refreshes within the batching window should share
+        a single request
+        '''
+
+        mocked_urlopen.side_effect = mocked_response(
+            arg_pile=[{}, {'data': three_cameras()}, {}])
+        uva = UnifiVideoAPI(api_key='****', refresh_batch_window=0.05)
+        mocked_urlopen.side_effect = mocked_response(three_cameras())
+
+        mocked_urlopen.reset_mock()
+        threads = [
+            threading.Thread(target=camera.update) for camera in uva.cameras
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mocked_urlopen.call_count, 1)
+
+    def test_batch_with_untargeted_recordings(self):
+        '''Recordings that were not asked for but fall within a batch's
+        span should not push requested ones out of the listing
+        '''
+
+        urls = []
+
+        def transport(req, context=None):
+            urls.append(req.get_full_url().split('/api/2.0/')[1])
+            return default_transport(req, context)
+
+        with SyntheticNVR(cameras=2, recordings=1000) as nvr:
+            uva = UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port,
+                transport=transport)
+            recordings = [
+                uva._recording_from_data(uva.get(
+                    'recording/{}'.format(recording_id(i)))['data'][0])
+                for i in range(0, 800, 4)]
+            for recording in recordings:
+                recording._data['locked'] = None
+            del urls[:]
+
+            with uva.refresh_batcher.batch():
+                for recording in recordings:
+                    recording.refresh()
+
+        self.assertTrue(all(u.startswith('recording?') for u in urls))
+        self.assertLess(len(urls), 10)
+        self.assertTrue(all(r._data['locked'] is False for r in recordings))
+        self.assertEqual(uva.refresh_batcher.requests_saved,
+            len(recordings) - len(urls))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import mocked_response
+from unifi_video import UnifiVideoAPI
+from unifi_video.cache import ResponseCache, normalize_url
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url('/recording?limit=2&cameras[]=b&idsOnly=false&cameras[]=a'),
+            'recording?cameras[]=b&cameras[]=a&idsOnly=false&limit=2')
+        self.assertEqual(normalize_url('camera/abc/'), 'camera/abc')
+        self.assertEqual(
+            UnifiVideoAPI.params_to_query_str(
+                {'sort': 'asc', 'limit': 2, 'cameras': ['b', 'a']},
+                sort_keys=True),
+            'cameras[]=b&cameras[]=a&limit=2&sort=asc')
+
+    @patch('unifi_video.cache.monotonic')
+    def test_ttl_and_lru(self, mocked_monotonic):
+        '''Responses should expire per endpoint TTL and the least recently
+        used ones should be evicted first
+        '''
+
+        mocked_monotonic.return_value = 100
+        cache = ResponseCache({'camera': 10, 'snapshot': 0},
+            default_ttl=1, max_entries=2)
+        fetch = Mock(side_effect=lambda: {'data': []})
+
+        first = cache.fetch('camera', fetch)
+        second = cache.fetch('camera', fetch)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+        cache.fetch('snapshot/camera/x', fetch)
+        cache.fetch('snapshot/camera/x', fetch)
+        self.assertEqual(fetch.call_count, 3)
+
+        mocked_monotonic.return_value = 109
+        cache.fetch('camera', fetch)
+        self.assertEqual(fetch.call_count, 3)
+        mocked_monotonic.return_value = 110
+        cache.fetch('camera', fetch)
+        self.assertEqual(fetch.call_count, 4)
+
+        cache.fetch('recording?limit=1', fetch)
+        cache.fetch('camera', fetch)
+        cache.fetch('bootstrap', fetch)
+        self.assertEqual(fetch.call_count, 6)
+        cache.fetch('camera', fetch)
+        self.assertEqual(fetch.call_count, 6)
+        cache.fetch('recording?limit=1', fetch)
+        self.assertEqual(fetch.call_count, 7)
+
+        self.assertEqual(cache.stats(), {
+            'hits': 4,
+            'misses': 5,
+            'evictions': 2,
+            'invalidations': 0,
+            'entries': 2,
+        })
+
+        fetch.side_effect = lambda: False
+        cache.fetch('recording/x', fetch)
+        cache.fetch('recording/x', fetch)
+        self.assertEqual(fetch.call_count, 9)
+
+    def test_invalidation(self):
+        cache = ResponseCache(default_ttl=60)
+        for url in ['camera', 'camera?x=1', 'camera/abc', 'camera/abc/y',
+                'camera/abcd', 'recording', 'bootstrap']:
+            cache.fetch(url, lambda: {})
+
+        self.assertEqual(cache.invalidate('camera/abc'), 4)
+        self.assertEqual(cache.stats()['entries'], 3)
+        self.assertEqual(cache.invalidate('recording?recordings[]=x'), 1)
+        self.assertEqual(cache.stats()['invalidations'], 5)
+
+        # Responses to requests in flight during a write aren't kept
+        def fetch():
+            cache.invalidate('camera/abc')
+            return {}
+        cache.fetch('camera/abc', fetch)
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    @patch('unifi_video.api.urlopen')
+    def test_api_integration(self, mocked_urlopen):
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='****', response_cache=True)
+        calls = mocked_urlopen.call_count
+
+        camera = uva.get('camera')
+        self.assertEqual(uva.get('camera'), camera)
+        uva.get('recording', url_params={'limit': 1, 'sort': 'asc'})
+        uva.get('recording?sort=asc&limit=1')
+        self.assertEqual(mocked_urlopen.call_count, calls + 1)
+
+        # Snapshots and other raw responses aren't cached
+        uva.get('snapshot/camera/x', True)
+        uva.get('snapshot/camera/x', True)
+        self.assertEqual(mocked_urlopen.call_count, calls + 3)
+
+        uva.put('camera/{}'.format(camera['data'][0]['_id']), camera['data'][0])
+        uva.get('camera')
+        uva.get('recording?sort=asc&limit=1')
+        self.assertEqual(mocked_urlopen.call_count, calls + 5)
@@ -57,6 +57,16 @@ class BasicCameraTests(unittest.TestCase):
         self.assertEqual(camera.model, _model)
         self.assertEqual(camera.overlay_text, _tag)
 
+        from unifi_video.camera import UnifiVideoCamera, models
+
+        self.assertEqual(camera.features,
+            frozenset(models[_model].get('features', [])))
+        self.assertIn('brightness', camera._isp_actionables)
+
+        # Capabilities are shared between cameras of the same model
+        other = UnifiVideoCamera(ufva, dict(test_camera, _id='x'))
+        self.assertIs(other._isp_actionables, camera._isp_actionables)
+
     @patch('unifi_video.api.urlopen')
     def test_ab_unsupported_camera(self, mocked_urlopen):
         """Init with unsupported camera model"""
@@ -141,7 +151,8 @@ class BasicCameraTests(unittest.TestCase):
                     camera.dynamic_range(arg)
                     self.assertEqual(camera.dynamic_range(), ret)
 
-                camera._isp_actionables.remove('wdr')
+                camera._isp_actionables = \
+                    camera._isp_actionables - set(['wdr'])
                 self.assertRaises(CameraModelError, camera.dynamic_range, 2)
 
                 # Test IR led control
@@ -153,5 +164,48 @@ class BasicCameraTests(unittest.TestCase):
 
                 break
 
+    @patch('unifi_video.api.urlopen')
+    def test_ad_batched_settings(self, mocked_urlopen):
+        """Batched setter changes should be saved with a single PUT,
+        verified per setter and rolled back locally on failure"""
+
+        def put_mock(url, camera_data, *args, **kwargs):
+            return {'data': [deepcopy(camera_data)]}
+
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+        camera = list(ufva.cameras)[0]
+
+        with patch('unifi_video.api.UnifiVideoAPI.put') as put:
+            put.side_effect = put_mock
+
+            with camera.batch() as batch:
+                self.assertIsNone(camera.brightness(11))
+                self.assertIsNone(camera.contrast(22))
+                self.assertIsNone(camera.onscreen_timestamp(True))
+                camera.set_recording_settings('motion', 3, 4)
+
+            self.assertEqual(put.call_count, 1)
+            self.assertTrue(batch.success)
+            self.assertEqual(batch.results, {
+                'brightness': True,
+                'contrast': True,
+                'enableDate': True,
+                'recording_settings': True,
+            })
+            self.assertEqual(camera.brightness(), 11)
+            self.assertEqual(camera.contrast(), 22)
+
+            put.reset_mock()
+            put.side_effect = lambda *args, **kwargs: False
+
+            def failing_batch():
+                with camera.batch():
+                    camera.brightness(99)
+
+            self.assertRaises(ValueError, failing_batch)
+            self.assertEqual(put.call_count, 1)
+            self.assertEqual(camera.brightness(), 11)
+            self.assertIsNone(camera._batch)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    from urllib.request import Request
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import Request, HTTPError
+
+from simulator import SyntheticNVR, recording_id
+from unifi_video import UnifiVideoAPI
+from unifi_video.cassette import RecordingTransport, ReplayTransport, \
+    CassetteError, Exchange, load_cassette, request_key
+
+class CassetteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'site.cassette.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_request_key(self):
+        self.assertEqual(
+            request_key('GET', 'http://a:7080/api/2.0/recording?'
+                'sort=desc&apiKey=secret&cameras%5B%5D=b&cameras%5B%5D=a'),
+            request_key('GET', 'https://b/api/2.0/recording?'
+                'cameras%5B%5D=b&cameras%5B%5D=a&sort=desc'))
+        self.assertNotEqual(
+            request_key('GET', 'http://a/api/2.0/camera'),
+            request_key('PUT', 'http://a/api/2.0/camera'))
+
+    def record(self, nvr, **kwargs):
+        with RecordingTransport(self.path, **kwargs) as transport:
+            uva = UnifiVideoAPI(username='user', password='secret-pass',
+                addr=nvr.addr, port=nvr.port, transport=transport)
+            listing = [r._id for r in uva.get_recordings(limit=1000)]
+            streamed = [r._id
+                for r in uva.get_recordings(limit=1000, stream=True)]
+            uva.get('recording/{}/download'.format(recording_id(7)),
+                os.path.join(self.tmp_dir, 'recorded.mp4'))
+            camera = list(uva.cameras)[0]
+            camera.brightness(60)
+        self.assertEqual(transport.exchanges, 9)
+        return listing, streamed
+
+    def test_record_and_replay(self):
+        with SyntheticNVR(cameras=3, recordings=1000, latency=0.02,
+                credentials=('user', 'secret-pass'),
+                download_size=100000) as nvr:
+            listing, streamed = self.record(nvr, max_body_bytes=1000)
+
+        with gzip.open(self.path, 'rb') as f:
+            raw = f.read()
+        self.assertNotIn(b'secret-pass', raw)
+        self.assertNotIn('JSESSIONID_AV={}'.format(
+            list(nvr._sessions)[0]).encode('utf8'), raw)
+
+        exchanges = load_cassette(self.path)
+        self.assertEqual(exchanges[0].status, 401)
+        self.assertEqual(exchanges[1].key, 'POST api/2.0/login')
+        self.assertEqual(exchanges[1].request_body, None)
+        download = [e for e in exchanges if e.key.endswith('download')][0]
+        self.assertEqual((len(download.body), download.body_size),
+            (1000, 100000))
+        self.assertTrue(all(e.ttfb >= 0.02 for e in exchanges))
+
+        for speed in (None, 1):
+            transport = ReplayTransport(self.path, speed=speed)
+            started = time.time()
+            uva = UnifiVideoAPI(username='user', password='secret-pass',
+                addr='nowhere', transport=transport)
+            self.assertEqual(len(uva.cameras), 3)
+            self.assertEqual(
+                [r._id for r in uva.get_recordings(limit=1000)], listing)
+            self.assertEqual(
+                [r._id for r in uva.get_recordings(limit=1000, stream=True)],
+                streamed)
+            filename = os.path.join(self.tmp_dir, 'replayed.mp4')
+            self.assertTrue(uva.get(
+                'recording/{}/download'.format(recording_id(7)), filename))
+            self.assertEqual(os.path.getsize(filename), 100000)
+            list(uva.cameras)[0].brightness(60)
+            elapsed = time.time() - started
+            self.assertEqual(transport.served, 9)
+
+            if speed:
+                self.assertGreaterEqual(elapsed, 0.2)
+            else:
+                self.assertLess(elapsed, 0.2)
+
+        # Exhausted exchanges are served again
+        uva.refresh_cameras()
+        self.assertEqual(transport.served, 10)
+        self.assertRaises(CassetteError, uva.get, 'camera/unknown')
+
+    def test_replayed_errors(self):
+        transport = ReplayTransport([
+            Exchange('GET api/2.0/bootstrap', status=500,
+                reason='Internal Server Error',
+                headers=[['Content-Type', 'application/json']],
+                body=b'{"rc": "error"}'),
+        ], speed=None)
+        self.assertRaises(ValueError, UnifiVideoAPI, api_key='xxx',
+            transport=transport)
+        with self.assertRaises(HTTPError) as ctx:
+            transport(Request('http://x/api/2.0/bootstrap'))
+        self.assertEqual(ctx.exception.code, 500)
+        self.assertEqual(ctx.exception.read(), b'{"rc": "error"}')
+
+    def test_cut_short_and_invalid_cassettes(self):
+        with SyntheticNVR(cameras=1, recordings=10) as nvr:
+            transport = RecordingTransport(self.path)
+            UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port,
+                transport=transport)
+            # Never closed, as if the recording process died
+            self.assertEqual(len(load_cassette(self.path)), 3)
+            transport.close()
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a cassette')
+        self.assertRaises(CassetteError, load_cassette, self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import json
+
+from copy import deepcopy
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import get_ufva_w_mocked_urlopen, mocked_response, read_fp
+from unifi_video.feed import CameraChangeFeed
+
+class CameraChangeFeedTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_feed(self, mocked_urlopen):
+        '''Feed should emit typed events with one request per poll and
+        back off while nothing changes
+        '''
+
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+        camera = read_fp('camera.json')['data'][0]
+        other = deepcopy(camera)
+        other['_id'] = '{:024d}'.format(1)
+
+        def poll(feed, *cameras):
+            mocked_urlopen.reset_mock()
+            mocked_urlopen.side_effect = mocked_response(
+                json.dumps({'data': list(cameras)}).encode('utf8'))
+            events = feed.poll()
+            self.assertEqual(mocked_urlopen.call_count, 1)
+            return sorted((e.type, e.camera_id) for e in events)
+
+        received = []
+        feed = CameraChangeFeed(ufva, min_interval=1, max_interval=4,
+            backoff=2)
+        feed.on('*', received.append)
+
+        self.assertEqual(poll(feed, camera, other), [])
+        self.assertEqual(len(feed.cameras), 2)
+        self.assertEqual(poll(feed, camera, other), [])
+        self.assertEqual(feed.interval, 4)
+
+        camera = deepcopy(camera)
+        camera['state'] = 'DISCONNECTED'
+        camera['lastSeen'] += 1000
+        other = deepcopy(other)
+        other['lastRecordingId'] = '{:024d}'.format(2)
+        other['ispSettings']['brightness'] = 10
+
+        self.assertEqual(poll(feed, camera, other), [
+            ('disconnected', camera['_id']),
+            ('new_recording', other['_id']),
+            ('settings_changed', other['_id']),
+        ])
+        self.assertEqual(feed.interval, 1)
+
+        self.assertEqual(poll(feed, other), [('removed', camera['_id'])])
+        self.assertEqual(poll(feed, other), [])
+        self.assertEqual(poll(feed, other), [])
+        self.assertEqual(poll(feed, other), [])
+        self.assertEqual(feed.interval, 4)
+        self.assertEqual(len(received), 4)
+
+if __name__ == '__main__':
+    unittest.main()
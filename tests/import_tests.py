@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import subprocess
+import sys
+
+from os.path import abspath, dirname
+
+root = abspath(dirname(__file__) + '/..')
+
+def modules_after(statement):
+    return set(subprocess.check_output([
+        sys.executable, '-c',
+        '{}; import sys; print("\\n".join(sys.modules))'.format(statement),
+    ], cwd=root, universal_newlines=True).split())
+
+class ImportTests(unittest.TestCase):
+
+    def test_import_footprint(self):
+        '''Importing the package should be cheap and importing the API
+        should not pull in distutils or setuptools
+        '''
+
+        api_modules = modules_after('from unifi_video import UnifiVideoAPI')
+        self.assertIn('unifi_video.api', api_modules)
+        for heavy in ('distutils', 'setuptools', 'pkg_resources',
+                'unifi_video._six'):
+            self.assertNotIn(heavy, api_modules)
+
+        if sys.version_info >= (3, 7):
+            modules = modules_after('import unifi_video')
+            self.assertNotIn('unifi_video.api', modules)
+            self.assertNotIn('unifi_video.camera', modules)
+
+    def test_submodule_access(self):
+        '''Submodules should be reachable as attributes after a plain
+        package import, as they were when the package imported eagerly
+        '''
+
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import unifi_video; print(" ".join(m.__name__ for m in ['
+            'unifi_video.api, unifi_video.camera, unifi_video.recording, '
+            'unifi_video.collections, unifi_video.utils]))',
+        ], cwd=root, universal_newlines=True).split()
+        self.assertEqual(output, ['unifi_video.api', 'unifi_video.camera',
+            'unifi_video.recording', 'unifi_video.collections',
+            'unifi_video.utils'])
+
+        import unifi_video
+        self.assertRaises(AttributeError, getattr, unifi_video, 'nonexistent')
+        self.assertIs(unifi_video.UnifiVideoAPI, unifi_video.api.UnifiVideoAPI)
@@ -0,0 +1,156 @@
+import unittest
+import json
+
+try:
+    from mock import patch
+except ImportError:
+    from unittest.mock import patch
+
+from helpers import mocked_response
+from simulator import SyntheticNVR, camera_id, recording_id
+from unifi_video import UnifiVideoAPI
+from unifi_video.instrumentation import Instrumentation, \
+    EndpointHistograms, Histogram, endpoint_template
+
+class InstrumentationTests(unittest.TestCase):
+
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template('camera'), 'camera')
+        self.assertEqual(
+            endpoint_template('recording/{}/download?x=y'.format(
+                recording_id(3))),
+            'recording/{id}/download')
+        self.assertEqual(
+            endpoint_template('/snapshot/camera/{}/'.format(camera_id(0))),
+            'snapshot/camera/{id}')
+
+    def test_histogram(self):
+        histogram = Histogram((.001, .01, .1, float('inf')))
+        for value in [.0005] * 90 + [.05] * 9 + [3]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [90, 0, 9, 1])
+        self.assertEqual(histogram.percentile(50), .001)
+        self.assertEqual(histogram.percentile(95), .1)
+        self.assertEqual(histogram.percentile(100), 3)
+        self.assertAlmostEqual(histogram.as_dict()['sum'], .045 + .45 + 3)
+        self.assertEqual(Histogram().percentile(50), None)
+
+    @patch('unifi_video.api.urlopen')
+    def test_disabled(self, mocked_urlopen):
+        '''Without listeners, requests should go through urlopen
+        untouched
+        '''
+
+        mocked_urlopen.side_effect = mocked_response()
+        uva = UnifiVideoAPI(api_key='xxx')
+        self.assertFalse(uva.instrumentation.enabled)
+        self.assertTrue(mocked_urlopen.called)
+        self.assertEqual(uva.instrumentation.counters()['requests'], 0)
+
+    def test_events(self):
+        events = []
+        histograms = EndpointHistograms()
+
+        with SyntheticNVR(cameras=3, recordings=500,
+                credentials=('user', 'pass')) as nvr:
+            uva = UnifiVideoAPI(username='user', password='pass',
+                addr=nvr.addr, port=nvr.port,
+                instrumentation=Instrumentation([histograms, events.append]))
+
+            self.assertEqual(
+                [(e.method, e.endpoint, e.status) for e in events],
+                [
+                    ('POST', 'login', 200),
+                    ('GET', 'bootstrap', 200),
+                    ('GET', 'bootstrap', 401),
+                    ('GET', 'camera', 200),
+                    ('GET', 'recording', 200),
+                    ('GET', 'recording', 200),
+                ])
+            self.assertTrue(events[2].login_retry)
+            self.assertEqual([e.follow_up for e in events],
+                [False] * 5 + [True])
+            follow_up = events.pop()
+            self.assertTrue(follow_up.construct > 0)
+            self.assertEqual(follow_up.timings, {
+                'construct': follow_up.construct})
+            for event in events:
+                self.assertFalse(event.reused)
+                self.assertTrue(event.connect > 0)
+                self.assertTrue(event.ttfb > 0)
+            for event in events[3:]:
+                self.assertTrue(event.bytes > 0)
+                self.assertTrue(event.body > 0)
+                self.assertTrue(event.parse > 0)
+            self.assertTrue(events[3].construct > 0)
+            self.assertEqual(events[1].construct, None)
+            self.assertEqual(events[4].construct, None)
+
+            del events[:]
+            recordings = uva.get_recordings(limit=500, stream=True)
+            self.assertEqual(len(list(recordings)), 500)
+            camera = list(uva.cameras)[0]
+            camera.brightness(60)
+
+            self.assertEqual(
+                [(e.method, e.endpoint, e.status) for e in events],
+                [('GET', 'recording', 200), ('PUT', 'camera/{id}', 200)])
+            self.assertEqual(events[0].parse, None)
+            self.assertTrue(events[0].bytes > 500 * 100)
+
+        self.assertEqual(uva.instrumentation.counters(), {
+            'requests': 7,
+            'connections': 7,
+            'reused_connections': 0,
+            'login_retries': 1,
+        })
+
+        exported = json.loads(histograms.dump())
+        self.assertEqual(exported['GET recording']['statuses'], {'200': 2})
+        self.assertEqual(sorted(exported), [
+            'GET bootstrap', 'GET camera', 'GET recording',
+            'POST login', 'PUT camera/{id}'])
+        self.assertEqual(exported['GET bootstrap']['statuses'],
+            {'200': 1, '401': 1})
+        self.assertEqual(exported['GET recording']['count'], 2)
+        self.assertEqual(
+            exported['GET recording']['histograms']['total']['count'], 2)
+        self.assertEqual(
+            exported['GET recording']['histograms']['construct']['count'], 1)
+
+        histograms.reset()
+        self.assertEqual(histograms.as_dict(), {})
+
+    def test_unconsumed_listing(self):
+        '''Listing requests should be reported when sent, not when (or
+        whether) the listing is consumed
+        '''
+
+        events = []
+        with SyntheticNVR(cameras=1, recordings=50) as nvr:
+            uva = UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port,
+                instrumentation=Instrumentation([events.append]))
+            del events[:]
+
+            recordings = uva.get_recordings(limit=10)
+            self.assertEqual(
+                [(e.endpoint, e.follow_up) for e in events],
+                [('recording', False)])
+            next(recordings)
+            self.assertEqual(len(events), 1)
+            self.assertEqual(uva.instrumentation.counters()['requests'], 4)
+
+            list(recordings)
+            self.assertEqual(
+                [(e.endpoint, e.follow_up) for e in events],
+                [('recording', False), ('recording', True)])
+
+            del events[:]
+            del recordings
+            list(uva.get_recordings(limit=10))
+            uva.get_recordings(limit=10)
+            self.assertEqual([e.follow_up for e in events],
+                [False, True, False])
+
+if __name__ == '__main__':
+    unittest.main()
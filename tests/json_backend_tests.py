@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import json
+
+from unifi_video import json_backend
+from unifi_video.json_backend import JSONBackend
+
+class JSONBackendTests(unittest.TestCase):
+
+    def tearDown(self):
+        json_backend.set_backend()
+
+    def test_backends(self):
+        body = '{"data": [{"_id": "a", "name": "käyttäjä"}], "meta": {}}'\
+            .encode('utf8')
+        expected = json.loads(body.decode('utf8'))
+
+        names = json_backend.available_backends()
+        self.assertEqual(names[-1], 'json')
+        self.assertEqual(json_backend.get_backend().name, names[0])
+
+        for name in names:
+            json_backend.set_backend(name)
+            self.assertEqual(json_backend.loads(body), expected)
+
+        with self.assertRaises(ValueError):
+            json_backend.set_backend('yaml')
+
+    def test_object_hooks(self):
+        body = b'{"data": [{"_id": "a", "meta": {"x": 1}}, {"_id": "b"}]}'
+
+        def hook(obj):
+            return tuple(sorted(obj)) if '_id' in obj else obj
+
+        expected = {'data': [('_id', 'meta'), ('_id',)]}
+
+        json_backend.set_backend('json')
+        self.assertEqual(json_backend.loads(body, object_hook=hook), expected)
+
+        # Backends with no support for hooks leave hooked decoding to
+        # the standard library
+        json_backend.set_backend(JSONBackend('custom', json.loads))
+        self.assertEqual(json_backend.loads(body, object_hook=hook), expected)
+        self.assertEqual(json_backend.loads(body), json.loads(body))
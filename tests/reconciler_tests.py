@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import json
+
+from copy import deepcopy
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import get_ufva_w_mocked_urlopen
+from unifi_video.reconciler import CameraReconciler
+
+class ReconcilerTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_reconcile(self, mocked_urlopen):
+        '''Reconciler should only save cameras that differ from the desired
+        state and leave everything untouched on dry runs
+        '''
+
+        def put_mock(url, camera_data, *args, **kwargs):
+            return {'data': [deepcopy(camera_data)]}
+
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+        camera = list(ufva.cameras)[0]
+
+        desired = [
+            {'cameras': '*', 'settings': {
+                'recording_mode': 'fulltime',
+                'brightness': 50,
+            }},
+            {'cameras': {'model': camera.model}, 'settings': {
+                'brightness': 150,
+                'onscreen_text': ' Gate ',
+                'pre_padding_secs': 5,
+            }},
+            {'cameras': 'no such camera', 'settings': {'contrast': 0}},
+        ]
+
+        with patch('unifi_video.api.UnifiVideoAPI.put') as put:
+            put.side_effect = put_mock
+
+            report = CameraReconciler(ufva, desired).reconcile(dry_run=True)
+            self.assertEqual(put.call_count, 0)
+            self.assertEqual(report[camera._id]['changes'], {
+                'ispSettings.brightness': [50, 100],
+                'osdSettings.tag': ['Test', 'Gate'],
+                'recordingSettings.prePaddingSecs': [1, 5],
+            })
+            self.assertEqual(camera.brightness(), 50)
+
+            report = CameraReconciler(ufva, desired).reconcile()
+            self.assertEqual(put.call_count, 1)
+            self.assertTrue(report[camera._id]['applied'])
+            self.assertTrue(all(report[camera._id]['verified'].values()))
+            self.assertEqual(camera.brightness(), 100)
+            self.assertEqual(camera.overlay_text, 'Gate')
+
+            report = CameraReconciler(ufva, desired).reconcile()
+            self.assertEqual(put.call_count, 1)
+            self.assertEqual(report[camera._id]['changes'], {})
+
+if __name__ == '__main__':
+    unittest.main()
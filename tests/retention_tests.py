@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import get_ufva_w_mocked_urlopen
+from unifi_video.recording import UnifiVideoRecording
+from unifi_video.retention import RetentionEngine, RetentionRule
+
+day_ms = 24 * 3600 * 1000
+now = 1600000000
+
+def synthetic_recordings():
+    recordings = []
+    for i in range(60):
+        start = now * 1000 - (i + 1) * day_ms / 2
+        recordings.append({
+            '_id': '{:024d}'.format(i),
+            'eventType': 'motionRecording' if i % 2 else 'fullTimeRecording',
+            'cameras': ['a' if i % 3 else 'b'],
+            'startTime': int(start),
+            'endTime': int(start + 60000),
+            'locked': i == 59,
+            'inProgress': False,
+            'markedForDeletion': False,
+        })
+    return sorted(recordings, key=lambda r: r['startTime'])
+
+class RetentionTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_retention(self, mocked_urlopen):
+        '''Retention engine should page through listings and judge each
+        recording by the first rule that applies to it
+        '''
+
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+        recordings = synthetic_recordings()
+        listings = []
+
+        def get_recordings(start_time=None, end_time=None, limit=0, **kwargs):
+            listings.append(limit)
+            return [
+                UnifiVideoRecording(ufva, r) for r in recordings
+                if (start_time is None or r['startTime'] >= start_time * 1000)
+                and r['endTime'] <= end_time * 1000
+            ][:limit]
+
+        rules = [
+            RetentionRule(2, 'all', cameras=['b']),
+            RetentionRule(20, 'motion'),
+            RetentionRule(10, 'fulltime'),
+        ]
+
+        expected = set()
+        for r in recordings:
+            age = now * 1000 - r['endTime']
+            if r['locked']:
+                continue
+            if r['cameras'] == ['b']:
+                max_age = 2
+            elif r['eventType'] == 'motionRecording':
+                max_age = 20
+            else:
+                max_age = 10
+            if age > max_age * day_ms:
+                expected.add(r['_id'])
+
+        with patch.object(ufva, 'get_recordings', side_effect=get_recordings):
+            engine = RetentionEngine(ufva, rules, page_size=7, batch_size=5,
+                max_rate=None)
+            with patch.object(ufva, 'delete_recordings') as delete:
+                report = engine.run(now=now)
+                self.assertEqual(delete.call_count, 0)
+
+            self.assertEqual(set(report['deleted']), expected)
+            self.assertEqual(len(report['deleted']), len(expected))
+            self.assertEqual(sum(report['per_rule']), len(expected))
+            self.assertTrue(all(limit == 7 for limit in listings))
+
+            with patch.object(ufva, 'delete_recordings') as delete:
+                delete.side_effect = lambda ids, **kwargs: \
+                    [{'ids': list(ids), 'success': True}]
+                report = engine.run(dry_run=False, now=now)
+
+            self.assertEqual(set(report['deleted']), expected)
+            self.assertTrue(all(
+                len(c[0][0]) <= 5 for c in delete.call_args_list))
+
+if __name__ == '__main__':
+    unittest.main()
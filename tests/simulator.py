@@ -0,0 +1,676 @@
+'''Synthetic UniFi Video server for benchmarks, integration and soak tests
+
+Serves ``bootstrap``, ``camera``, ``recording`` (listings, single
+recordings, downloads, deletion and locking), ``snapshot`` and ``login``
+endpoints of the UniFi Video API at a configurable scale. Responses are
+shaped after the JSON in ``tests/files``. Recordings are generated on the
+fly from their index, so listings of millions of recordings are streamed
+out without ever being held in memory.
+
+To behave like a remote site, the server can add per-request latency,
+shape bandwidth, expire login sessions (answering with HTTP 401 until the
+client logs in again), serve byte ranges of downloads and snapshots, and
+fail or stall a random share of requests.
+
+Example:
+    >>> with SyntheticNVR(cameras=50, recordings=100000) as nvr:
+    ...     uva = UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port)
+
+Run standalone for soak tests:
+
+    python tests/simulator.py --port 7080 --latency 0.05 --error-rate 0.01
+
+Usage: python tests/simulator.py --help
+'''
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import binascii
+import json
+import os
+import os.path
+import random
+import re
+import threading
+import time
+
+from collections import Counter
+from copy import deepcopy
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+files_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files')
+
+api_prefix = '/api/2.0/'
+camera_id_prefix = '5bfb3523'
+recording_id_prefix = '5c21fd4b'
+session_cookie = 'JSESSIONID_AV'
+error_codes = (500, 502, 503)
+
+_byte_range = re.compile(r'^bytes=(\d*)-(\d*)$')
+_cookie = re.compile(session_cookie + r'=([^;,\s]+)')
+
+def read_fp(basename):
+    with open(os.path.join(files_dir, basename), 'r') as f:
+        return json.loads(f.read())
+
+def camera_id(index):
+    return '{}{:016x}'.format(camera_id_prefix, index)
+
+def recording_id(index):
+    return '{}{:016x}'.format(recording_id_prefix, index)
+
+def recording_index(rec_id):
+    if not rec_id.startswith(recording_id_prefix):
+        return None
+    try:
+        return int(rec_id[len(recording_id_prefix):], 16)
+    except ValueError:
+        return None
+
+def parse_range(header, size):
+    '''Parse a single range ``Range`` header
+
+    Arguments:
+        header (str or NoneType): ``Range`` header value
+        size (int): Size of the full response body
+
+    Returns:
+        tuple or NoneType: ``(first, last)`` byte positions, inclusive,
+        ``None`` if the whole body should be served, or ``False`` if the
+        range is not satisfiable
+    '''
+
+    match = _byte_range.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        first, last = max(0, size - int(last)), size - 1
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        return False
+    return first, last
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SyntheticNVR(object):
+    """Synthetic UniFi Video server running in a background thread
+
+    Arguments:
+        cameras (int): Number of cameras
+        recordings (int): Number of recordings. Recordings are spread
+            evenly across cameras and, for each camera, alternate between
+            motion and fulltime recordings.
+        download_size (int): Size of recording downloads in bytes
+        recording_interval (int): Milliseconds between recording start
+            times
+        recording_length (int): Recording length in milliseconds
+        host (str): Address to listen at
+        port (int): Port to listen at. ``0`` for any free port.
+        latency (float or tuple): Seconds to wait before answering each
+            request, or a ``(min, max)`` range to pick from at random
+        bandwidth (int or NoneType): Response body bytes per second, per
+            connection. ``None`` for no limit.
+        session_ttl (float or NoneType): Seconds a login session is valid
+            for. ``None`` for sessions that never expire.
+        api_keys (iterable or NoneType): Accepted API keys. ``None`` to
+            accept any key.
+        credentials (tuple or NoneType): Accepted ``(username, password)``.
+            ``None`` to accept any.
+        error_rate (float): Share of requests (0 - 1) to answer with a
+            random HTTP 500, 502 or 503
+        slow_rate (float): Share of requests (0 - 1) to delay by
+            ``slow_delay`` on top of ``latency``
+        slow_delay (float): See above
+        seed (int, optional): Seed for ``latency``, ``error_rate`` and
+            ``slow_rate`` randomness
+
+    Attributes:
+        requests (int): Number of requests served
+        statuses (:class:`~collections.Counter`): Response counts by HTTP
+            status code
+        logins (int): Number of successful logins
+        cameras (dict): Camera IDs mapped to camera JSON
+        recording_count (int): See ``recordings`` above. Can be changed
+            on the fly, as can the other arguments above saved as
+            attributes of the same name.
+        deleted (set): Indexes of deleted recordings
+        locked (set): Indexes of locked recordings
+    """
+
+    first_start_time = 1545731400000
+
+    def __init__(self, cameras=8, recordings=1000, download_size=1 << 20,
+            recording_interval=60000, recording_length=59000,
+            host='127.0.0.1', port=0, latency=0, bandwidth=None,
+            session_ttl=None, api_keys=None, credentials=None,
+            error_rate=0, slow_rate=0, slow_delay=1.0, seed=None):
+        self.host = host
+        self.requested_port = port
+        self.recording_count = recordings
+        self.download_size = download_size
+        self.recording_interval = recording_interval
+        self.recording_length = recording_length
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.session_ttl = session_ttl
+        self.api_keys = set(api_keys) if api_keys is not None else None
+        self.credentials = tuple(credentials) if credentials else None
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.statuses = Counter()
+        self.logins = 0
+        self.deleted = set()
+        self.locked = set()
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        self._bootstrap = read_fp('bootstrap.json')
+        self._camera_sample = read_fp('camera.json')['data'][0]
+        self._recording_sample = read_fp('recordings.json')['data'][0]
+        self.cameras = {}
+        self.set_camera_count(cameras)
+
+    def set_camera_count(self, count):
+        '''Replace cameras with ``count`` fresh ones'''
+
+        cameras = {}
+        for i in range(count):
+            camera = deepcopy(self._camera_sample)
+            camera['_id'] = camera_id(i)
+            camera['name'] = 'Camera {}'.format(i)
+            camera['mac'] = '{:012X}'.format(0xFCECDA000000 + i)
+            cameras[camera['_id']] = camera
+        with self._lock:
+            self.cameras = cameras
+            self._camera_ids = sorted(cameras)
+
+    def new_session(self):
+        '''Start a login session
+
+        Returns:
+            str: Session ID
+        '''
+
+        session = binascii.hexlify(os.urandom(16)).decode('ascii')
+        with self._lock:
+            self._sessions[session] = monotonic()
+            self.logins += 1
+        return session
+
+    def session_valid(self, session):
+        with self._lock:
+            started = self._sessions.get(session)
+        if started is None:
+            return False
+        return self.session_ttl is None or \
+            monotonic() - started < self.session_ttl
+
+    def expire_sessions(self):
+        '''End all login sessions; requests that rely on them get HTTP 401
+        until the client logs in again
+        '''
+
+        with self._lock:
+            self._sessions.clear()
+
+    def draw_fault(self):
+        '''Pick this request's fate
+
+        Returns:
+            tuple: Seconds to delay the response by and the HTTP error code
+            to answer with (``None`` for no error)
+        '''
+
+        with self._lock:
+            latency = self.latency
+            if isinstance(latency, (tuple, list)):
+                latency = self.random.uniform(*latency)
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                latency += self.slow_delay
+            error = None
+            if self.error_rate and self.random.random() < self.error_rate:
+                error = self.random.choice(error_codes)
+        return latency, error
+
+    def recording(self, index):
+        '''Build the JSON of the recording at ``index``
+
+        Returns:
+            dict or NoneType: ``None`` for indexes out of range and for
+            deleted recordings
+        '''
+
+        if index is None or not 0 <= index < self.recording_count or \
+                index in self.deleted:
+            return None
+        rec = dict(self._recording_sample)
+        start = self.first_start_time + index * self.recording_interval
+        camera_ids = self._camera_ids or [camera_id(0)]
+        rec.update({
+            '_id': recording_id(index),
+            'eventType': 'fullTimeRecording' \
+                if index // len(camera_ids) % 2 else 'motionRecording',
+            'startTime': start,
+            'endTime': start + self.recording_length,
+            'cameras': [camera_ids[index % len(camera_ids)]],
+            'locked': index in self.locked,
+            'inProgress': False,
+        })
+        return rec
+
+    def _index_range(self, start_time, end_time):
+        '''Indexes of recordings that start at or after ``start_time`` and
+        end at or before ``end_time``
+        '''
+
+        low, high = 0, self.recording_count
+        if start_time is not None:
+            offset = start_time - self.first_start_time
+            low = max(low, -(-offset // self.recording_interval))
+        if end_time is not None:
+            offset = end_time - self.recording_length - self.first_start_time
+            high = min(high, offset // self.recording_interval + 1)
+        return low, max(low, high)
+
+    def listing(self, query):
+        '''Iterate over recordings matching a recording listing query
+
+        Arguments:
+            query (dict): Parsed query string (see :func:`parse_qs`)
+
+        Returns:
+            Iterable of recording dicts
+        '''
+
+        def first(name, convert=int):
+            values = query.get(name)
+            return convert(values[0]) if values and values[0] else None
+
+        low, high = self._index_range(first('startTime'), first('endTime'))
+        limit = first('limit')
+        cameras = set(query.get('cameras[]', []))
+        causes = set(query.get('cause[]', []))
+        indexes = range(low, high) if first('sort', str) == 'asc' \
+            else range(high - 1, low - 1, -1)
+
+        count = 0
+        for index in indexes:
+            if limit and count >= limit:
+                break
+            rec = self.recording(index)
+            if rec is None or \
+                    (cameras and rec['cameras'][0] not in cameras) or \
+                    (causes and rec['eventType'] not in causes):
+                continue
+            count += 1
+            yield rec
+
+    @property
+    def port(self):
+        return self._server.server_address[1] if self._server \
+            else self.requested_port
+
+    @property
+    def addr(self):
+        return self.host
+
+    def _make_server(self):
+        server = _Server((self.host, self.requested_port),
+            self.handler_class())
+        server.nvr = self
+        return server
+
+    def start(self):
+        '''Start serving in a background thread'''
+
+        self._server = self._make_server()
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''Stop serving'''
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def serve_forever(self):
+        '''Serve in the calling thread until interrupted'''
+
+        self._server = self._make_server()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._server = None
+
+    def handler_class(self):
+        return NVRRequestHandler
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+class NVRRequestHandler(BaseHTTPRequestHandler):
+    """Serves UniFi Video API requests for a :class:`SyntheticNVR`"""
+
+    server_version = 'SyntheticNVR/1.0'
+    chunk_size = 64 * 1024
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def nvr(self):
+        return self.server.nvr
+
+    def _authorized(self, query):
+        if 'apiKey' in query:
+            keys = self.nvr.api_keys
+            return keys is None or query['apiKey'][0] in keys
+        match = _cookie.search(self.headers.get('Cookie') or '')
+        return bool(match) and self.nvr.session_valid(match.group(1))
+
+    def _route(self, method):
+        with self.nvr._lock:
+            self.nvr.requests += 1
+
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query, keep_blank_values=True)
+        path = parsed.path[len(api_prefix):].strip('/').split('/') \
+            if parsed.path.startswith(api_prefix) else None
+
+        body = None
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = json.loads(self.rfile.read(length).decode('utf8'))
+
+        delay, error = self.nvr.draw_fault()
+        if delay:
+            time.sleep(delay)
+        if error:
+            return self.send_error_json(error, 'Simulated failure')
+
+        handler = getattr(self, 'handle_{}_{}'.format(
+            method.lower(), path[0]), None) if path else None
+        if handler is None:
+            return self.send_error_json(404, 'Not found')
+        if path[0] != 'login' and not self._authorized(query):
+            return self.send_error_json(401, 'Unauthorized')
+        return handler(path[1:], query, body)
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+    def send_headers(self, status, headers):
+        with self.nvr._lock:
+            self.nvr.statuses[status] += 1
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_body(self, chunks):
+        '''Write response body chunks, at most ``SyntheticNVR.bandwidth``
+        bytes per second
+        '''
+
+        bandwidth = self.nvr.bandwidth
+        if not bandwidth:
+            for chunk in chunks:
+                self.wfile.write(chunk)
+            return
+
+        # Small enough writes for the rate to be even within a chunk
+        step = max(1024, bandwidth // 20)
+        started = monotonic()
+        sent = 0
+        for chunk in chunks:
+            for i in range(0, len(chunk), step):
+                piece = chunk[i:i + step]
+                sent += len(piece)
+                ahead = sent / float(bandwidth) - (monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+                self.wfile.write(piece)
+
+    def send_json(self, payload, status=200, headers=()):
+        body = json.dumps(payload).encode('utf8')
+        self.send_headers(status, [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+        ] + list(headers))
+        self.send_body([body])
+
+    def send_error_json(self, status, message):
+        self.send_json({
+            'rc': 'error',
+            'message': message,
+            'causedBy': None,
+        }, status)
+
+    def send_bytes(self, size, content_type, filename=None, headers=()):
+        '''Send ``size`` bytes of a repeating 0 - 255 pattern, honouring
+        single range ``Range`` requests
+        '''
+
+        extra = [('Accept-Ranges', 'bytes')] + list(headers)
+        if filename:
+            extra.append(('Content-Disposition',
+                'attachment; filename={}'.format(filename)))
+
+        byte_range = parse_range(self.headers.get('Range'), size)
+        if byte_range is False:
+            return self.send_headers(416, [
+                ('Content-Range', 'bytes */{}'.format(size)),
+                ('Content-Length', '0'),
+            ])
+        if byte_range:
+            first, last = byte_range
+            status = 206
+            extra.append(('Content-Range',
+                'bytes {}-{}/{}'.format(first, last, size)))
+        else:
+            first, last = 0, size - 1
+            status = 200
+
+        self.send_headers(status, [
+            ('Content-Type', content_type),
+            ('Content-Length', str(last - first + 1)),
+        ] + extra)
+
+        pattern = bytes(bytearray(range(256))) * (self.chunk_size // 256 + 1)
+
+        def chunks(position, end):
+            while position < end:
+                offset = position % 256
+                chunk = pattern[offset:offset + min(self.chunk_size,
+                    end - position)]
+                position += len(chunk)
+                yield chunk
+
+        self.send_body(chunks(first, last + 1))
+
+    def handle_get_bootstrap(self, path, query, body):
+        bootstrap = deepcopy(self.nvr._bootstrap)
+        bootstrap['data'][0]['cameras'] = list(self.nvr.cameras.values())
+        self.send_json(bootstrap)
+
+    def handle_post_login(self, path, query, body):
+        credentials = self.nvr.credentials
+        if credentials and (not body or (body.get('username'),
+                body.get('password')) != credentials):
+            return self.send_error_json(401, 'Invalid credentials')
+        self.send_json({'data': [{}]}, headers=[
+            ('Set-Cookie', '{}={}; Path=/; HttpOnly'.format(
+                session_cookie, self.nvr.new_session()))])
+
+    def handle_get_camera(self, path, query, body):
+        if not path:
+            return self.send_json({
+                'data': list(self.nvr.cameras.values()),
+                'meta': {'totalCount': len(self.nvr.cameras)},
+            })
+        camera = self.nvr.cameras.get(path[0])
+        if camera is None:
+            return self.send_error_json(404, 'Not found')
+        self.send_json({'data': [camera]})
+
+    def handle_put_camera(self, path, query, body):
+        if not path or path[0] not in self.nvr.cameras:
+            return self.send_error_json(404, 'Not found')
+        self.nvr.cameras[path[0]] = body
+        self.send_json({'data': [body]})
+
+    def handle_get_snapshot(self, path, query, body):
+        self.send_bytes(32 * 1024, 'image/jpeg')
+
+    def handle_get_recording(self, path, query, body):
+        if not path:
+            return self.send_listing(query)
+        rec = self.nvr.recording(recording_index(path[0]))
+        if rec is None:
+            return self.send_error_json(404, 'Not found')
+        if path[1:] == ['download']:
+            return self.send_bytes(self.nvr.download_size, 'video/mp4',
+                'recording-{}.mp4'.format(rec['_id']))
+        self.send_json({'data': [rec]})
+
+    def handle_put_recording(self, path, query, body):
+        index = recording_index(path[0]) if path else None
+        if self.nvr.recording(index) is None:
+            return self.send_error_json(404, 'Not found')
+        if body and body.get('locked'):
+            self.nvr.locked.add(index)
+        else:
+            self.nvr.locked.discard(index)
+        self.send_json({'data': [self.nvr.recording(index)]})
+
+    def handle_delete_recording(self, path, query, body):
+        ids = path[:1] or query.get('recordings[]', [])
+        for rec_id in ids:
+            index = recording_index(rec_id)
+            if index is not None:
+                self.nvr.deleted.add(index)
+        self.send_json({'data': []})
+
+    def send_listing(self, query):
+        '''Stream a recording listing without knowing its length up
+        front; the response is delimited by closing the connection
+        '''
+
+        ids_only = query.get('idsOnly', ['false'])[0] == 'true'
+        self.send_headers(200, [('Content-Type', 'application/json')])
+        self.close_connection = True
+
+        def chunks():
+            parts = [b'{"data":[']
+            size = 0
+            count = 0
+            for rec in self.nvr.listing(query):
+                item = json.dumps(rec['_id'] if ids_only else rec)\
+                    .encode('utf8')
+                parts.append(b',' + item if count else item)
+                size += len(item)
+                count += 1
+                if size >= self.chunk_size:
+                    yield b''.join(parts)
+                    parts, size = [], 0
+            parts.append('],"meta":{{"totalCount":{},"filteredCount":{}}}}}'\
+                .format(self.nvr.recording_count, count).encode('utf8'))
+            yield b''.join(parts)
+
+        self.send_body(chunks())
+
+def parse_latency(value):
+    if ',' in value:
+        return tuple(float(v) for v in value.split(',', 1))
+    return float(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve a synthetic UniFi Video API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7080)
+    parser.add_argument('--cameras', type=int, default=8)
+    parser.add_argument('--recordings', type=int, default=1000)
+    parser.add_argument('--download-size', type=int, default=1 << 20,
+        help='recording download size in bytes')
+    parser.add_argument('--latency', type=parse_latency, default=0,
+        help='seconds, or "min,max" for a random latency')
+    parser.add_argument('--bandwidth', type=int,
+        help='response body bytes per second, per connection')
+    parser.add_argument('--session-ttl', type=float,
+        help='seconds until login sessions expire')
+    parser.add_argument('--api-key', action='append', dest='api_keys',
+        help='accepted API key (repeatable; default: any)')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--slow-rate', type=float, default=0)
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    nvr = SyntheticNVR(cameras=args.cameras, recordings=args.recordings,
+        download_size=args.download_size, host=args.host, port=args.port,
+        latency=args.latency, bandwidth=args.bandwidth,
+        session_ttl=args.session_ttl, api_keys=args.api_keys,
+        credentials=(args.username, args.password) \
+            if args.username is not None else None,
+        error_rate=args.error_rate, slow_rate=args.slow_rate,
+        slow_delay=args.slow_delay, seed=args.seed)
+
+    print('Serving UniFi Video API at http://{}:{}{}'.format(
+        args.host, args.port, api_prefix))
+    try:
+        nvr.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps({
+        'requests': nvr.requests,
+        'logins': nvr.logins,
+        'statuses': dict(nvr.statuses),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
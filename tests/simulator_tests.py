@@ -0,0 +1,134 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+
+try:
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import Request, urlopen, HTTPError
+
+from unifi_video import UnifiVideoAPI
+
+from simulator import SyntheticNVR, parse_range, recording_id
+
+class SimulatorTests(unittest.TestCase):
+
+    def url(self, nvr, endpoint):
+        return 'http://{}:{}/api/2.0/{}'.format(nvr.addr, nvr.port, endpoint)
+
+    def test_range_parsing(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-2000', 1000), (990, 999))
+        self.assertEqual(parse_range('bytes=1000-', 1000), False)
+        self.assertEqual(parse_range('bytes=0-1,5-9', 1000), None)
+        self.assertEqual(parse_range(None, 1000), None)
+
+    def test_listing(self):
+        with SyntheticNVR(cameras=4, recordings=2500) as nvr:
+            uva = UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port)
+            self.assertEqual(len(uva.cameras), 4)
+            self.assertEqual(len(uva.recordings), 300)
+
+            recordings = list(uva.get_recordings(limit=2500, stream=True))
+            self.assertEqual(len(recordings), 2500)
+            self.assertEqual(recordings[0]._id, recording_id(2499))
+
+            camera = list(uva.cameras)[0]
+            recordings = list(uva.get_recordings(rec_type='fulltime',
+                camera=camera, order='asc'))
+            self.assertEqual(len(recordings), 312)
+            self.assertTrue(all(r.rec_type == 'fullTimeRecording' and
+                r.cameras == [camera._id] for r in recordings))
+
+    def test_session_expiry(self):
+        with SyntheticNVR(credentials=('user', 'pass')) as nvr:
+            uva = UnifiVideoAPI(username='user', password='pass',
+                addr=nvr.addr, port=nvr.port)
+            self.assertEqual(nvr.logins, 1)
+            self.assertEqual(nvr.statuses[401], 1)
+
+            nvr.expire_sessions()
+            self.assertTrue(uva.get('camera'))
+            self.assertEqual(nvr.logins, 2)
+            self.assertEqual(nvr.statuses[401], 2)
+
+            nvr.session_ttl = 0
+            self.assertFalse(uva.get('camera'))
+            self.assertEqual(nvr.logins, 3)
+
+        with SyntheticNVR(api_keys=['valid']) as nvr:
+            self.assertRaises(ValueError, UnifiVideoAPI, api_key='invalid',
+                addr=nvr.addr, port=nvr.port)
+
+    def test_ranges(self):
+        with SyntheticNVR(recordings=1, download_size=100000) as nvr:
+            url = self.url(nvr, 'recording/{}/download?apiKey=x'.format(
+                recording_id(0)))
+
+            res = urlopen(url)
+            self.assertEqual(res.headers['Accept-Ranges'], 'bytes')
+            full = res.read()
+            self.assertEqual(len(full), 100000)
+
+            req = Request(url)
+            req.add_header('Range', 'bytes=1000-1999')
+            res = urlopen(req)
+            self.assertEqual(res.getcode(), 206)
+            self.assertEqual(res.headers['Content-Range'],
+                'bytes 1000-1999/100000')
+            self.assertEqual(res.read(), full[1000:2000])
+
+            req = Request(url)
+            req.add_header('Range', 'bytes=-70000')
+            self.assertEqual(urlopen(req).read(), full[-70000:])
+
+            req = Request(url)
+            req.add_header('Range', 'bytes=100000-')
+            with self.assertRaises(HTTPError) as ctx:
+                urlopen(req)
+            self.assertEqual(ctx.exception.code, 416)
+
+    def test_faults(self):
+        with SyntheticNVR(error_rate=1) as nvr:
+            with self.assertRaises(HTTPError) as ctx:
+                urlopen(self.url(nvr, 'camera?apiKey=x'))
+            self.assertIn(ctx.exception.code, (500, 502, 503))
+            self.assertEqual(json.loads(ctx.exception.read().decode('utf8'))
+                ['rc'], 'error')
+
+        with SyntheticNVR(latency=0.1, slow_rate=1, slow_delay=0.1) as nvr:
+            started = time.time()
+            urlopen(self.url(nvr, 'camera?apiKey=x')).read()
+            self.assertGreaterEqual(time.time() - started, 0.2)
+
+        with SyntheticNVR(error_rate=0.5, seed=1) as nvr:
+            for _ in range(20):
+                try:
+                    urlopen(self.url(nvr, 'camera?apiKey=x')).read()
+                except HTTPError:
+                    pass
+            self.assertEqual(nvr.requests, 20)
+            self.assertEqual(sum(nvr.statuses.values()), 20)
+            self.assertTrue(0 < nvr.statuses[200] < 20)
+
+    def test_bandwidth(self):
+        with SyntheticNVR(recordings=1, download_size=50000,
+                bandwidth=200000) as nvr:
+            uva = UnifiVideoAPI(api_key='xxx', addr=nvr.addr, port=nvr.port)
+            fd, path = tempfile.mkstemp()
+            os.close(fd)
+            try:
+                started = time.time()
+                uva.get('recording/{}/download'.format(recording_id(0)), path)
+                self.assertGreaterEqual(time.time() - started, 0.25)
+                self.assertEqual(os.path.getsize(path), 50000)
+            finally:
+                os.remove(path)
+
+if __name__ == '__main__':
+    unittest.main()
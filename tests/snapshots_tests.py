@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import unittest
+import threading
+import time
+
+try:
+    from mock import Mock, patch, MagicMock
+except ModuleNotFoundError:
+    from unittest.mock import Mock, patch, MagicMock
+
+from helpers import get_ufva_w_mocked_urlopen
+from unifi_video.snapshots import SnapshotPoller, SnapshotCache
+
+class SnapshotPollerTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_poller(self, mocked_urlopen):
+        '''Poller should keep at most `frames` snapshots per camera in memory
+        and count slots missed due to slow fetches
+        '''
+
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+        camera = list(ufva.cameras)[0]
+        requested = []
+
+        def get(url, raw=False, *args, **kwargs):
+            requested.append(url)
+            time.sleep(0.03 if 'width=320' in url else 0)
+            return b'\xff\xd8jpeg'
+
+        with patch.object(ufva, 'get', side_effect=get):
+            poller = SnapshotPoller(ufva, interval=0.01, frames=3, jitter=0)
+            poller.add(camera, width=320)
+            poller.add('000000000000000000000000', interval=0.05)
+            poller.start()
+            time.sleep(0.3)
+            poller.stop()
+
+        self.assertEqual(len(poller.frames(camera)), 3)
+        self.assertEqual(poller.latest(camera).image, b'\xff\xd8jpeg')
+        self.assertEqual(poller.latest(camera).width, 320)
+        self.assertTrue(all(
+            url.startswith('snapshot/camera/') for url in requested))
+
+        stats = poller.stats()
+        self.assertGreater(stats[camera._id]['missed'], 0)
+        self.assertEqual(stats['000000000000000000000000']['failed'], 0)
+        self.assertGreater(stats['000000000000000000000000']['fetched'], 0)
+
+class SnapshotCacheTests(unittest.TestCase):
+
+    @patch('unifi_video.api.urlopen')
+    def test_cache(self, mocked_urlopen):
+        '''Concurrent requests for the same snapshot should share one fetch,
+        fresh snapshots should be served from memory and the least recently
+        used ones evicted
+        '''
+
+        ufva = get_ufva_w_mocked_urlopen(mocked_urlopen)
+        requested = []
+
+        def get(url, raw=False, *args, **kwargs):
+            requested.append(url)
+            time.sleep(0.05)
+            return url.encode('utf8')
+
+        with patch.object(ufva, 'get', side_effect=get):
+            cache = SnapshotCache(ufva, ttl=60, max_entries=2)
+
+            threads = [
+                threading.Thread(target=cache.get, args=('a', 640))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(requested), 1)
+            self.assertEqual(cache.misses + cache.shared, 5)
+
+            self.assertIn(b'width=640', cache.get('a', 640))
+            self.assertEqual(len(requested), 1)
+            self.assertEqual(cache.hits, 1)
+
+            # Larger width is only served when allowed
+            cache.get('a', 320)
+            self.assertEqual(len(requested), 2)
+            cache.allow_larger = True
+            self.assertIn(b'width=640', cache.get('a', 100))
+            self.assertEqual(len(requested), 2)
+
+            # Third key evicts least recently used (a, 320)
+            cache.allow_larger = False
+            cache.get('b', 0)
+            cache.get('a', 320)
+            self.assertEqual(len(requested), 4)
+
+            # Wall clock steps don't expire or keep snapshots
+            with patch('time.time', return_value=time.time() + 3600):
+                cache.get('b', 0)
+                self.assertEqual(len(requested), 4)
+            cache.ttl = 0
+            with patch('time.time', return_value=time.time() - 3600):
+                cache.get('b', 0)
+                self.assertEqual(len(requested), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import unittest
 import os.path
 import json
 import sys
+import time
 
 from datetime import datetime as dt, tzinfo
 import pytz
@@ -106,5 +107,97 @@ class UtilitiesTests(unittest.TestCase):
             except AssertionError as e:
                 raise AssertionError('{} ({})'.format(str(e), test_pair[0]))
 
+    def test_batch_dt_resolving(self):
+
+        resolvables = [
+            '2020-03-03T23:11:22',
+            dt(2019, 10, 2, 23, 11),
+            pytz.timezone('Europe/Helsinki').localize(dt(2017, 10, 2, 23, 11)),
+            pytz.utc.localize(dt(2019, 10, 2, 23, 11)),
+            1583277060,
+        ]
+        expected = [
+            (1583277060 - 3600) * 1000,
+            (1570057860 - 3600) * 1000,
+            1506975060 * 1000,
+            1570057860 * 1000,
+            1583277060 * 1000,
+        ]
+
+        for _ in range(2):
+            self.assertEqual(
+                unifi_video.utils.dt_resolvables_to_ms(resolvables, 3600),
+                expected)
+            self.assertEqual(
+                [unifi_video.utils.dt_resolvable_to_ms(r, 3600)
+                    for r in resolvables],
+                expected)
+
+        try:
+            import numpy
+        except ImportError:
+            return
+
+        self.assertEqual(
+            unifi_video.utils.dt_resolvables_to_ms(numpy.array(
+                ['2020-03-03T23:11:22', '2019-10-02T23:11'],
+                dtype='datetime64[s]'), 3600).tolist(),
+            expected[:2])
+        self.assertEqual(
+            unifi_video.utils.dt_resolvables_to_ms(
+                numpy.array([1583277060, 0]), 3600).tolist(),
+            [1583277060000, 0])
+        self.assertEqual(
+            unifi_video.utils.dt_resolvables_to_ms(
+                numpy.array(resolvables, dtype=object), 3600).tolist(),
+            expected)
+
+    def test_version_parsing(self):
+        parse = unifi_video.utils.parse_version
+        self.assertEqual(parse('3.10.13'), (3, 10, 13))
+        self.assertEqual(parse(None), ())
+        self.assertTrue(parse('3.9.12') < parse('3.10.2') < parse('3.10.13'))
+        self.assertTrue(parse('3.10.13') < parse('3.10.13-beta1'))
+        self.assertEqual(parse('qwerty'), ('qwerty',))
+
+    def test_ms_to_dt(self):
+        ms = 1583277062999
+        self.assertEqual(
+            unifi_video.utils.ms_to_dts([ms, 0], utc=True),
+            [dt(2020, 3, 3, 23, 11, 2, 999000), dt(1970, 1, 1)])
+        self.assertEqual(
+            unifi_video.utils.ms_to_dt(ms, utc=True),
+            dt(2020, 3, 3, 23, 11, 2, 999000))
+        self.assertEqual(
+            unifi_video.utils.ms_to_dt(ms),
+            dt.fromtimestamp(1583277062).replace(microsecond=999000))
+
+    @unittest.skipUnless(hasattr(time, 'tzset'), 'Needs time.tzset()')
+    def test_ms_to_dt_dst(self):
+        tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'Europe/Helsinki'
+        time.tzset()
+        unifi_video.utils._tz_offsets.clear()
+        try:
+            # Clocks went forward at 2021-03-28T01:00:00Z
+            transition = 1616893200000
+            self.assertEqual(
+                unifi_video.utils.ms_to_dts([transition - 1, transition]),
+                [dt(2021, 3, 28, 2, 59, 59, 999000), dt(2021, 3, 28, 4)])
+            self.assertEqual(
+                unifi_video.utils.ms_to_dt(transition - 1, utc=True),
+                dt(2021, 3, 28, 0, 59, 59, 999000))
+            for ms in range(transition - 7200000, transition + 7200000,
+                    599999):
+                self.assertEqual(unifi_video.utils.ms_to_dt(ms),
+                    dt.fromtimestamp(ms / 1000.0))
+        finally:
+            if tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = tz
+            time.tzset()
+            unifi_video.utils._tz_offsets.clear()
+
 if __name__ == '__main__':
     unittest.main()
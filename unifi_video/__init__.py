@@ -1,4 +1,38 @@
-from .api import UnifiVideoAPI, UnifiVideoVersionError
-from .camera import CameraModelError
+import sys
 
 __all__ = ['UnifiVideoAPI', 'UnifiVideoVersionError', 'CameraModelError']
+
+# Submodules are imported on first attribute access (PEP 562), so that
+# importing, e.g., unifi_video.utils doesn't pay for unifi_video.api.
+# Submodules themselves (unifi_video.camera etc.) resolve the same way.
+_lazy_attrs = {
+    'UnifiVideoAPI': 'api',
+    'UnifiVideoVersionError': 'api',
+    'CameraModelError': 'camera',
+}
+
+if sys.version_info >= (3, 7):
+    from importlib import import_module
+
+    def _is_submodule(name):
+        from importlib.util import find_spec
+        return not name.startswith('__') and \
+            find_spec('.' + name, __name__) is not None
+
+    def __getattr__(name):
+        if name in _lazy_attrs:
+            value = getattr(
+                import_module('.' + _lazy_attrs[name], __name__), name)
+        elif _is_submodule(name):
+            value = import_module('.' + name, __name__)
+        else:
+            raise AttributeError(
+                'module {!r} has no attribute {!r}'.format(__name__, name))
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy_attrs))
+else:
+    from .api import UnifiVideoAPI, UnifiVideoVersionError
+    from .camera import CameraModelError
@@ -0,0 +1,74 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import zlib
+
+accept_encoding = 'gzip, deflate'
+
+_chunk_size = 64 * 1024
+
+class DecompressingReader(object):
+    '''Wraps a gzip or deflate encoded HTTP response and decompresses the
+    body as it is read. Everything but :meth:`read` is passed through to
+    the wrapped response.
+    '''
+
+    def __init__(self, res, encoding):
+        self._res = res
+        self._encoding = encoding
+        # gzip header; for deflate, zlib header first (see _feed)
+        self._decompressor = zlib.decompressobj(
+            16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS)
+        self._started = False
+        self._buffer = b''
+        self._eof = False
+
+    def __getattr__(self, name):
+        return getattr(self._res, name)
+
+    def _feed(self, chunk):
+        try:
+            data = self._decompressor.decompress(chunk)
+        except zlib.error:
+            # Plenty of servers send raw deflate streams without the zlib
+            # header that RFC 7230 asks for
+            if self._started or self._encoding != 'deflate':
+                raise
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            data = self._decompressor.decompress(chunk)
+        self._started = True
+        return data
+
+    def _fill(self, size):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._res.read(_chunk_size)
+            if chunk:
+                self._buffer += self._feed(chunk)
+            else:
+                self._buffer += self._decompressor.flush()
+                self._eof = True
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        self._fill(size)
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+def decompressed(res):
+    '''Wrap a response whose body is gzip or deflate encoded in a
+    :class:`DecompressingReader`. Other responses are returned as is.
+    '''
+
+    headers = getattr(res, 'headers', None)
+    if headers is None:
+        return res
+    encoding = '{}'.format(headers.get('Content-Encoding') or '')\
+        .strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return DecompressingReader(res, 'gzip')
+    if encoding == 'deflate':
+        return DecompressingReader(res, 'deflate')
+    return res
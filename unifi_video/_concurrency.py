@@ -0,0 +1,119 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import threading
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+_worker_done = object()
+
+def imap_bounded(fn, iterable, max_workers=4):
+    '''Call ``fn`` on every item of ``iterable`` using at most
+    ``max_workers`` threads.
+
+    Items are pulled from ``iterable`` lazily, one at a time, as workers
+    free up.
+
+    Arguments:
+        fn (callable): Function to call with each item
+        iterable (iterable): Items to work on
+        max_workers (int): Maximum number of concurrent calls to ``fn``
+
+    Returns:
+        Iterable of ``(item, result, error)`` tuples in completion order.
+        ``error`` is the exception raised by ``fn`` (or ``None``).
+    '''
+
+    items = iter(iterable)
+    items_lock = threading.Lock()
+    results = Queue()
+
+    def work():
+        while True:
+            with items_lock:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    results.put((None, None, e))
+                    break
+            try:
+                results.put((item, fn(item), None))
+            except Exception as e:
+                results.put((item, None, e))
+        results.put(_worker_done)
+
+    workers = [
+        threading.Thread(target=work)
+        for _ in range(max(1, int(max_workers)))
+    ]
+
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    finished = 0
+    while finished < len(workers):
+        result = results.get()
+        if result is _worker_done:
+            finished += 1
+        else:
+            yield result
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight(object):
+    '''Shares one call of a function between concurrent callers asking
+    for the same key.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        '''Call ``fn`` unless a call for ``key`` is already in flight,
+        in which case wait for that call to finish instead.
+
+        Returns:
+            tuple: ``fn``'s return value and whether it was shared with
+            (i.e., computed by) another caller. Exceptions raised by ``fn``
+            are re-raised to every waiter.
+        '''
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
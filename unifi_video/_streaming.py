@@ -0,0 +1,116 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import codecs
+import json
+import re
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+class _JSONReader(object):
+    '''Buffers a file-like object's UTF-8 JSON text only as far as needed
+    to decode one value at a time
+    '''
+
+    def __init__(self, fp, chunk_size):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._utf8 = codecs.getincrementaldecoder('utf8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def more(self, size=None):
+        if self.eof:
+            return False
+        chunk = self._fp.read(size or self._chunk_size)
+        if chunk:
+            text = self._utf8.decode(chunk)
+        else:
+            text = self._utf8.decode(b'', True)
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        '''Skip whitespace and return the next character (empty string
+        at end of input)
+        '''
+
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.more():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError('Expected one of "{}" at {!r}'.format(
+                chars, self.buffer[self.pos:self.pos + 20]))
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A value that runs up to the end of the buffer may be
+                # a truncated number
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # Grow reads for values larger than a chunk to keep the number
+            # of decode attempts logarithmic
+            self.more(size)
+            size *= 2
+
+def iter_json_array(fp, key='data', chunk_size=64 * 1024):
+    '''Iterate over the items of an array in a JSON object as they are
+    read from a file-like object.
+
+    Only the array's key is looked for; other top-level values are
+    decoded and dropped. At most about one item and one chunk of JSON
+    text are held in memory at a time.
+
+    Arguments:
+        fp: File-like object with a ``read(size)`` method returning
+            UTF-8 encoded JSON
+        key (str, optional): Top-level key of the array
+        chunk_size (int, optional): Number of bytes to read at a time
+
+    Returns:
+        Iterable of decoded array items
+
+    Raises:
+        ValueError: On malformed JSON
+    '''
+
+    reader = _JSONReader(fp, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.pos += 1
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            reader.value()
+        if reader.expect(',}') == '}':
+            break
@@ -11,14 +11,24 @@ try:
 except ImportError:
     from urllib2 import urlopen, Request, HTTPError
 
+import hashlib
 import json
+import marshal
+import weakref
 
+from copy import deepcopy
+
+from ._compression import accept_encoding, decompressed
+from ._concurrency import SingleFlight, imap_bounded
+from ._streaming import iter_json_array
+from .batching import RefreshBatcher
+from .cache import ResponseCache
 from .camera import UnifiVideoCamera
 from .recording import UnifiVideoRecording
 from .collections import UnifiVideoCollection
-from .utils import parse_gmt_offset, dt_resolvable_to_ms
-
-from distutils.version import LooseVersion
+from .instrumentation import Instrumentation
+from .json_backend import loads as json_loads
+from .utils import parse_gmt_offset, dt_resolvable_to_ms, parse_version
 
 try:
     type(unicode)
@@ -35,8 +45,23 @@ endpoints = {
         x._id if isinstance(x, UnifiVideoRecording) else x),
     'bootstrap': 'bootstrap',
     'delete_all': 'recording?deleteRecordings&confirmed=true',
+    'delete_recordings': lambda x: 'recording?{}'.format(
+        UnifiVideoAPI.params_to_query_str({
+            'recordings': x, 'confirmed': True})),
 }
 
+def endpoint_name(url):
+    '''Get endpoint name (the first path segment) of an API URL
+
+    Arguments:
+        url (str): API endpoint (relative to the API base URL)
+
+    Returns:
+        str: Endpoint name, e.g., ``camera`` for ``camera/{id}?x=y``
+    '''
+
+    return url.split('?', 1)[0].split('/', 1)[0]
+
 class UnifiVideoVersionError(ValueError):
     """Unsupported UniFi Video version"""
 
@@ -72,6 +97,28 @@ class UnifiVideoAPI(object):
             UniFi Video versions
         utc_offset_sec (int or NoneType): UniFi Video server's UTC offset
             in seconds.
+        coalesce_gets (bool or list of str): Whether identical concurrent
+            GET requests should share a single upstream request. Either
+            ``True`` for all endpoints or a list of endpoint names (the
+            first path segment, e.g., ``camera``, ``recording``).
+        conditional_gets (bool or list of str): Endpoints (see
+            ``coalesce_gets``) whose JSON responses should be revalidated
+            instead of refetched, e.g., ``['camera', 'bootstrap']``.
+            ``True`` for all endpoints.
+        refresh_batch_window (int or float): Seconds to collect concurrent
+            camera and recording refreshes for, to serve them with a single
+            listing request. ``0`` to disable. See :attr:`refresh_batcher`.
+        response_cache (bool or :class:`~unifi_video.cache.ResponseCache`):
+            Cache for JSON responses to GET requests. ``True`` for one with
+            default settings.
+        instrumentation (:class:`~unifi_video.instrumentation.Instrumentation`):
+            Reports requests to listeners. Disabled by default.
+        transport (callable): Called with each
+            :class:`~urllib.request.Request` and the TLS context (or
+            ``None``) to send the request instead of :func:`urlopen`. Must
+            return a response or raise :class:`~urllib.error.HTTPError` the
+            way :func:`urlopen` does. See :mod:`unifi_video.cassette` for
+            recording and replaying transports.
 
     Note:
 
@@ -90,6 +137,19 @@ class UnifiVideoAPI(object):
         name (str or NoneType): UniFi Video server name
         version (str or NoneType): UniFi Video version
         jsession_av (str or NoneType): UniFi Video session ID
+        coalesce_gets (bool or set): GET coalescing setting (from input
+            params)
+        conditional_gets (bool or set): Conditional GET setting (from input
+            params)
+        refresh_batcher (:class:`~unifi_video.batching.RefreshBatcher`):
+            Batches camera and recording refreshes
+        response_cache (:class:`~unifi_video.cache.ResponseCache` or
+            NoneType): GET response cache (from input params)
+        instrumentation (:class:`~unifi_video.instrumentation.Instrumentation`):
+            Request instrumentation (from input params). Add listeners to
+            enable.
+        transport (callable or NoneType): Request transport (from input
+            params)
 
         cameras (:class:`UnifiVideoCollection`):
             Collection of :class:`~unifi_video.camera.UnifiVideoCamera`
@@ -116,7 +176,10 @@ class UnifiVideoAPI(object):
 
     def __init__(self, api_key=None, username=None, password=None,
             addr='localhost', port=7080, schema='http', verify_cert=True,
-            check_ufv_version=True, utc_offset_sec=None):
+            check_ufv_version=True, utc_offset_sec=None,
+            coalesce_gets=False, conditional_gets=False,
+            refresh_batch_window=0, response_cache=None,
+            instrumentation=None, transport=None):
 
         if not verify_cert and schema == 'https':
             import ssl
@@ -134,6 +197,18 @@ class UnifiVideoAPI(object):
         self.utc_offset = utc_offset_sec
         self.base_url = '{}://{}:{}/api/2.0/'.format(schema, addr, port)
         self._version_stickler = check_ufv_version
+        self.coalesce_gets = coalesce_gets if isinstance(coalesce_gets, bool) \
+            else set(coalesce_gets)
+        self._get_flights = SingleFlight()
+        self.conditional_gets = conditional_gets \
+            if isinstance(conditional_gets, bool) else set(conditional_gets)
+        self._validators = {}
+        self._recording_identities = weakref.WeakValueDictionary()
+        self.refresh_batcher = RefreshBatcher(self, refresh_batch_window)
+        self.response_cache = ResponseCache() if response_cache is True \
+            else response_cache or None
+        self.instrumentation = instrumentation or Instrumentation()
+        self.transport = transport
 
         self._load_data(self.get(endpoints['bootstrap']))
 
@@ -178,10 +253,10 @@ class UnifiVideoAPI(object):
         if self.version in UnifiVideoAPI._supported_ufv_versions:
             self._is_supported = True
         else:
-            v_actual = LooseVersion(self.version)
+            v_actual = parse_version(self.version)
             for curr_version in UnifiVideoAPI._supported_ufv_version_ranges:
-                v_low = LooseVersion(curr_version[0])
-                v_high = LooseVersion(curr_version[1])
+                v_low = parse_version(curr_version[0])
+                v_high = parse_version(curr_version[1])
                 try:
                     if v_actual >= v_low and v_actual <= v_high:
                         self._is_supported = True
@@ -224,15 +299,30 @@ class UnifiVideoAPI(object):
                     return True
 
     def _urlopen(self, req):
+        if self.instrumentation.enabled:
+            return self.instrumentation.urlopen(
+                req, getattr(self, '_ssl_context', None), self.transport)
+        if self.transport is not None:
+            return self.transport(req, getattr(self, '_ssl_context', None))
         if hasattr(self, '_ssl_context'):
             return urlopen(req, context=self._ssl_context)
         else:
             return urlopen(req)
 
+    def _urlopen_json(self, req, raw):
+        # Only JSON (non-raw) responses are worth compressing; downloads
+        # and snapshots are already compressed media
+        if raw is not False:
+            return self._urlopen(req)
+        req.add_header('Accept-Encoding', accept_encoding)
+        return decompressed(self._urlopen(req))
+
     def _get_response_content(self, res, raw=False):
         try:
             if res.headers['Content-Type'] == 'application/json':
-                return json.loads(res.read().decode('utf8'))
+                if self.instrumentation.enabled:
+                    return self.instrumentation.parse(json_loads, res.read())
+                return json_loads(res.read())
             raise KeyError
         except KeyError:
             upstream_filename = None
@@ -265,7 +355,20 @@ class UnifiVideoAPI(object):
         if self.api_key:
             raise ValueError('Invalid API key')
         elif self.login():
-            return self.get(url, raw)
+            self.instrumentation.login_retry()
+            # Retry once; a session rejected right after login must not
+            # send us back to logging in
+            self.login_attempts = 1
+            try:
+                return self._get(url, raw)
+            finally:
+                self.login_attempts = 0
+
+    def _coalesces(self, url, raw):
+        if not self.coalesce_gets or not isinstance(raw, bool):
+            return False
+        return self.coalesce_gets is True or \
+            endpoint_name(url) in self.coalesce_gets
 
     def get(self, url, raw=False, url_params={}):
         """Send GET request.
@@ -293,24 +396,119 @@ class UnifiVideoAPI(object):
             ``False`` on HTTP 4xx - 5xx
 
         :rtype: NoneType, bool, dict, bytes
+
+        Note:
+            When GET coalescing is enabled for the endpoint (see
+            :attr:`coalesce_gets`), callers that join an identical request
+            already in flight get their own copy of its response JSON.
+
+        Note:
+            When conditional GETs are enabled for the endpoint (see
+            :attr:`conditional_gets`), the last JSON response per URL is
+            remembered along with its ``ETag`` and ``Last-Modified``
+            validators. On ``304 Not Modified``, or when the response body
+            is identical to the remembered one, a copy of the remembered
+            JSON is returned without parsing the body.
+
+        Note:
+            With a :attr:`response_cache`, fresh cached JSON responses are
+            returned without a request to UniFi Video. :func:`post`,
+            :func:`put` and :func:`delete` invalidate the cached responses
+            they may affect.
+
+        Note:
+            Unless ``raw`` is set, UniFi Video may send the response gzip or
+            deflate compressed. It is decompressed as it is read.
         """
 
         if url_params:
-            url = '{}?{}'.format(
-                url, UnifiVideoAPI.params_to_query_str(url_params))
+            url = '{}?{}'.format(url, UnifiVideoAPI.params_to_query_str(
+                url_params, sort_keys=True))
+
+        if self.response_cache is not None and raw is False:
+            return self.response_cache.fetch(
+                url, lambda: self._fetch(url, raw))
+
+        return self._fetch(url, raw)
+
+    def _fetch(self, url, raw):
+        if self._coalesces(url, raw):
+            res, shared = self._get_flights.do(
+                (url, raw), lambda: self._get(url, raw))
+            return deepcopy(res) if shared else res
+
+        return self._get(url, raw)
 
+    def _revalidates(self, url, raw):
+        if not self.conditional_gets or raw is not False:
+            return False
+        return self.conditional_gets is True or \
+            endpoint_name(url) in self.conditional_gets
+
+    def _add_validators(self, req, url):
+        validators = self._validators.get(url)
+        if not validators:
+            return
+        if validators['etag']:
+            req.add_header('If-None-Match', validators['etag'])
+        if validators['last_modified']:
+            req.add_header('If-Modified-Since', validators['last_modified'])
+
+    def _get_revalidated_content(self, url, res):
+        '''Like :meth:`_get_response_content` for JSON, except that the
+        response is remembered and, when the body is identical to the
+        previous one, not parsed again
+        '''
+
+        if res.headers.get('Content-Type') != 'application/json':
+            self._validators.pop(url, None)
+            return self._get_response_content(res)
+
+        body = res.read()
+        digest = hashlib.sha1(body).hexdigest()
+        validators = self._validators.get(url)
+
+        if validators and validators['digest'] == digest:
+            content = marshal.loads(validators['content'])
+        else:
+            content = self.instrumentation.parse(json_loads, body) \
+                if self.instrumentation.enabled else json_loads(body)
+            validators = self._validators[url] = {
+                'digest': digest,
+                'content': marshal.dumps(content),
+            }
+
+        validators['etag'] = res.headers.get('ETag')
+        validators['last_modified'] = res.headers.get('Last-Modified')
+
+        return content
+
+    def _get(self, url, raw=False):
+        if self.instrumentation.enabled:
+            return self.instrumentation.observe(
+                'GET', url, self._send_get, url, raw)
+        return self._send_get(url, raw)
+
+    def _send_get(self, url, raw=False):
         req = self._build_req(url)
+        revalidates = self._revalidates(url, raw)
+        if revalidates:
+            self._add_validators(req, url)
         try:
-            res = self._urlopen(req)
+            res = self._urlopen_json(req, raw)
             self._parse_cookies(res)
+            if revalidates:
+                return self._get_revalidated_content(url, res)
             return self._get_response_content(res, raw)
         except HTTPError as err:
-            if err.code == 401 and self.login_attempts == 0:
+            if err.code == 304 and url in self._validators:
+                return marshal.loads(self._validators[url]['content'])
+            elif err.code == 401 and self.login_attempts == 0:
                 return self._handle_http_401(url, raw)
             elif err.code == 400 and hasattr(err, 'headers') \
                     and 'application/json' in err.headers.get(
                         'content-type', ''):
-                err_body = json.loads(err.read().decode('utf8'))
+                err_body = json_loads(decompressed(err).read())
                 if isinstance(err_body, dict) and err_body.get('rc') == 'error':
                     raise UnifiVideoHTTPError(
                         code=err.code,
@@ -318,6 +516,46 @@ class UnifiVideoAPI(object):
                         caused_by=err_body.get('causedBy'))
             return False
 
+    def _get_stream(self, url, key='data'):
+        '''Send GET request and yield the items of the response JSON's
+        ``key`` array as they are read off the connection
+
+        Bypasses GET coalescing, conditional GETs and the response cache.
+
+        Raises:
+            UnifiVideoHTTPError: On HTTP 4xx - 5xx
+        '''
+
+        instrumentation = self.instrumentation
+        event = instrumentation.start('GET', url) \
+            if instrumentation.enabled else None
+        try:
+            try:
+                res = self._urlopen_json(self._build_req(url), False)
+            except HTTPError as err:
+                if err.code != 401 or self.login_attempts != 0:
+                    raise UnifiVideoHTTPError(code=err.code)
+                if self.api_key:
+                    raise ValueError('Invalid API key')
+                if not self.login():
+                    raise UnifiVideoHTTPError(code=err.code)
+                instrumentation.login_retry()
+                res = self._urlopen_json(self._build_req(url), False)
+            self._parse_cookies(res)
+            if event is not None:
+                # Whatever the caller does between items is not ours
+                instrumentation.detach(event)
+            try:
+                for item in iter_json_array(res, key):
+                    yield item
+            finally:
+                close = getattr(res, 'close', None)
+                if close is not None:
+                    close()
+        finally:
+            if event is not None:
+                instrumentation.finish(event)
+
     def post(self, url, data=None, raw=False, _method=None):
         """Send POST request.
 
@@ -333,12 +571,25 @@ class UnifiVideoAPI(object):
 
         """
 
+        try:
+            return self._post(url, data, raw, _method)
+        finally:
+            if self.response_cache is not None and url != endpoints['login']:
+                self.response_cache.invalidate(url)
+
+    def _post(self, url, data=None, raw=False, _method=None):
+        if self.instrumentation.enabled:
+            return self.instrumentation.observe(_method or 'POST', url,
+                self._send_post, url, data, raw, _method)
+        return self._send_post(url, data, raw, _method)
+
+    def _send_post(self, url, data=None, raw=False, _method=None):
         if data:
             req = self._build_req(url, data, _method)
         else:
             req = self._build_req(url, method=_method)
         try:
-            res = self._urlopen(req)
+            res = self._urlopen_json(req, raw)
             self._parse_cookies(res)
             return self._get_response_content(res, raw)
         except HTTPError as err:
@@ -381,42 +632,62 @@ class UnifiVideoAPI(object):
         Touches :attr:`UnifiVideoAPI.cameras`,
         :attr:`UnifiVideoAPI.active_cameras`, and
         :attr:`UnifiVideoAPI.managed_cameras`
+
+        Cameras already in the collections are updated in place, so
+        references to them stay valid. Cameras whose JSON did not change
+        since the previous refresh are left untouched.
         '''
 
+        with self.instrumentation.holding() as held:
+            cameras = self.get(endpoints['cameras'])
+
+        with self.instrumentation.constructing(held):
+            self._load_cameras(cameras)
+
+    def _load_cameras(self, cameras):
         collections = {
-            'cameras': {
-                'new_ids': set(),
-                'accepts': lambda _: True,
-            },
-            'active_cameras': {
-                'new_ids': set(),
-                'accepts': lambda cam: cam.managed and cam.connected,
-            },
-            'managed_cameras': {
-                'new_ids': set(),
-                'accepts': lambda cam: cam.managed,
-            },
+            'cameras': lambda _: True,
+            'active_cameras': lambda cam: cam.managed and cam.connected,
+            'managed_cameras': lambda cam: cam.managed,
         }
 
         # Suspicion: the type check provides zero value and exists simply due
         # to some momentary lapse in coherence at the time it was originally
         # written. Leaving it be, on the off chance that there was a good
         # reason for it. Unable to investigate atm.
-        cameras = self.get(endpoints['cameras'])
         if not isinstance(cameras, dict):
             return
 
-        for camera in (
-                UnifiVideoCamera(self, c) for c in cameras.get('data', [])):
-            for cname, collection in collections.items():
-                if collection['accepts'](camera):
-                    getattr(self, cname).add(camera)
-                    collection['new_ids'].add(camera._id)
+        new_ids = set()
+
+        for data in cameras.get('data', []):
+            camera = self.cameras.get(data.get('_id'))
+
+            # Comparing against the JSON the camera was loaded from is
+            # considerably cheaper than digesting the JSON
+            if camera is None:
+                camera = UnifiVideoCamera(self, data)
+            elif camera._data != data:
+                camera._load_data(camera._extract_data(data))
+            else:
+                new_ids.add(camera._id)
+                continue
+
+            new_ids.add(camera._id)
+
+            for cname, accepts in collections.items():
+                collection = getattr(self, cname)
+                if accepts(camera):
+                    if camera._id not in collection:
+                        collection.add(camera)
+                elif camera._id in collection:
+                    del collection[camera._id]
 
         for cname in collections.keys():
-            for camera_id in list(getattr(self, cname).keys()):
-                if camera_id not in collections[cname]['new_ids']:
-                    del getattr(self, cname)[camera_id]
+            collection = getattr(self, cname)
+            for camera_id in [c for c in collection.keys()
+                    if c not in new_ids]:
+                del collection[camera_id]
 
     def refresh_recordings(self, limit=300):
         """GET recordings from the server and update ``self.recordings``.
@@ -461,7 +732,8 @@ class UnifiVideoAPI(object):
                 return camera
 
     def get_recordings(self, rec_type='all', camera=None, start_time=None,
-            end_time=None, limit=0, order='desc', req_each=False):
+            end_time=None, limit=0, order='desc', req_each=False,
+            stream=False):
         '''Fetch recording listing
 
         Args:
@@ -496,6 +768,12 @@ class UnifiVideoAPI(object):
                 transferred but will cost you in the number of HTTP requests
                 made.
 
+            stream (bool, optional):
+                Whether to parse the listing as it is received and to yield
+                each recording as soon as it has arrived. Keeps memory use
+                flat regardless of the number of recordings listed. The
+                request is sent on first iteration.
+
         Returns:
             Iterable[:class:`~unifi_video.recording.UnifiVideoRecording`]
 
@@ -504,6 +782,11 @@ class UnifiVideoAPI(object):
             when you want to mark time in the UniFi Server's local time.
             Otherwise, use Unix timestamps (*int*, **in seconds**) or timezone
             aware :class:`~datetime.datetime` objects.
+
+        Note:
+            A recording that is still referenced from an earlier listing (or
+            from :attr:`UnifiVideoAPI.recordings`) is returned as the same
+            object, updated if its data changed.
         '''
 
         rec_types = {
@@ -529,22 +812,250 @@ class UnifiVideoAPI(object):
             'cameras': camera if isinstance(camera, (list, tuple)) else [camera],
         }
 
+        if stream:
+            listing = self._get_stream('{}?{}'.format(
+                endpoints['recordings'](None),
+                UnifiVideoAPI.params_to_query_str(url_params, sort_keys=True)))
+            held = None
+        else:
+            with self.instrumentation.holding() as held:
+                listing = self.get(endpoints['recordings'](None),
+                    url_params=url_params)['data']
+
         if req_each:
+            self.instrumentation.release(held)
             return (
-                UnifiVideoRecording(
-                    self,
+                self._recording_from_data(
                     self.get(endpoints['recording'](rec_id))['data'][0])
-                for rec_id in self.get(
-                    endpoints['recordings'](None),
-                    url_params=url_params)['data']
+                for rec_id in listing
             )
         else:
-            return (
-                UnifiVideoRecording(self, rec)
-                for rec in self.get(
-                    endpoints['recordings'](None),
-                    url_params=url_params)['data']
-            )
+            return self.instrumentation.constructing_each(held,
+                (self._recording_from_data(rec) for rec in listing))
+
+    def _recording_from_data(self, data):
+        '''Get the recording object for recording JSON
+
+        Recordings are kept in a weak-referenced identity map, so for as
+        long as some reference to a recording object exists, listings that
+        include the recording return that same object. Its data is
+        reloaded only when the JSON differs from what it was loaded from.
+        '''
+
+        recording = self._recording_identities.get(data.get('_id'))
+        if recording is None:
+            recording = UnifiVideoRecording(self, data)
+            self._recording_identities[recording._id] = recording
+        elif recording._data != data:
+            recording._load_data(data)
+        return recording
+
+    def delete_recordings(self, recordings, max_url_length=2000,
+            max_workers=2):
+        '''Delete recordings in bulk
+
+        Recording IDs are packed into as few DELETE requests as
+        ``max_url_length`` allows. Deleted recordings are removed from
+        :attr:`UnifiVideoAPI.recordings`.
+
+        Arguments:
+            recordings (iterable): Recordings
+                (:class:`~unifi_video.recording.UnifiVideoRecording`)
+                or recording IDs (`str`) to delete
+            max_url_length (int, optional): Maximum request URL length
+            max_workers (int, optional): Maximum number of concurrent
+                requests
+
+        Returns:
+            list: One ``{'ids': list, 'success': bool}`` dict per request
+        '''
+
+        ids = [
+            r._id if isinstance(r, UnifiVideoRecording) else r
+            for r in recordings
+        ]
+
+        base_length = len(self._build_req(
+            endpoints['delete_recordings']([])).get_full_url())
+
+        chunks = []
+        for rec_id in ids:
+            id_length = len('recordings[]=&') + len(rec_id)
+            if not chunks or url_length + id_length > max_url_length:
+                chunks.append([])
+                url_length = base_length
+            chunks[-1].append(rec_id)
+            url_length += id_length
+
+        results = [{'ids': chunk, 'success': False} for chunk in chunks]
+        for result, res, error in imap_bounded(
+                lambda result: self.delete(
+                    endpoints['delete_recordings'](result['ids'])),
+                results,
+                max_workers):
+            result['success'] = error is None and res is not False
+            if result['success']:
+                for rec_id in result['ids']:
+                    self.recordings.pop(rec_id, None)
+
+        return results
+
+    def _recordings_spanning(self, recordings, page_size=100):
+        '''List the given recordings with as few listing requests as
+        possible
+
+        Listings are paged by start time. Each page starts at the earliest
+        recording not yet listed and ends with the latest, so recordings
+        between far apart clusters of the given recordings are skipped.
+        Pages hold at least ``page_size`` recordings.
+
+        Returns:
+            tuple: Recording IDs mapped to recording JSON and the number of
+            listing requests sent. Recordings that were not listed (e.g.,
+            because they were deleted) are left out.
+        '''
+
+        def start_time(recording):
+            return recording._data.get('startTime', 0)
+
+        listed = {}
+        pending = sorted(recordings, key=start_time)
+        cursor = None
+        requests = 0
+
+        while pending:
+            if start_time(pending[0]) == cursor:
+                # A full page of recordings starting at the same time;
+                # the cursor cannot move past them
+                break
+            cursor = start_time(pending[0])
+
+            cameras = set()
+            for recording in pending:
+                cameras.update(recording.cameras)
+
+            limit = max(len(pending), page_size)
+            requests += 1
+            res = self.get(
+                endpoints['recordings'](None),
+                url_params={
+                    'idsOnly': False,
+                    'sortBy': 'startTime',
+                    'sort': 'asc',
+                    'limit': limit,
+                    'startTime': cursor,
+                    'endTime': max(
+                        r._data.get('endTime', 0) for r in pending) + 1,
+                    'cameras': sorted(cameras),
+                })
+            page = res.get('data', []) if isinstance(res, dict) else []
+
+            wanted = set(r._id for r in pending)
+            for data in page:
+                if data['_id'] in wanted:
+                    listed[data['_id']] = data
+
+            if len(page) < limit:
+                break
+
+            # Unlisted recordings starting before the end of a full page
+            # are not there to be listed
+            last_start = page[-1].get('startTime', 0)
+            pending = [r for r in pending
+                if r._id not in listed and start_time(r) >= last_start]
+
+        return listed, requests
+
+    def _resolve_recordings(self, recordings):
+        for recording in recordings:
+            if isinstance(recording, UnifiVideoRecording):
+                yield recording
+            elif recording in self.recordings:
+                yield self.recordings[recording]
+            else:
+                yield self._recording_from_data(
+                    self.get(endpoints['recording'](recording))['data'][0])
+
+    def _control_recording_locks(self, recordings, query, remove, verify,
+            max_workers):
+        if recordings is None:
+            if not query:
+                raise ValueError('Give recordings or a recording query')
+            recordings = self.get_recordings(**query)
+
+        recordings = list(self._resolve_recordings(recordings))
+        results = dict((r._id, True) for r in recordings)
+        todo = [r for r in recordings if r.locked is remove]
+
+        for recording, success, error in imap_bounded(
+                lambda r: r._control_lock(remove=remove),
+                todo,
+                max_workers):
+            results[recording._id] = error is None and success
+
+        if verify and todo:
+            listed, _ = self._recordings_spanning(todo)
+            for recording, res, error in imap_bounded(
+                    lambda r: self.get(endpoints['recording'](r._id)),
+                    [r for r in todo if r._id not in listed],
+                    max_workers):
+                if error is None and isinstance(res, dict) and \
+                        res.get('data'):
+                    listed[recording._id] = res['data'][0]
+            for recording in todo:
+                if recording._id in listed:
+                    recording._load_data(listed[recording._id])
+                results[recording._id] = recording._id in listed and \
+                    recording.locked is not remove
+
+        return results
+
+    def lock_recordings(self, recordings=None, verify=False, max_workers=4,
+            **query):
+        '''Lock recordings in bulk
+
+        Recordings that are already locked are skipped. The rest are
+        locked with concurrent requests.
+
+        Arguments:
+            recordings (iterable, optional): Recordings
+                (:class:`~unifi_video.recording.UnifiVideoRecording`)
+                or recording IDs (`str`) to lock. Leave out to lock
+                the recordings matched by ``query`` instead.
+            verify (bool, optional): Refetch the recordings to verify the
+                locks were registered. Recordings are refetched with
+                listing requests paged by start time; only those missing
+                from the listings are refetched one by one.
+            max_workers (int, optional): Maximum number of concurrent
+                requests
+            query: Keyword arguments for :meth:`get_recordings`
+
+        Returns:
+            dict: Recording IDs mapped to action success (`bool`)
+
+        Raises:
+            ValueError: If neither ``recordings`` nor ``query`` is given
+
+        Example:
+            >>> uva.lock_recordings(
+            ...     camera=[c for c in uva.managed_cameras],
+            ...     start_time='2021-02-16T10:00',
+            ...     end_time='2021-02-16T12:00',
+            ...     verify=True)
+        '''
+
+        return self._control_recording_locks(
+            recordings, query, False, verify, max_workers)
+
+    def unlock_recordings(self, recordings=None, verify=False, max_workers=4,
+            **query):
+        '''Unlock recordings in bulk
+
+        Counterpart to :meth:`lock_recordings`; takes the same arguments.
+        '''
+
+        return self._control_recording_locks(
+            recordings, query, True, verify, max_workers)
 
     def delete_all_recordings(self):
         """ Delete all existing recordings """
@@ -559,12 +1070,14 @@ class UnifiVideoAPI(object):
         })
 
     @staticmethod
-    def params_to_query_str(params_dict):
+    def params_to_query_str(params_dict, sort_keys=False):
         '''Build query string from dict of URL parameters
 
         Arguments:
             params_dict (dict):
                 URL parameters
+            sort_keys (bool, optional):
+                Whether to order parameters by name
 
         Returns:
             str: Query string
@@ -580,7 +1093,9 @@ class UnifiVideoAPI(object):
         }
 
         params = []
-        for k, v in ((k, v) for k, v in params_dict.items() if v is not None):
+        items = sorted(params_dict.items(), key=lambda kv: kv[0]) \
+            if sort_keys else params_dict.items()
+        for k, v in ((k, v) for k, v in items if v is not None):
             if isinstance(v, (list, tuple)):
                 for lv in (x for x in v if x is not None):
                     params.append('{}[]={}'.format(
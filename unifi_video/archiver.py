@@ -0,0 +1,222 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import json
+import os
+import threading
+import time
+
+from ._concurrency import imap_bounded, monotonic
+from .utils import dt_resolvable_to_ms
+
+class UnifiVideoArchiver(object):
+    """Follows a UniFi Video server and downloads recordings as they
+    complete.
+
+    Each :meth:`tick` makes a ``limit``-bounded recording listing request
+    (:meth:`~unifi_video.api.UnifiVideoAPI.get_recordings`) that starts
+    from a persisted high-water mark, paging forward while listings come
+    back full. The listing covers all
+    cameras at once, so the request rate does not depend on the number
+    of cameras. Recordings still in progress are left for a later tick.
+    Completed ones are downloaded, at most ``max_workers`` at a time.
+
+    The high-water mark never moves past a recording that is still in
+    progress or that failed to download. Recordings near the mark that
+    have already been archived are remembered in the state file so that
+    restarts do not download them again.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance to follow
+        directory (str):
+            Directory to save recordings to
+        state_file (str, optional):
+            File to persist the high-water mark to. Defaults to
+            ``.archiver-state.json`` inside ``directory``.
+        rec_type (str, optional):
+            Type of recordings to archive: *all*, *motion* or *fulltime*
+        camera (optional):
+            Camera or cameras to limit archiving to. See
+            :meth:`~unifi_video.api.UnifiVideoAPI.get_recordings`.
+        start_time (datetime or str or int, optional):
+            Where to start from when there is no persisted state. Defaults
+            to the time of the first tick.
+        poll_interval (int or float, optional):
+            Seconds between listing requests
+        limit (int, optional):
+            Maximum number of recordings per listing request (page)
+        max_workers (int, optional):
+            Maximum number of concurrent downloads
+        lookback (int, optional):
+            Seconds to reach back past the high-water mark on each listing.
+            Catches recordings that UniFi Video registers with a start time
+            in the past (e.g., motion recordings with pre-padding).
+        filename (callable, optional):
+            Called with a :class:`~unifi_video.recording.UnifiVideoRecording`
+            to get the filename (relative to ``directory``) to save it as
+
+    Attributes:
+        high_water_mark (int or NoneType):
+            Unix timestamp (in ms). Listings start from here.
+        archived (dict):
+            IDs of archived recordings within ``lookback`` of the
+            high-water mark, mapped to their start times
+    """
+
+    def __init__(self, api, directory, state_file=None, rec_type='all',
+            camera=None, start_time=None, poll_interval=30, limit=100,
+            max_workers=2, lookback=60, filename=None):
+
+        self._api = api
+        self.directory = directory
+        self.state_file = state_file or os.path.join(
+            directory, '.archiver-state.json')
+        self.rec_type = rec_type
+        self.camera = camera
+        self.poll_interval = poll_interval
+        self.limit = limit
+        self.max_workers = max_workers
+        self.lookback = lookback
+        self._filename = filename or (lambda rec: 'recording-{}-{}.mp4'\
+            .format(rec._id, rec.start_time.strftime('%Y%m%dT%H%M%S')))
+        self._stop = threading.Event()
+
+        self.high_water_mark = None
+        self.archived = {}
+        self._load_state()
+
+        if self.high_water_mark is None and start_time is not None:
+            self.high_water_mark = dt_resolvable_to_ms(
+                start_time,
+                utc_offset=self._api.utc_offset or 0,
+                resolution=1000)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.loads(f.read())
+        except (IOError, OSError, ValueError):
+            return
+        self.high_water_mark = state.get('high_water_mark')
+        self.archived = state.get('archived', {})
+
+    def _save_state(self):
+        tmp_file = '{}.tmp'.format(self.state_file)
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps({
+                'high_water_mark': self.high_water_mark,
+                'archived': self.archived,
+            }))
+        os.rename(tmp_file, self.state_file)
+
+    def _download(self, recording):
+        path = os.path.join(self.directory, self._filename(recording))
+        part_path = '{}.part'.format(path)
+        if recording.download(part_path) is not True:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return False
+        os.rename(part_path, path)
+        return True
+
+    def _list(self, window_start):
+        # Page forward from the window start until a page comes back
+        # short, so that more than ``limit`` recordings (archived or in
+        # progress) within the window cannot stall the archiver
+        listing = []
+        seen = set()
+        start_time = int(window_start // 1000)
+        while True:
+            page = list(self._api.get_recordings(
+                rec_type=self.rec_type,
+                camera=self.camera,
+                start_time=start_time,
+                order='asc',
+                limit=self.limit))
+            new = [rec for rec in page if rec._id not in seen]
+            seen.update(rec._id for rec in new)
+            listing.extend(new)
+            if len(page) < self.limit or not new:
+                return listing
+            start_time = int(new[-1]._data.get('startTime', 0) // 1000)
+
+    def tick(self):
+        '''Make one listing request (more if the listing fills a page of
+        ``limit`` recordings) and download any newly completed recordings.
+
+        Returns:
+            list: IDs of recordings archived during this tick
+        '''
+
+        if self.high_water_mark is None:
+            self.high_water_mark = int(time.time()) * 1000
+
+        window_start = self.high_water_mark - self.lookback * 1000
+        listing = self._list(window_start)
+
+        start_ms = {}
+        latest_listed = None
+        pending = []
+        downloadable = []
+
+        for recording in listing:
+            start = recording._data.get('startTime', 0)
+            if start < window_start:
+                continue
+            if latest_listed is None or start > latest_listed:
+                latest_listed = start
+            if recording._id in self.archived:
+                continue
+            start_ms[recording._id] = start
+            if recording.in_progress:
+                pending.append(recording._id)
+            else:
+                downloadable.append(recording)
+
+        newly_archived = []
+        for recording, success, error in imap_bounded(
+                self._download, downloadable, self.max_workers):
+            if success and not error:
+                self.archived[recording._id] = start_ms[recording._id]
+                newly_archived.append(recording._id)
+            else:
+                pending.append(recording._id)
+
+        if pending:
+            high_water_mark = min(start_ms[rec_id] for rec_id in pending)
+        elif latest_listed is not None:
+            high_water_mark = latest_listed
+        else:
+            high_water_mark = self.high_water_mark
+
+        self.high_water_mark = max(self.high_water_mark, high_water_mark)
+        self.archived = {
+            rec_id: start for rec_id, start in self.archived.items()
+            if start >= self.high_water_mark - self.lookback * 1000 - 1000
+        }
+
+        self._save_state()
+        return newly_archived
+
+    def run(self):
+        '''Call :meth:`tick` every :attr:`poll_interval` seconds
+        until :meth:`stop` is called.
+
+        Ticks are scheduled against a fixed clock so that slow downloads
+        do not cause the request rate to drift.
+        '''
+
+        self._stop.clear()
+        next_tick = monotonic()
+        while not self._stop.is_set():
+            self.tick()
+            next_tick += self.poll_interval
+            now = monotonic()
+            if next_tick < now:
+                next_tick = now
+            self._stop.wait(next_tick - now)
+
+    def stop(self):
+        '''Make :meth:`run` return after the ongoing tick.
+        '''
+        self._stop.set()
@@ -0,0 +1,169 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import threading
+import time
+
+from .camera import UnifiVideoCamera
+from .recording import UnifiVideoRecording
+
+class _Batch(object):
+
+    def __init__(self):
+        self.singles = []
+        self.done = threading.Event()
+        self.error = None
+
+class _BatchScope(object):
+
+    def __init__(self, batcher):
+        self._batcher = batcher
+
+    def __enter__(self):
+        local = self._batcher._local
+        local.depth = getattr(local, 'depth', 0) + 1
+        if local.depth == 1:
+            local.singles = []
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        local = self._batcher._local
+        local.depth -= 1
+        if local.depth == 0:
+            singles, local.singles = local.singles, []
+            if exc_type is None:
+                self._batcher._load(singles)
+        return False
+
+class RefreshBatcher(object):
+    """Serves individual camera and recording refreshes with
+    collection-level requests.
+
+    Refreshing a camera (:meth:`~unifi_video.camera.UnifiVideoCamera.update`)
+    or a recording (:meth:`~unifi_video.recording.UnifiVideoRecording.refresh`)
+    costs one request per object. The batcher collects such refreshes and
+    serves each kind with listing requests instead: a single ``GET camera``
+    for cameras and ``GET recording`` listings of the collected recordings,
+    paged by start time, for recordings. Objects that the listings do not
+    cover are refreshed individually.
+
+    Batching is opt-in, in either of two ways:
+
+    - Inside :meth:`batch`, refreshes made by the current thread are
+      deferred and served when the ``with`` block exits.
+    - With :attr:`window` set, a refresh waits for ``window`` seconds for
+      refreshes from other threads to join it before they are all served
+      together.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance to fetch through
+        window (int or float, optional):
+            Seconds to collect concurrent refreshes for. ``0`` disables
+            windowed batching.
+
+    Attributes:
+        window (int or float): See above
+        requests_saved (int): Number of per-object requests that
+            were avoided
+    """
+
+    def __init__(self, api, window=0):
+        self._api = api
+        self.window = window
+        self.requests_saved = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open_batch = None
+
+    def batch(self):
+        '''Defer refreshes made by the current thread until exit
+
+        Returns:
+            Context manager
+
+        Example:
+            >>> with uva.refresh_batcher.batch():
+            ...     for camera in uva.cameras:
+            ...         camera.update()
+        '''
+
+        return _BatchScope(self)
+
+    def defer(self, single):
+        '''Hand a refresh over to the batcher
+
+        Arguments:
+            single (:class:`~unifi_video.single.UnifiVideoSingle`):
+                Camera or recording to refresh
+
+        Returns:
+            bool: ``True`` if the batcher took care of the refresh
+            (possibly later, on scope exit). ``False`` if the caller
+            should refresh on its own.
+        '''
+
+        if getattr(self._local, 'depth', 0):
+            self._local.singles.append(single)
+            return True
+
+        if not self.window:
+            return False
+
+        with self._lock:
+            batch = self._open_batch
+            leader = batch is None
+            if leader:
+                batch = self._open_batch = _Batch()
+            batch.singles.append(single)
+
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                self._open_batch = None
+            try:
+                self._load(batch.singles)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+        return True
+
+    def _load(self, singles):
+        unique = dict((id(s), s) for s in singles).values()
+        cameras = [s for s in unique if isinstance(s, UnifiVideoCamera)]
+        recordings = [s for s in unique if isinstance(s, UnifiVideoRecording)]
+        misses = [s for s in unique if not isinstance(
+            s, (UnifiVideoCamera, UnifiVideoRecording))]
+
+        if len(cameras) > 1:
+            res = self._api.get('camera')
+            listed = dict((c['_id'], c) for c in res.get('data', [])) \
+                if isinstance(res, dict) else {}
+            misses.extend(self._fan_out(cameras, listed, 1))
+        else:
+            misses.extend(cameras)
+
+        if len(recordings) > 1:
+            misses.extend(self._fan_out(
+                recordings, *self._api._recordings_spanning(recordings)))
+        else:
+            misses.extend(recordings)
+
+        for single in misses:
+            single._refresh()
+
+    def _fan_out(self, singles, listed, requests):
+        misses = []
+        for single in singles:
+            if single._id in listed:
+                single._load_data(listed[single._id])
+            else:
+                misses.append(single)
+        self.requests_saved += max(0, len(singles) - len(misses) - requests)
+        return misses
@@ -0,0 +1,215 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import marshal
+import threading
+
+from collections import OrderedDict
+
+from ._concurrency import monotonic
+
+default_ttls = {
+    'bootstrap': 30,
+    'camera': 5,
+    'recording': 5,
+}
+
+def normalize_url(url):
+    '''Normalize an API URL for use as a cache key
+
+    Query parameters are ordered by name. Repeated parameters (e.g.,
+    ``cameras[]``) keep their relative order.
+
+    Arguments:
+        url (str): API endpoint (relative to the API base URL)
+
+    Returns:
+        str: Normalized URL
+    '''
+
+    path, _, query = url.partition('?')
+    path = path.strip('/')
+    if not query:
+        return path
+    pairs = sorted(
+        (p for p in query.split('&') if p),
+        key=lambda p: p.split('=', 1)[0])
+    return '{}?{}'.format(path, '&'.join(pairs))
+
+def _path(url):
+    return url.partition('?')[0].strip('/')
+
+class _Entry(object):
+
+    __slots__ = ('path', 'content', 'expires_at')
+
+    def __init__(self, path, content, expires_at):
+        self.path = path
+        self.content = content
+        self.expires_at = expires_at
+
+class ResponseCache(object):
+    """Caches JSON responses of GET requests in memory.
+
+    Responses are keyed by normalized URL (see :func:`normalize_url`)
+    and kept for a per-endpoint time to live. When ``max_entries`` is
+    exceeded, the least recently used responses are evicted first. Every
+    caller gets its own copy of a cached response.
+
+    Writes invalidate the responses they may have affected: those of
+    the written path itself, of the collections above it and of the
+    paths below it. A ``PUT camera/{id}``, for example, invalidates
+    ``camera/{id}`` and any ``camera`` listing. Responses to requests
+    that were in flight during an invalidation aren't cached.
+
+    Arguments:
+        ttls (dict, optional): Endpoint names (the first path segment,
+            e.g., ``camera``) mapped to seconds responses stay fresh.
+            ``0`` to not cache an endpoint at all. Defaults to
+            :data:`default_ttls`.
+        default_ttl (int or float, optional): Time to live for endpoints
+            missing from ``ttls``
+        max_entries (int, optional): Maximum number of responses to keep
+
+    Attributes:
+        hits (int): Number of requests served from the cache
+        misses (int): Number of requests that caused a fetch
+        evictions (int): Number of responses evicted to stay within
+            ``max_entries``
+        invalidations (int): Number of responses dropped due to writes
+
+    Example:
+        >>> uva = UnifiVideoAPI(api_key='xxxxxx', addr='10.3.2.1',
+        ...     response_cache=ResponseCache({'camera': 2}, max_entries=128))
+    """
+
+    def __init__(self, ttls=None, default_ttl=5, max_entries=256):
+        self.ttls = dict(default_ttls if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl(self, url):
+        '''Get the time to live for responses of a URL
+
+        Arguments:
+            url (str): API endpoint (relative to the API base URL)
+
+        Returns:
+            int or float: Seconds
+        '''
+
+        return self.ttls.get(
+            _path(url).split('/', 1)[0], self.default_ttl)
+
+    def fetch(self, url, fn):
+        '''Serve a GET request from the cache or through ``fn``
+
+        Arguments:
+            url (str): API endpoint (relative to the API base URL)
+            fn (callable): Called without arguments to fetch the response
+                on a miss
+
+        Returns:
+            Cached response or whatever ``fn`` returns. Only ``dict`` and
+            ``list`` responses are cached.
+        '''
+
+        ttl = self.ttl(url)
+        if not ttl:
+            return fn()
+
+        key = normalize_url(url)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries[key] = self._entries.pop(key)
+                self.hits += 1
+                content = entry.content
+            else:
+                self.misses += 1
+                generation = self._generation
+
+        if entry is not None:
+            return marshal.loads(content)
+
+        res = fn()
+
+        if isinstance(res, (dict, list)):
+            content = marshal.dumps(res)
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, _Entry(
+                        _path(key), content, monotonic() + ttl))
+
+        return res
+
+    def _store(self, key, entry):
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, url):
+        '''Drop responses a write to ``url`` may have affected
+
+        Arguments:
+            url (str): Written API endpoint (relative to the API base URL)
+
+        Returns:
+            int: Number of dropped responses
+        '''
+
+        path = _path(url)
+
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry.path == path or
+                    path.startswith(entry.path + '/') or
+                    entry.path.startswith(path + '/')
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+        return len(stale)
+
+    def clear(self):
+        '''Drop all cached responses
+        '''
+
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        '''Get cache statistics
+
+        Returns:
+            dict: Keys ``hits``, ``misses``, ``evictions``,
+            ``invalidations`` and ``entries`` (number of cached responses)
+        '''
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, self.stats())
@@ -19,9 +19,9 @@ endpoints = {
 
 # Supported camera models, checked during UnifiVideoCamera initialization.
 #
-# Some model specifications include list of supported features. These are
-# not currently checked against and are included only to account for
-# some potential future use.
+# Some model specifications include list of supported features. These end
+# up in UnifiVideoCamera.features (see camera_capabilities) but aren't
+# otherwise checked against.
 #
 # The structure is constructed from bits gleaned from the frontend JS
 # served by UniFi Video.
@@ -114,6 +114,20 @@ common_isp_actionables = [
     ['sharpness', 0, 100],
 ]
 
+# Recording modes (see set_recording_settings()) mapped to recordingSettings
+recording_modes = {
+    'disable': {'fullTimeRecordEnabled': False, 'motionRecordEnabled': False},
+    'fulltime': {'fullTimeRecordEnabled': True, 'motionRecordEnabled': True},
+    'motion': {'fullTimeRecordEnabled': False, 'motionRecordEnabled': True},
+}
+
+# IR led states (see ir_leds()) mapped to ispSettings
+ir_led_modes = {
+    'auto': {'irLedMode': 'auto', 'irLedLevel': 215},
+    'on': {'irLedMode': 'manual', 'irLedLevel': 215},
+    'off': {'irLedMode': 'manual', 'irLedLevel': 0},
+}
+
 def determine_img_actionables(fw_platform, camera_model):
     actionables = list(map(lambda x: x[0], common_isp_actionables))
     actionables.append('orientation')
@@ -130,11 +144,50 @@ def determine_img_actionables(fw_platform, camera_model):
 
     return actionables
 
+class CameraCapabilities(object):
+    """What a camera model on a firmware platform can do
+
+    Attributes:
+        isp_actionables (frozenset): Supported image settings
+        features (frozenset): Model features (see :data:`models`)
+        pro (bool): Whether the model is a pro model
+    """
+
+    __slots__ = ('isp_actionables', 'features', 'pro')
+
+    def __init__(self, fw_platform, camera_model):
+        model = models.get(camera_model, {})
+        self.isp_actionables = frozenset(
+            determine_img_actionables(fw_platform, camera_model))
+        self.features = frozenset(model.get('features', []))
+        self.pro = model.get('pro', False)
+
+_capabilities = {}
+
+def camera_capabilities(fw_platform, camera_model):
+    '''Get the (memoized) capabilities of a camera model
+
+    Arguments:
+        fw_platform (str or NoneType): Firmware platform
+        camera_model (str): Camera model
+
+    Returns:
+        :class:`CameraCapabilities`
+    '''
+
+    key = (fw_platform, camera_model)
+    try:
+        return _capabilities[key]
+    except KeyError:
+        return _capabilities.setdefault(
+            key, CameraCapabilities(fw_platform, camera_model))
+
 def isp_actionable(floor=0, ceiling=100, name=None):
     def decfn(fn):
+        fn_name = name or fn.__name__
+
         @wraps(fn)
         def wrapper(camera, val=None):
-            fn_name = name or fn.__name__
             if fn_name not in camera._isp_actionables:
                 raise CameraModelError('This camera model ({}) has no ' \
                     'support for {} control'.format(camera.model, fn_name))
@@ -152,15 +205,7 @@ def add_actionable(actionable):
     name, floor, ceiling = actionable
 
     def fn(self, value=None):
-        isp = self._data['ispSettings']
-        if value is None:
-            return isp.get(name, -1)
-        isp[name] = value
-        self.update(True)
-        if isp[name] == value:
-            return True
-        else:
-            return False
+        return self._simple_isp_actionable(name, value)
     fn.__name__ = str(name)
     fn.__doc__ = """Control image {name}
 
@@ -171,12 +216,65 @@ def add_actionable(actionable):
     Returns:
         bool or int: ``True`` or ``False``, depending on whether new value
         value was successfully registered. Current {name} value when
-        called without input value.
+        called without input value. ``None`` inside
+        :meth:`~UnifiVideoCamera.batch`.
 
     """.format(name=name, floor=floor, ceiling=ceiling)
 
     setattr(UnifiVideoCamera, name, isp_actionable(floor, ceiling)(fn))
 
+class CameraSettingsBatch(object):
+    """Buffers camera setting changes and sends them in a single
+    ``PUT camera/{id}``. Use through :meth:`UnifiVideoCamera.batch`.
+
+    On exit, the setting changes made inside the ``with`` block are saved
+    at once and each setter's change is verified against the camera data
+    UniFi Video returns. If saving fails, the camera's local settings are
+    rolled back to what they were on entry.
+
+    Attributes:
+        results (dict): Setter names mapped to whether the change made
+            through them was registered. Populated on exit.
+        success (bool or NoneType): Whether all changes were registered.
+            ``None`` until exit.
+    """
+
+    def __init__(self, camera):
+        self._camera = camera
+        self._checks = {}
+        self._original = None
+        self.results = {}
+        self.success = None
+
+    def _add_check(self, name, check):
+        self._checks[name] = check
+
+    def __enter__(self):
+        if self._camera._batch is not None:
+            raise ValueError('{} is already batching setting changes'.format(
+                self._camera))
+        self._original = deepcopy(self._camera._data)
+        self._camera._batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._camera._batch = None
+
+        if exc_type is not None:
+            self._camera._load_data(self._original)
+            return False
+
+        if self._checks:
+            try:
+                self._camera.update(True)
+            except Exception:
+                self._camera._load_data(self._original)
+                raise
+
+        self.results = {name: check() for name, check in self._checks.items()}
+        self.success = all(self.results.values())
+        return False
+
 class CameraModelError(ValueError):
     """Unsupported camera model"""
 
@@ -200,6 +298,8 @@ class UnifiVideoCamera(UnifiVideoSingle):
             Camera model
         platform (str or NoneType):
             Firmware platform
+        features (frozenset):
+            Model features, e.g., ``optical_zoom``
         overlay_text (str):
             Custom text overlayd over the image
         mac_addr (str):
@@ -235,13 +335,18 @@ class UnifiVideoCamera(UnifiVideoSingle):
             Camera ID (MongoDB ObjectID as hex string)
         _data (dict):
             Complete camera JSON from UniFi Video server
-        _isp_actionables (list):
-            List of supported image settings
+        _isp_actionables (frozenset):
+            Supported image settings
 
     Warning:
         Attributes having to do with camera state reflect the state
         as it was during object instantiation.
 
+    Tip:
+        Each setter saves the complete camera settings and reloads
+        them. Use :meth:`UnifiVideoCamera.batch` to apply several
+        changes with a single request.
+
     Warning:
         :attr:`UnifiVideoCamera.last_seen` changes were observed on
         UniFi Video v3.10.13. No attempt has been made to verify
@@ -249,6 +354,8 @@ class UnifiVideoCamera(UnifiVideoSingle):
         all supported UniFi Video versions.
     """
 
+    _batch = None
+
     def _load_data(self, data):
 
         self.model = data.get('model', None)
@@ -264,8 +371,9 @@ class UnifiVideoCamera(UnifiVideoSingle):
         self.platform = data.get('platform', None)
         self.overlay_text = data.get('osdSettings', {}).get('tag', None)
         self.mac_addr = utils.format_mac_addr(data.get('mac', 'ffffffffffff'))
-        self._isp_actionables = determine_img_actionables(self.platform,
-            self.model)
+        capabilities = camera_capabilities(self.platform, self.model)
+        self._isp_actionables = capabilities.isp_actionables
+        self.features = capabilities.features
         self.state = data.get('state', '')
         self.managed = data.get('managed', None)
         self.provisioned = data.get('provisioned', None)
@@ -287,41 +395,67 @@ class UnifiVideoCamera(UnifiVideoSingle):
             self.utc_offset = None
             self.utc_h_offset = None
 
+    def _save_and_verify(self, name, check):
+        if self._batch is not None:
+            self._batch._add_check(name, check)
+            return None
+        self.update(True)
+        return check()
+
     def _simple_isp_actionable(self, setting_name, value):
         isp = self._data['ispSettings']
         if value is None:
             return isp.get(setting_name, -1)
         isp[setting_name] = value
-        self.update(True)
-        if isp[setting_name] == value:
-            return True
-        else:
-            return False
+        return self._save_and_verify(setting_name,
+            lambda: self._data['ispSettings'].get(setting_name) == value)
 
     def _toggable_osd_actionable(self, setting_name, enabled, ints=False):
         osd = self._data['osdSettings']
         if enabled is None:
             return bool(osd[setting_name])
         osd[setting_name] = int(enabled) if ints else enabled
-        self.update(True)
-        if osd[setting_name] == enabled:
-            return True
-        else:
-            return False
+        return self._save_and_verify(setting_name,
+            lambda: self._data['osdSettings'].get(setting_name) == enabled)
+
+    def batch(self):
+        '''Batch setting changes into a single save request
+
+        Returns:
+            :class:`CameraSettingsBatch`: Context manager. Setters called
+            inside it change local settings only and return ``None``.
+
+        Example:
+            >>> with camera.batch() as batch:
+            ...     camera.brightness(60)
+            ...     camera.contrast(40)
+            ...     camera.onscreen_timestamp(True)
+            >>> batch.results
+            {'brightness': True, 'contrast': True, 'enableDate': True}
+        '''
+
+        return CameraSettingsBatch(self)
 
     def update(self, save=False):
         """Update settings from remote UniFi Video server (``self._api``).
         Call with ``True`` to write local settings to remote before updating.
 
         :param bool save: Whether to push settings to the camera
+
+        Note:
+            Updates without ``save`` may be batched with others (see
+            :class:`~unifi_video.batching.RefreshBatcher`).
         """
 
         if save:
             self._load_data(self._extract_data(
                 self._api.put(endpoints['save'](self._id), self._data)))
-        else:
-            self._load_data(self._extract_data(
-                self._api.get(endpoints['data'](self._id))))
+        elif not self._deferred_refresh():
+            self._refresh()
+
+    def _refresh(self):
+        self._load_data(self._extract_data(
+            self._api.get(endpoints['data'](self._id))))
 
     def snapshot(self, filename=None, width=0):
         """Take and download snapshot.
@@ -408,24 +542,17 @@ class UnifiVideoCamera(UnifiVideoSingle):
             elif _s == 'manual' and _v == 215:
                 return 'on'
 
-        isp['irLedLevel'] = 215
-        if led_state == 'auto':
-            isp['irLedMode'] = 'auto'
-        elif led_state == 'on':
-            isp['irLedMode'] = 'manual'
-        elif led_state == 'off':
-            isp['irLedMode'] = 'manual'
-            isp['irLedLevel'] = 0
-        else:
+        if led_state not in ir_led_modes:
             raise ValueError('Unknown led_state: {}'.format(led_state))
+        isp.update(ir_led_modes[led_state])
 
         verify = isp['irLedMode'] + str(isp['irLedLevel'])
-        self.update(True)
 
-        if isp['irLedMode'] + str(isp['irLedLevel']) == verify:
-            return True
-        else:
-            return False
+        def check():
+            isp = self._data['ispSettings']
+            return isp['irLedMode'] + str(isp['irLedLevel']) == verify
+
+        return self._save_and_verify('ir_leds', check)
 
     def onscreen_text(self, text=None):
         """Set or get on-screen text.
@@ -444,12 +571,8 @@ class UnifiVideoCamera(UnifiVideoSingle):
         osd['overrideMessage'] = True
         osd['tag'] = text.strip()
 
-        self.update(True)
-
-        if osd['tag'] == text:
-            return True
-        else:
-            return False
+        return self._save_and_verify('onscreen_text',
+            lambda: self._data['osdSettings'].get('tag') == text.strip())
 
     def onscreen_timestamp(self, enabled=None):
         """Set or get on-screen timestamp state.
@@ -496,18 +619,10 @@ class UnifiVideoCamera(UnifiVideoSingle):
         rec_settings = self._data['recordingSettings']
 
         if recording_mode:
-            if recording_mode == 'disable':
-                rec_settings['fullTimeRecordEnabled'] = False
-                rec_settings['motionRecordEnabled'] = False
-            elif recording_mode == 'fulltime':
-                rec_settings['fullTimeRecordEnabled'] = True
-                rec_settings['motionRecordEnabled'] = True
-            elif recording_mode == 'motion':
-                rec_settings['fullTimeRecordEnabled'] = False
-                rec_settings['motionRecordEnabled'] = True
-            else:
+            if recording_mode not in recording_modes:
                 raise ValueError('Unknow recording mode "{}"'.format(
                     recording_mode))
+            rec_settings.update(recording_modes[recording_mode])
 
         if pre_padding_secs is not None:
             rec_settings['prePaddingSecs'] = pre_padding_secs
@@ -516,8 +631,8 @@ class UnifiVideoCamera(UnifiVideoSingle):
             rec_settings['postPaddingSecs'] = post_padding_secs
 
         verify = deepcopy(rec_settings)
-        self.update(True)
-        return verify == self._data['recordingSettings']
+        return self._save_and_verify('recording_settings',
+            lambda: verify == self._data['recordingSettings'])
 
     def get_recording_settings(self, all=False):
         """Get camera's recording settings
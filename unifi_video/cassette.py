@@ -0,0 +1,450 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import base64
+import gzip
+import io
+import json
+import re
+import threading
+import time
+
+from collections import deque
+from email.message import Message
+
+try:
+    from urllib.parse import urlparse, parse_qsl, urlencode
+    from urllib.request import urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urlparse import urlparse, parse_qsl
+    from urllib import urlencode
+    from urllib2 import urlopen, HTTPError
+
+from .cache import normalize_url
+
+try:
+    from time import perf_counter as timer
+except ImportError:
+    from ._concurrency import monotonic as timer
+
+format_version = 1
+
+_session_cookie = re.compile(r'(JSESSIONID_AV=)[^;,\s]+')
+
+# Never written to a cassette
+_secret_params = ('apiKey',)
+_secret_request_headers = ('cookie', 'authorization')
+_secret_bodies = ('login',)
+
+class CassetteError(ValueError):
+    """Request with no recorded exchange to replay, or unreadable cassette"""
+
+def default_transport(req, context=None):
+    '''Send ``req`` with :func:`urlopen`; what
+    :class:`~unifi_video.api.UnifiVideoAPI` does without a transport
+    '''
+
+    if context is not None:
+        return urlopen(req, context=context)
+    return urlopen(req)
+
+def request_key(method, url):
+    '''Key for matching requests to recorded exchanges
+
+    Arguments:
+        method (str): HTTP method
+        url (str): Full request URL
+
+    Returns:
+        str: Method and URL path and query, without host, API key or
+        query parameter ordering
+    '''
+
+    parsed = urlparse(url)
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in _secret_params])
+    return '{} {}'.format(method, normalize_url(
+        '{}?{}'.format(parsed.path, query) if query else parsed.path))
+
+class Exchange(object):
+    """A recorded request and response
+
+    Attributes:
+        key (str): See :func:`request_key`
+        request_headers (list): ``[name, value]`` pairs, sans credentials
+        request_body (bytes or NoneType): Request body. Login requests' are
+            not recorded.
+        status (int): HTTP status code
+        reason (str): HTTP reason phrase
+        headers (list): Response headers as ``[name, value]`` pairs
+        body (bytes): Response body, as sent (e.g., gzip encoded)
+        body_size (int): Response body size. Larger than ``len(body)`` for
+            bodies truncated to the recorder's ``max_body_bytes``.
+        started (float): Seconds since the start of the recording
+        ttfb (float): Seconds until response headers were received
+        body_time (float): Seconds spent reading the response body
+    """
+
+    __slots__ = ('key', 'request_headers', 'request_body', 'status',
+        'reason', 'headers', 'body', 'body_size', 'started', 'ttfb',
+        'body_time')
+
+    def __init__(self, key, request_headers=(), request_body=None,
+            status=200, reason='OK', headers=(), body=b'', body_size=None,
+            started=0, ttfb=0, body_time=0):
+        self.key = key
+        self.request_headers = [list(h) for h in request_headers]
+        self.request_body = request_body
+        self.status = status
+        self.reason = reason
+        self.headers = [list(h) for h in headers]
+        self.body = body
+        self.body_size = len(body) if body_size is None else body_size
+        self.started = started
+        self.ttfb = ttfb
+        self.body_time = body_time
+
+    def to_dict(self):
+        data = dict((name, getattr(self, name)) for name in self.__slots__)
+        for name in ('request_body', 'body'):
+            data[name] = _encode_body(data[name])
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        for name in ('request_body', 'body'):
+            data[name] = _decode_body(data.get(name))
+        if data['body'] is None:
+            data['body'] = b''
+        return cls(**dict((k, v) for k, v in data.items()
+            if k in cls.__slots__))
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, {
+            'key': self.key,
+            'status': self.status,
+            'body_size': self.body_size,
+        })
+
+def _encode_body(body):
+    if body is None:
+        return None
+    try:
+        return {'text': body.decode('utf8')}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(body).decode('ascii')}
+
+def _decode_body(body):
+    if body is None:
+        return None
+    if 'text' in body:
+        return body['text'].encode('utf8')
+    return base64.b64decode(body['base64'])
+
+def load_cassette(path):
+    '''Read the exchanges recorded in a cassette file
+
+    A cassette cut short, e.g., by a crash during recording, yields the
+    exchanges written before the cut.
+
+    Arguments:
+        path (str): Cassette file (gzip compressed JSON lines)
+
+    Returns:
+        list: :class:`Exchange` objects in recording order
+
+    Raises:
+        CassetteError: If the file is not a cassette
+    '''
+
+    header = None
+    exchanges = []
+    try:
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                data = json.loads(line.decode('utf8'))
+                if header is None:
+                    header = data
+                else:
+                    exchanges.append(Exchange.from_dict(data))
+    except EOFError:
+        # Recording never finished; every line written was flushed
+        pass
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        raise CassetteError('Not a cassette: {}'.format(path))
+
+    if header is None or header.get('cassette') != format_version:
+        raise CassetteError('Unsupported cassette: {}'.format(path))
+    return exchanges
+
+def _header_items(headers):
+    items = getattr(headers, 'items', None)
+    return [[k, v] for k, v in items()] if items else []
+
+def _request_body(req):
+    data = getattr(req, 'data', None)
+    if data is None and hasattr(req, 'get_data'):
+        data = req.get_data()
+    return data
+
+class _RecordingResponse(object):
+    '''Passes body reads through and records them. Everything but
+    :meth:`read` and :meth:`close` is passed through to the wrapped
+    response.
+    '''
+
+    def __init__(self, res, exchange, done, max_body_bytes):
+        self._res = res
+        self._exchange = exchange
+        self._done = done
+        self._max_body_bytes = max_body_bytes
+        self._chunks = []
+        self._kept = 0
+        self._size = 0
+        self._body_time = 0
+        self._finished = False
+
+    def __getattr__(self, name):
+        return getattr(self._res, name)
+
+    def read(self, *args):
+        started = timer()
+        data = self._res.read(*args)
+        self._body_time += timer() - started
+        self._size += len(data)
+        if self._max_body_bytes is None:
+            self._chunks.append(data)
+        elif self._kept < self._max_body_bytes:
+            data_kept = data[:self._max_body_bytes - self._kept]
+            self._chunks.append(data_kept)
+            self._kept += len(data_kept)
+        size = args[0] if args else None
+        if not data or size is None or size < 0:
+            self._finish()
+        return data
+
+    def close(self):
+        self._finish()
+        close = getattr(self._res, 'close', None)
+        if close is not None:
+            close()
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        exchange = self._exchange
+        exchange.body = b''.join(self._chunks)
+        exchange.body_size = self._size
+        exchange.body_time = self._body_time
+        self._done(exchange)
+
+    def __del__(self):
+        self._finish()
+
+class RecordingTransport(object):
+    """Transport that records request and response exchanges to a
+    cassette file
+
+    Exchanges are written as they complete: when a response body has been
+    read to the end or the response is closed. API keys, cookies, the
+    login request body and session IDs are left out.
+
+    Arguments:
+        path (str): Cassette file to write. Overwritten if it exists.
+        transport (callable, optional): Transport to record. Defaults to
+            :func:`default_transport`.
+        max_body_bytes (int or NoneType): Response body bytes to keep per
+            exchange, e.g., to keep recording downloads out of the
+            cassette. ``None`` for no limit. JSON bodies are always kept
+            whole. Replays pad truncated bodies to their original size
+            with zero bytes.
+
+    Attributes:
+        exchanges (int): Number of exchanges written
+
+    Example:
+        >>> with RecordingTransport('site.cassette.gz') as transport:
+        ...     uva = UnifiVideoAPI(api_key='xxxxxx', addr='10.3.2.1',
+        ...         transport=transport)
+        ...     uva.get_recordings(limit=10000)
+    """
+
+    def __init__(self, path, transport=None, max_body_bytes=None):
+        self.path = path
+        self.transport = transport or default_transport
+        self.max_body_bytes = max_body_bytes
+        self.exchanges = 0
+        self._started = timer()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wb')
+        self._write({'cassette': format_version, 'recorded': time.time()})
+
+    def _write(self, data):
+        line = json.dumps(data, separators=(',', ':'), sort_keys=True)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line.encode('utf8') + b'\n')
+            self._file.flush()
+
+    def _record(self, exchange):
+        self._write(exchange.to_dict())
+        self.exchanges += 1
+
+    def __call__(self, req, context=None):
+        key = request_key(req.get_method(), req.get_full_url())
+        body = _request_body(req)
+        exchange = Exchange(key,
+            request_headers=[
+                h for h in req.header_items()
+                if h[0].lower() not in _secret_request_headers],
+            request_body=None
+                if urlparse(req.get_full_url()).path.rstrip('/')\
+                    .endswith(_secret_bodies)
+                else body,
+            started=timer() - self._started)
+
+        started = timer()
+        try:
+            res = self.transport(req, context)
+        except HTTPError as err:
+            exchange.ttfb = timer() - started
+            self._describe(exchange, err.code, err.msg, err.headers)
+            started = timer()
+            body = err.read() if err.fp is not None else b''
+            exchange.body = body
+            exchange.body_size = len(body)
+            exchange.body_time = timer() - started
+            self._record(exchange)
+            raise HTTPError(req.get_full_url(), err.code, err.msg,
+                err.headers, io.BytesIO(body))
+
+        exchange.ttfb = timer() - started
+        self._describe(exchange, res.getcode(),
+            getattr(res, 'reason', None) or getattr(res, 'msg', 'OK'),
+            res.headers)
+        json_body = 'application/json' in '{}'.format(
+            res.headers.get('Content-Type') or '')
+        return _RecordingResponse(res, exchange, self._record,
+            None if json_body else self.max_body_bytes)
+
+    def _describe(self, exchange, status, reason, headers):
+        exchange.status = status
+        exchange.reason = '{}'.format(reason)
+        exchange.headers = [
+            [k, _session_cookie.sub(r'\1recorded', v)
+                if k.lower() == 'set-cookie' else v]
+            for k, v in _header_items(headers)]
+
+    def close(self):
+        '''Finish the cassette file'''
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class _ReplayedResponse(object):
+
+    def __init__(self, exchange, url, speed):
+        self.url = url
+        self.status = self.code = exchange.status
+        self.reason = self.msg = exchange.reason
+        self.headers = _headers(exchange)
+        padding = exchange.body_size - len(exchange.body)
+        self._body = io.BytesIO(exchange.body + b'\0' * padding)
+        self._size = exchange.body_size
+        self._body_time = exchange.body_time
+        self._speed = speed
+
+    def read(self, size=-1):
+        data = self._body.read(-1 if size is None else size)
+        if self._speed and data and self._size:
+            time.sleep(self._body_time * len(data) / float(self._size)
+                / self._speed)
+        return data
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def close(self):
+        self._body.close()
+
+def _headers(exchange):
+    headers = Message()
+    for name, value in exchange.headers:
+        headers[name] = value
+    return headers
+
+class ReplayTransport(object):
+    """Transport that serves recorded exchanges instead of sending requests
+
+    Requests are matched to exchanges by method, path and query (see
+    :func:`request_key`). Exchanges with the same key are served in
+    recording order; once they run out, the last one is served again.
+
+    Arguments:
+        cassette (str or list): Cassette file or a list of
+            :class:`Exchange` objects
+        speed (float or NoneType): Replay speed relative to the recording:
+            ``1`` to wait out the recorded time to first byte and body read
+            times, ``10`` for ten times faster, ``None`` or ``0`` for no
+            waiting at all
+
+    Attributes:
+        served (int): Number of requests served
+
+    Example:
+        >>> uva = UnifiVideoAPI(api_key='any',
+        ...     transport=ReplayTransport('site.cassette.gz', speed=None))
+    """
+
+    def __init__(self, cassette, speed=1):
+        exchanges = load_cassette(cassette) \
+            if not isinstance(cassette, (list, tuple)) else cassette
+        self.speed = speed
+        self.served = 0
+        self._exchanges = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        for exchange in exchanges:
+            self._exchanges.setdefault(exchange.key, deque()).append(exchange)
+
+    def __call__(self, req, context=None):
+        url = req.get_full_url()
+        key = request_key(req.get_method(), url)
+        with self._lock:
+            queue = self._exchanges.get(key)
+            if queue:
+                exchange = self._last[key] = queue.popleft()
+            else:
+                exchange = self._last.get(key)
+            if exchange is None:
+                raise CassetteError(
+                    'No recorded exchange for {}'.format(key))
+            self.served += 1
+
+        if self.speed:
+            time.sleep(exchange.ttfb / self.speed)
+
+        res = _ReplayedResponse(exchange, url, self.speed)
+        # Like urlopen, which leaves only 2xx responses unraised
+        if not 200 <= exchange.status < 300:
+            raise HTTPError(url, exchange.status, exchange.reason,
+                res.headers, res)
+        return res
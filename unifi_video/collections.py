@@ -1,12 +1,7 @@
 try:
-    ModuleNotFoundError
-except NameError:
-    ModuleNotFoundError = ImportError
-
-try:
-    from six import itervalues
-except (ImportError, ModuleNotFoundError):
-    from ._six import itervalues
+    _itervalues = dict.itervalues
+except AttributeError:
+    _itervalues = dict.values
 
 class UnifiVideoCollection(dict):
     def __init__(self, collection_type, *args, **kwargs):
@@ -14,7 +9,7 @@ class UnifiVideoCollection(dict):
         self.update(*args, **kwargs)
 
     def __iter__(self, *args, **kwargs):
-        return itervalues(self, **kwargs)
+        return iter(_itervalues(self))
 
     def add(self, single_dict):
         if not isinstance(single_dict, self._collection_type):
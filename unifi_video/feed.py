@@ -0,0 +1,218 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import threading
+
+from ._concurrency import monotonic
+from .camera import UnifiVideoCamera, CameraModelError
+
+CAMERA_ADDED = 'added'
+CAMERA_REMOVED = 'removed'
+CAMERA_CONNECTED = 'connected'
+CAMERA_DISCONNECTED = 'disconnected'
+CAMERA_NEW_RECORDING = 'new_recording'
+CAMERA_SETTINGS_CHANGED = 'settings_changed'
+
+event_types = (
+    CAMERA_ADDED,
+    CAMERA_REMOVED,
+    CAMERA_CONNECTED,
+    CAMERA_DISCONNECTED,
+    CAMERA_NEW_RECORDING,
+    CAMERA_SETTINGS_CHANGED,
+)
+
+# Top-level camera JSON keys that change during normal operation and
+# therefore don't count as settings changes
+volatile_keys = frozenset([
+    'state',
+    'lastSeen',
+    'uptime',
+    'lastRecordingId',
+    'lastRecordingStartTime',
+    'disconnectReason',
+    'systemInfo',
+    'authStatus',
+])
+
+class CameraEvent(object):
+    """Camera change
+
+    Attributes:
+        type (str): One of :data:`event_types`
+        camera_id (str): Camera ID
+        camera (:class:`~unifi_video.camera.UnifiVideoCamera` or NoneType):
+            Camera as it is after the change. ``None`` for removed cameras.
+        previous (:class:`~unifi_video.camera.UnifiVideoCamera` or NoneType):
+            Camera as it was before the change. ``None`` for added cameras.
+        changed_keys (list): Top-level camera JSON keys whose values changed
+    """
+
+    def __init__(self, event_type, camera_id, camera=None, previous=None,
+            changed_keys=None):
+        self.type = event_type
+        self.camera_id = camera_id
+        self.camera = camera
+        self.previous = previous
+        self.changed_keys = changed_keys or []
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, {
+            'type': self.type,
+            'camera_id': self.camera_id,
+            'changed_keys': self.changed_keys,
+        })
+
+class CameraChangeFeed(object):
+    """Polls UniFi Video for camera changes and turns them into events.
+
+    Every :meth:`poll` is a single ``GET camera`` request. Cameras whose
+    JSON equals that of the previous poll are skipped without building a
+    :class:`~unifi_video.camera.UnifiVideoCamera` for them.
+
+    The poll interval adapts to activity: it drops to ``min_interval``
+    whenever a poll yields events and otherwise grows by ``backoff`` up to
+    ``max_interval``.
+
+    Events are passed to handlers registered with :meth:`on` and can also
+    be consumed by iterating :meth:`events`.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance to poll through
+        min_interval (int or float, optional): Shortest poll interval
+        max_interval (int or float, optional): Longest poll interval
+        backoff (float, optional): Interval multiplier for quiet polls
+        emit_initial (bool, optional): Whether the first poll should emit
+            an ``added`` event per camera or only record the initial state
+
+    Attributes:
+        cameras (dict): Camera IDs mapped to
+            :class:`~unifi_video.camera.UnifiVideoCamera` objects as of the
+            latest poll
+        interval (float): Current poll interval
+    """
+
+    def __init__(self, api, min_interval=2, max_interval=30, backoff=1.5,
+            emit_initial=False):
+        self._api = api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.cameras = {}
+        self._handlers = {}
+        self._polled = emit_initial
+        self._stop = threading.Event()
+
+    def on(self, event_type, handler):
+        '''Register event handler
+
+        Arguments:
+            event_type (str): One of :data:`event_types` or ``*`` for all
+            handler (callable): Called with a :class:`CameraEvent`
+        '''
+
+        if event_type != '*' and event_type not in event_types:
+            raise ValueError('Unknown event type "{}"'.format(event_type))
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def _diff(self, camera_id, camera, previous):
+        if previous is None:
+            return [CameraEvent(CAMERA_ADDED, camera_id, camera)]
+
+        old, new = previous._data, camera._data
+        changed_keys = sorted(
+            k for k in set(old.keys()) | set(new.keys())
+            if old.get(k) != new.get(k))
+        events = []
+
+        if camera.connected != previous.connected:
+            events.append(CameraEvent(
+                CAMERA_CONNECTED if camera.connected else CAMERA_DISCONNECTED,
+                camera_id, camera, previous, changed_keys))
+
+        if camera.last_recording_id and \
+                camera.last_recording_id != previous.last_recording_id:
+            events.append(CameraEvent(CAMERA_NEW_RECORDING,
+                camera_id, camera, previous, changed_keys))
+
+        if any(k not in volatile_keys for k in changed_keys):
+            events.append(CameraEvent(CAMERA_SETTINGS_CHANGED,
+                camera_id, camera, previous, changed_keys))
+
+        return events
+
+    def poll(self):
+        '''Poll UniFi Video once and dispatch resulting events to handlers
+
+        Returns:
+            list: :class:`CameraEvent` objects
+        '''
+
+        res = self._api.get('camera')
+        if not isinstance(res, dict):
+            return []
+
+        events = []
+        seen = set()
+
+        for data in res.get('data', []):
+            camera_id = data.get('_id')
+            seen.add(camera_id)
+            previous = self.cameras.get(camera_id)
+            if previous is not None and previous._data == data:
+                continue
+            try:
+                camera = UnifiVideoCamera(self._api, data)
+            except CameraModelError:
+                continue
+            self.cameras[camera_id] = camera
+            events.extend(self._diff(camera_id, camera, previous))
+
+        for camera_id in [c for c in self.cameras if c not in seen]:
+            previous = self.cameras.pop(camera_id)
+            events.append(CameraEvent(
+                CAMERA_REMOVED, camera_id, previous=previous))
+
+        if not self._polled:
+            self._polled = True
+            events = []
+
+        self.interval = self.min_interval if events else \
+            min(self.max_interval, self.interval * self.backoff)
+
+        for event in events:
+            for handler in self._handlers.get(event.type, []) + \
+                    self._handlers.get('*', []):
+                handler(event)
+
+        return events
+
+    def events(self):
+        '''Poll until :meth:`stop` is called, yielding events as they come
+
+        Returns:
+            Iterable[:class:`CameraEvent`]
+        '''
+
+        self._stop.clear()
+        while not self._stop.is_set():
+            started = monotonic()
+            for event in self.poll():
+                yield event
+            self._stop.wait(max(0, self.interval - (monotonic() - started)))
+
+    def run(self):
+        '''Poll until :meth:`stop` is called, dispatching events to
+        handlers only
+        '''
+
+        for _ in self.events():
+            pass
+
+    def stop(self):
+        '''Make :meth:`run` and :meth:`events` return after the ongoing
+        poll
+        '''
+
+        self._stop.set()
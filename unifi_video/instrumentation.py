@@ -0,0 +1,619 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import bisect
+import json
+import re
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    from time import perf_counter as timer
+except ImportError:
+    from ._concurrency import monotonic as timer
+
+try:
+    from http.client import HTTPConnection, HTTPSConnection
+    from urllib.request import HTTPHandler, HTTPSHandler, build_opener
+    from urllib.error import HTTPError
+except ImportError:
+    from httplib import HTTPConnection, HTTPSConnection
+    from urllib2 import HTTPHandler, HTTPSHandler, build_opener, HTTPError
+
+phases = ('connect', 'ttfb', 'body', 'parse', 'construct')
+
+# Upper bounds, in seconds
+default_buckets = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5,
+    1, 2.5, 5, 10, float('inf'))
+
+_id_segment = re.compile(r'^[0-9a-fA-F]{24}$')
+
+def endpoint_template(url):
+    '''Get the endpoint template of an API URL
+
+    Arguments:
+        url (str): API endpoint (relative to the API base URL)
+
+    Returns:
+        str: The URL path with object IDs replaced by ``{id}``, e.g.,
+        ``recording/{id}/download``
+    '''
+
+    return '/'.join(
+        '{id}' if _id_segment.match(segment) else segment
+        for segment in url.split('?', 1)[0].strip('/').split('/'))
+
+class RequestEvent(object):
+    """A request to UniFi Video, as reported to instrumentation listeners
+
+    Phase timings are in seconds and ``None`` for phases that did not take
+    place. They don't overlap; their sum is the time spent on the request.
+
+    Attributes:
+        method (str): HTTP method
+        url (str): API endpoint (relative to the API base URL)
+        endpoint (str): Endpoint template (see :func:`endpoint_template`)
+        started (float): Unix timestamp of the start of the request
+        status (int or NoneType): HTTP status code. ``None`` if no response
+            was received.
+        bytes (int): Response body bytes read off the connection (before
+            decompression)
+        connect (float or NoneType): Time to connect. ``None`` for requests
+            sent over a reused connection.
+        ttfb (float or NoneType): Time from connected (and request sent)
+            to response headers received
+        body (float or NoneType): Time spent reading the response body.
+            For streamed recording listings, also covers parsing.
+        parse (float or NoneType): Time spent decoding JSON
+        construct (float or NoneType): Time spent building camera and
+            recording objects from the response. Reported in a follow-up
+            event for recording listings.
+        reused (bool): Whether the request went over a reused connection
+        login_retry (bool): Whether the request was answered with HTTP 401
+            and retried after logging in
+        follow_up (bool): Whether the event is not a request of its own but
+            reports ``construct`` time for an earlier event of the same
+            request. Recording listings are built lazily, after their
+            request has been reported.
+    """
+
+    __slots__ = ('method', 'url', 'endpoint', 'started', 'status', 'bytes',
+        'connect', 'ttfb', 'body', 'parse', 'construct', 'reused',
+        'login_retry', 'follow_up')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint_template(url)
+        self.started = time.time()
+        self.status = None
+        self.bytes = 0
+        self.connect = None
+        self.ttfb = None
+        self.body = None
+        self.parse = None
+        self.construct = None
+        self.reused = False
+        self.login_retry = False
+        self.follow_up = False
+
+    @property
+    def timings(self):
+        '''dict: Phase names mapped to timings, for phases that took place
+        '''
+
+        return dict((phase, getattr(self, phase)) for phase in phases
+            if getattr(self, phase) is not None)
+
+    @property
+    def duration(self):
+        '''float: Sum of phase timings'''
+
+        return sum(self.timings.values())
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, {
+            'method': self.method,
+            'endpoint': self.endpoint,
+            'status': self.status,
+            'bytes': self.bytes,
+            'timings': self.timings,
+        })
+
+class Histogram(object):
+    """Fixed bucket histogram of durations
+
+    Arguments:
+        buckets (tuple): Ascending bucket upper bounds in seconds, ending
+            with ``float('inf')``
+    """
+
+    def __init__(self, buckets=default_buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        '''Estimate a percentile
+
+        Arguments:
+            q (float): Percentile, 0 - 100
+
+        Returns:
+            float or NoneType: Upper bound of the bucket the percentile falls
+            in, capped at the largest value seen. ``None`` if empty.
+        '''
+
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': [
+                ['+Inf' if bound == float('inf') else bound, count]
+                for bound, count in zip(self.buckets, self.counts)],
+        }
+
+class EndpointHistograms(object):
+    """Instrumentation listener that aggregates requests per method and
+    endpoint template into histograms of phase timings
+
+    Follow-up events (see :attr:`RequestEvent.follow_up`) only add to the
+    ``construct`` histogram.
+
+    Arguments:
+        buckets (tuple): See :class:`Histogram`
+
+    Example:
+        >>> histograms = EndpointHistograms()
+        >>> uva = UnifiVideoAPI(api_key='xxxxxx', addr='10.3.2.1',
+        ...     instrumentation=Instrumentation([histograms]))
+        >>> print(histograms.dump())
+    """
+
+    def __init__(self, buckets=default_buckets):
+        self.buckets = buckets
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        key = '{} {}'.format(event.method, event.endpoint)
+        timings = event.timings
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = {
+                    'count': 0,
+                    'bytes': 0,
+                    'statuses': Counter(),
+                    'reused_connections': 0,
+                    'login_retries': 0,
+                    'histograms': {},
+                }
+            if event.follow_up:
+                timings = {'construct': event.construct}
+            else:
+                stats['count'] += 1
+                stats['bytes'] += event.bytes
+                stats['statuses'][event.status] += 1
+                stats['reused_connections'] += event.reused
+                stats['login_retries'] += event.login_retry
+                timings['total'] = sum(timings.values())
+            for phase, seconds in timings.items():
+                histogram = stats['histograms'].get(phase)
+                if histogram is None:
+                    histogram = stats['histograms'][phase] = \
+                        Histogram(self.buckets)
+                histogram.observe(seconds)
+
+    def as_dict(self):
+        '''Export the aggregates
+
+        Returns:
+            dict: ``'{method} {endpoint}'`` mapped to request counts, bytes,
+            status code counts and a histogram (see :meth:`Histogram.as_dict`)
+            per phase plus ``total``
+        '''
+
+        with self._lock:
+            return dict((key, {
+                'count': stats['count'],
+                'bytes': stats['bytes'],
+                'statuses': dict(
+                    ('{}'.format(status), count)
+                    for status, count in stats['statuses'].items()),
+                'reused_connections': stats['reused_connections'],
+                'login_retries': stats['login_retries'],
+                'histograms': dict(
+                    (phase, histogram.as_dict())
+                    for phase, histogram in stats['histograms'].items()),
+            }) for key, stats in self._endpoints.items())
+
+    def dump(self, fp=None):
+        '''Dump the aggregates as JSON
+
+        Arguments:
+            fp (file-like object, optional): File to write the JSON to
+
+        Returns:
+            str: The JSON
+        '''
+
+        dumped = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        if fp is not None:
+            fp.write(dumped)
+        return dumped
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+def _timed_connection(connection_class):
+    class TimedConnection(connection_class):
+        connect_time = None
+
+        def connect(self):
+            started = timer()
+            connection_class.connect(self)
+            self.connect_time = timer() - started
+
+    return TimedConnection
+
+_TimedHTTPConnection = _timed_connection(HTTPConnection)
+_TimedHTTPSConnection = _timed_connection(HTTPSConnection)
+
+def _connection_factory(connection_class, req):
+    def connection(*args, **kwargs):
+        req.timed_connection = connection_class(*args, **kwargs)
+        return req.timed_connection
+    return connection
+
+class _TimedHTTPHandler(HTTPHandler):
+
+    def http_open(self, req):
+        return self.do_open(
+            _connection_factory(_TimedHTTPConnection, req), req)
+
+class _TimedHTTPSHandler(HTTPSHandler):
+
+    def https_open(self, req):
+        return self.do_open(
+            _connection_factory(_TimedHTTPSConnection, req), req,
+            context=self._context)
+
+class _TimedResponse(object):
+    '''Counts and times response body reads. Everything but :meth:`read`
+    is passed through to the wrapped response.
+    '''
+
+    def __init__(self, res, event):
+        self._res = res
+        self._event = event
+
+    def __getattr__(self, name):
+        return getattr(self._res, name)
+
+    def read(self, *args):
+        started = timer()
+        data = self._res.read(*args)
+        event = self._event
+        event.body = (event.body or 0) + timer() - started
+        event.bytes += len(data)
+        return data
+
+class Instrumentation(object):
+    """Reports the requests a :class:`~unifi_video.api.UnifiVideoAPI`
+    sends to listeners, as :class:`RequestEvent` objects
+
+    Without listeners, instrumentation is disabled and requests take their
+    usual, uninstrumented path. Counters only count while enabled.
+
+    Requests are timed with an opener of their own instead of
+    :func:`urlopen`, for access to connection setup.
+
+    Arguments:
+        listeners (iterable): Callables to call with each
+            :class:`RequestEvent`, e.g., :class:`EndpointHistograms` or
+            ``list.append``
+
+    Attributes:
+        listeners (tuple): See above
+        enabled (bool): Whether there are listeners
+        requests (int): Number of requests
+        connections (int): Number of connections opened
+        reused_connections (int): Number of requests sent over a reused
+            connection
+        login_retries (int): Number of requests retried after logging in
+    """
+
+    def __init__(self, listeners=()):
+        self.listeners = tuple(listeners)
+        self.enabled = bool(self.listeners)
+        self.requests = 0
+        self.connections = 0
+        self.reused_connections = 0
+        self.login_retries = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._openers = {}
+
+    def add_listener(self, listener):
+        self.listeners += (listener,)
+        self.enabled = True
+
+    def remove_listener(self, listener):
+        self.listeners = tuple(l for l in self.listeners if l is not listener)
+        self.enabled = bool(self.listeners)
+
+    def counters(self):
+        '''Get request, connection and login retry counts
+
+        Returns:
+            dict
+        '''
+
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'reused_connections': self.reused_connections,
+            'login_retries': self.login_retries,
+        }
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self):
+        '''Get the event of the request being sent by the calling thread
+
+        Returns:
+            :class:`RequestEvent` or NoneType
+        '''
+
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def start(self, method, url):
+        '''Start an event and make it the calling thread's current one'''
+
+        event = RequestEvent(method, url)
+        self._stack().append(event)
+        return event
+
+    def detach(self, event):
+        '''Stop ``event`` from being the calling thread's current event,
+        e.g., before handing a streamed response to the caller
+        '''
+
+        stack = self._stack()
+        if event in stack:
+            stack.remove(event)
+
+    def finish(self, event):
+        '''Pass ``event`` on to listeners or, when held (see
+        :meth:`holding`), keep it for later
+        '''
+
+        self.detach(event)
+        with self._lock:
+            self.requests += 1
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            held.append(event)
+        else:
+            self._dispatch(event)
+
+    def _dispatch(self, event):
+        for listener in self.listeners:
+            listener(event)
+
+    def observe(self, method, url, fn, *args):
+        '''Call ``fn(*args)`` as a request of its own'''
+
+        event = self.start(method, url)
+        try:
+            return fn(*args)
+        finally:
+            self.finish(event)
+
+    def urlopen(self, req, context=None, transport=None):
+        '''Open ``req`` and time connection setup and time to first byte
+        for the current event
+
+        Arguments:
+            req (:class:`~urllib.request.Request`): Request to send
+            context (:class:`ssl.SSLContext`, optional): TLS context
+            transport (callable, optional): Transport to send ``req`` with
+                (see :class:`~unifi_video.api.UnifiVideoAPI`). Connections
+                are not accounted for with transports; their connection
+                setup, if any, counts toward ``ttfb``.
+
+        Returns:
+            Response whose body reads are timed and counted
+        '''
+
+        event = self.current()
+        if transport is not None:
+            send = lambda: transport(req, context)
+        else:
+            opener = self._openers.get(context)
+            if opener is None:
+                opener = self._openers[context] = build_opener(
+                    _TimedHTTPHandler(), _TimedHTTPSHandler(context=context))
+            send = lambda: opener.open(req)
+
+        started = timer()
+        try:
+            res = send()
+        except HTTPError as err:
+            self._responded(event, req, timer() - started, err.code,
+                transport is None)
+            raise
+        self._responded(event, req, timer() - started, res.getcode(),
+            transport is None)
+        return _TimedResponse(res, event) if event is not None else res
+
+    def _responded(self, event, req, elapsed, status, timed_connection):
+        connection = getattr(req, 'timed_connection', None)
+        connect = getattr(connection, 'connect_time', None)
+        if timed_connection:
+            with self._lock:
+                if connect is None:
+                    self.reused_connections += 1
+                else:
+                    self.connections += 1
+        if event is not None:
+            event.status = status
+            event.connect = connect
+            event.ttfb = elapsed - (connect or 0)
+            event.reused = timed_connection and connect is None
+
+    def parse(self, loads, body):
+        '''Decode JSON with ``loads`` and time it for the current event'''
+
+        started = timer()
+        content = loads(body)
+        event = self.current()
+        if event is not None:
+            event.parse = (event.parse or 0) + timer() - started
+        return content
+
+    def login_retry(self):
+        '''Count a login retry for the current event'''
+
+        if not self.enabled:
+            return
+        with self._lock:
+            self.login_retries += 1
+        event = self.current()
+        if event is not None:
+            event.login_retry = True
+
+    @contextmanager
+    def holding(self):
+        '''Hold events of requests finished within the block instead of
+        passing them on to listeners. To be followed by
+        :meth:`constructing` or :meth:`constructing_each`.
+
+        Yields:
+            list or NoneType: The held events. ``None`` when disabled.
+        '''
+
+        if not self.enabled:
+            yield None
+            return
+        outer = getattr(self._local, 'held', None)
+        held = self._local.held = []
+        try:
+            yield held
+        except BaseException:
+            self._local.held = outer
+            self.release(held)
+            raise
+        self._local.held = outer
+
+    @contextmanager
+    def constructing(self, held):
+        '''Time the block as object construction for the last successful
+        one of the ``held`` events, then pass them on to listeners
+        '''
+
+        if not held:
+            yield
+            return
+        started = timer()
+        try:
+            yield
+        finally:
+            self.release(held, timer() - started)
+
+    def constructing_each(self, held, iterable):
+        '''Pass the ``held`` events on to listeners right away and time
+        producing the items of a lazy iterable as object construction
+
+        Construction time is reported in a follow-up event (see
+        :attr:`RequestEvent.follow_up`) for the last successful one of the
+        events, once ``iterable`` is exhausted. Iterables that are not
+        exhausted report no construction time.
+
+        Returns:
+            iterable: Yields the items of ``iterable``
+        '''
+
+        if not held:
+            return iterable
+        event = self._constructed(held)
+        self.release(held)
+        return self._constructing_each(event, iterable)
+
+    def _constructing_each(self, event, iterable):
+        elapsed = 0
+        items = iter(iterable)
+        while True:
+            started = timer()
+            try:
+                item = next(items)
+            except StopIteration:
+                break
+            elapsed += timer() - started
+            yield item
+
+        follow_up = RequestEvent(event.method, event.url)
+        follow_up.status = event.status
+        follow_up.construct = elapsed
+        follow_up.follow_up = True
+        self._dispatch(follow_up)
+
+    def _constructed(self, held):
+        # The objects were built from the last successful response;
+        # a request retried after logging in finishes after its retry
+        answered = [e for e in held if e.status and e.status < 400]
+        return (answered or held)[-1]
+
+    def release(self, held, construct=None):
+        '''Pass held events on to listeners
+
+        Arguments:
+            held (list): Events from :meth:`holding`
+            construct (float, optional): Object construction time to record
+                for the last successful one of the events
+        '''
+
+        if not held:
+            return
+        if construct is not None:
+            self._constructed(held).construct = construct
+        for event in held:
+            self._dispatch(event)
+        del held[:]
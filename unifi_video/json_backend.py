@@ -0,0 +1,150 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import json
+import sys
+
+_stdlib_takes_bytes = sys.version_info[0] == 2 or sys.version_info >= (3, 6)
+
+class JSONBackend(object):
+    """JSON decoder used for UniFi Video responses
+
+    Arguments:
+        name (str): Backend name
+        loads (callable): Decodes UTF-8 JSON given as ``bytes``
+        hooked_loads (callable or NoneType): Like ``loads`` but takes an
+            ``object_hook`` keyword argument. ``None`` if the backend has
+            no support for object hooks.
+    """
+
+    def __init__(self, name, loads, hooked_loads=None):
+        self.name = name
+        self.loads = loads
+        self.hooked_loads = hooked_loads
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, {
+            'name': self.name,
+            'object_hooks': self.hooked_loads is not None,
+        })
+
+def _stdlib_loads(data, **kwargs):
+    if not _stdlib_takes_bytes and isinstance(data, bytes):
+        data = data.decode('utf8')
+    return json.loads(data, **kwargs)
+
+def _load_orjson():
+    import orjson
+    return JSONBackend('orjson', orjson.loads)
+
+def _load_ujson():
+    import ujson
+    return JSONBackend('ujson', ujson.loads)
+
+def _load_simplejson():
+    import simplejson
+    return JSONBackend('simplejson', simplejson.loads, simplejson.loads)
+
+def _load_json():
+    return JSONBackend('json', _stdlib_loads, _stdlib_loads)
+
+# In order of preference
+_loaders = [
+    ('orjson', _load_orjson),
+    ('ujson', _load_ujson),
+    ('simplejson', _load_simplejson),
+    ('json', _load_json),
+]
+
+def available_backends():
+    '''List installed JSON backends
+
+    Returns:
+        list: Backend names, fastest first
+    '''
+
+    names = []
+    for name, loader in _loaders:
+        try:
+            loader()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def set_backend(backend=None):
+    '''Choose the JSON backend
+
+    Arguments:
+        backend (str or :class:`JSONBackend` or NoneType): Name of an
+            installed backend (``orjson``, ``ujson``, ``simplejson`` or
+            ``json``), a custom :class:`JSONBackend` or ``None`` for the
+            fastest installed backend
+
+    Returns:
+        :class:`JSONBackend`: The backend now in use
+
+    Raises:
+        ValueError: If the named backend is unknown or not installed
+    '''
+
+    global _backend
+
+    if isinstance(backend, JSONBackend):
+        _backend = backend
+        return _backend
+
+    for name, loader in _loaders:
+        if backend is not None and name != backend:
+            continue
+        try:
+            _backend = loader()
+            return _backend
+        except ImportError:
+            if backend is not None:
+                break
+
+    raise ValueError('JSON backend "{}" is not installed'.format(backend)
+        if backend in dict(_loaders) else
+        'Unknown JSON backend "{}"'.format(backend))
+
+def get_backend():
+    '''Get the JSON backend in use
+
+    Returns:
+        :class:`JSONBackend`
+    '''
+
+    return _backend
+
+def loads(data, object_hook=None):
+    '''Decode JSON with the backend in use
+
+    Arguments:
+        data (bytes or str): UTF-8 encoded JSON. Decoded straight from
+            ``bytes``, without an intermediate ``str``.
+        object_hook (callable, optional): Called with every decoded JSON
+            object (innermost first); its return value is used in place
+            of the ``dict``. For backends with no support for object
+            hooks, the standard library ``json`` is used instead; applying
+            the hook to the finished decode would cost more than it saves.
+
+    Returns:
+        Decoded JSON
+
+    Raises:
+        ValueError: On malformed JSON
+
+    Example:
+        >>> recordings = loads(body, object_hook=lambda d:
+        ...     UnifiVideoRecording(uva, d) if 'eventType' in d else d)
+    '''
+
+    backend = _backend
+    if object_hook is None:
+        return backend.loads(data)
+    if backend.hooked_loads is not None:
+        return backend.hooked_loads(data, object_hook=object_hook)
+    return _stdlib_loads(data, object_hook=object_hook)
+
+_backend = None
+set_backend()
@@ -0,0 +1,263 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+from ._concurrency import imap_bounded
+from .camera import UnifiVideoCamera, CameraModelError, \
+    common_isp_actionables, ir_led_modes, recording_modes
+
+isp_ranges = dict((a[0], (a[1], a[2])) for a in common_isp_actionables)
+isp_ranges['wdr'] = (0, 3)
+
+def _clamp(value, floor, ceiling):
+    return max(floor, min(ceiling, value))
+
+def settings_to_data(camera, settings):
+    '''Translate desired settings to the camera JSON structure
+
+    Arguments:
+        camera (:class:`~unifi_video.camera.UnifiVideoCamera`):
+            Camera the settings are for
+        settings (dict):
+            Desired settings. Accepts the keys listed below as well as
+            any top-level key of the camera JSON (e.g., ``ispSettings``)
+            with a dict of raw values.
+
+            - ``recording_mode``: ``disable``, ``fulltime`` or ``motion``
+            - ``pre_padding_secs``, ``post_padding_secs``
+            - ``brightness``, ``contrast``, ``hue``, ``saturation``,
+              ``denoise``, ``sharpness``, ``dynamic_range``
+            - ``ir_leds``: ``auto``, ``on`` or ``off``
+            - ``onscreen_text``, ``onscreen_timestamp``,
+              ``onscreen_watermark``
+
+    Returns:
+        dict: Nested dict mirroring :attr:`UnifiVideoCamera._data`
+
+    Raises:
+        ValueError: On unknown settings or values
+        CameraModelError: If the camera has no support for a setting
+    '''
+
+    data = {}
+
+    def put(section, key, value):
+        data.setdefault(section, {})[key] = value
+
+    for key, value in settings.items():
+        if key == 'recording_mode':
+            if value not in recording_modes:
+                raise ValueError('Unknow recording mode "{}"'.format(value))
+            for k, v in recording_modes[value].items():
+                put('recordingSettings', k, v)
+        elif key == 'pre_padding_secs':
+            put('recordingSettings', 'prePaddingSecs', value)
+        elif key == 'post_padding_secs':
+            put('recordingSettings', 'postPaddingSecs', value)
+        elif key in isp_ranges or key == 'dynamic_range':
+            isp_name = 'wdr' if key == 'dynamic_range' else key
+            if isp_name not in camera._isp_actionables:
+                raise CameraModelError('This camera model ({}) has no ' \
+                    'support for {} control'.format(camera.model, isp_name))
+            put('ispSettings', isp_name,
+                _clamp(value, *isp_ranges[isp_name]))
+        elif key == 'ir_leds':
+            if value not in ir_led_modes:
+                raise ValueError('Unknown led_state: {}'.format(value))
+            for k, v in ir_led_modes[value].items():
+                put('ispSettings', k, v)
+        elif key == 'onscreen_text':
+            put('osdSettings', 'overrideMessage', True)
+            put('osdSettings', 'tag', value.strip())
+        elif key == 'onscreen_timestamp':
+            put('osdSettings', 'enableDate', int(value))
+        elif key == 'onscreen_watermark':
+            put('osdSettings', 'enableLogo', int(value))
+        elif isinstance(value, dict) and \
+                isinstance(camera._data.get(key), dict):
+            for k, v in value.items():
+                put(key, k, v)
+        else:
+            raise ValueError('Unknown camera setting "{}"'.format(key))
+
+    return data
+
+def diff_camera_data(current, desired, _path=''):
+    '''Compare desired camera JSON against current camera JSON
+
+    Arguments:
+        current (dict): Current camera JSON
+        desired (dict): Desired (partial) camera JSON
+
+    Returns:
+        dict: Dot separated paths of differing values mapped to
+        ``[current, desired]`` pairs
+    '''
+
+    changes = {}
+    for key, value in desired.items():
+        path = '{}.{}'.format(_path, key) if _path else key
+        current_value = current.get(key) if isinstance(current, dict) else None
+        if isinstance(value, dict) and isinstance(current_value, dict):
+            changes.update(diff_camera_data(current_value, value, path))
+        elif current_value != value:
+            changes[path] = [current_value, value]
+    return changes
+
+def _set_path(data, path, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        data = data.setdefault(key, {})
+    data[keys[-1]] = value
+
+def _get_path(data, path):
+    for key in path.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+def selector_matches(selector, camera):
+    '''Test whether a camera selector matches a camera
+
+    Arguments:
+        selector (str or list or dict):
+            ``*`` matches every camera. A string matches camera ID or
+            (case insensitively) camera name. A list matches if any of
+            its items match. A dict matches if every key names a camera
+            attribute whose value equals the one given.
+        camera (:class:`~unifi_video.camera.UnifiVideoCamera`):
+            Camera to test against
+
+    Returns:
+        bool
+    '''
+
+    if isinstance(selector, (list, tuple, set)):
+        return any(selector_matches(s, camera) for s in selector)
+    if isinstance(selector, dict):
+        return all(getattr(camera, k, None) == v for k, v in selector.items())
+    if isinstance(selector, UnifiVideoCamera):
+        return selector._id == camera._id
+    return selector == '*' or selector == camera._id or \
+        (camera.name or '').lower() == selector.lower()
+
+class CameraReconciler(object):
+    """Brings camera settings in line with a desired state.
+
+    Desired settings are compared against each camera's current
+    (in-memory) data first. Only the cameras that differ get saved, each
+    with a single request (see :meth:`~unifi_video.camera.UnifiVideoCamera.batch`),
+    at most ``max_workers`` cameras at a time.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance whose cameras to reconcile
+        desired (list or dict):
+            Either a list of ``{'cameras': selector, 'settings': dict}``
+            rules or a dict mapping selectors (str) to settings. Later
+            rules override earlier ones. See :func:`selector_matches` for
+            selectors and :func:`settings_to_data` for settings.
+        cameras (iterable, optional):
+            Cameras to consider. Defaults to
+            :attr:`~unifi_video.api.UnifiVideoAPI.managed_cameras`.
+        max_workers (int, optional):
+            Maximum number of cameras to save concurrently
+
+    Example:
+        >>> reconciler = CameraReconciler(uva, [
+        ...     {'cameras': '*', 'settings': {'recording_mode': 'motion'}},
+        ...     {'cameras': {'model': 'UVC G3'},
+        ...      'settings': {'brightness': 60}},
+        ... ])
+        >>> report = reconciler.reconcile(dry_run=True)
+    """
+
+    def __init__(self, api, desired, cameras=None, max_workers=4):
+        self._api = api
+        self.rules = [(sel, settings) for sel, settings in desired.items()] \
+            if isinstance(desired, dict) else \
+            [(rule['cameras'], rule['settings']) for rule in desired]
+        self.cameras = cameras
+        self.max_workers = max_workers
+
+    def desired_settings(self, camera):
+        '''Merge the settings of every rule matching a camera
+
+        Returns:
+            dict: Desired settings for the camera
+        '''
+
+        settings = {}
+        for selector, rule_settings in self.rules:
+            if selector_matches(selector, camera):
+                settings.update(rule_settings)
+        return settings
+
+    def plan(self):
+        '''Diff desired settings against current camera data
+
+        Returns:
+            dict: Camera IDs mapped to report dicts with keys ``name``,
+            ``changes`` (see :func:`diff_camera_data`), ``applied``,
+            ``verified`` and ``error``
+        '''
+
+        report = {}
+        for camera in (self.cameras if self.cameras is not None
+                else self._api.managed_cameras):
+            entry = report[camera._id] = {
+                'name': camera.name,
+                'changes': {},
+                'applied': False,
+                'verified': {},
+                'error': None,
+            }
+            try:
+                entry['changes'] = diff_camera_data(camera._data,
+                    settings_to_data(camera, self.desired_settings(camera)))
+            except ValueError as e:
+                entry['error'] = str(e)
+        return report
+
+    def _apply(self, camera, changes):
+        with camera.batch() as batch:
+            for path, (_, value) in changes.items():
+                _set_path(camera._data, path, value)
+                batch._add_check(path, lambda path=path, value=value: \
+                    _get_path(camera._data, path) == value)
+        return batch.results
+
+    def reconcile(self, dry_run=False):
+        '''Save changed settings to every camera that differs from the
+        desired state.
+
+        Arguments:
+            dry_run (bool): Only report what would be changed
+
+        Returns:
+            dict: See :meth:`plan`
+        '''
+
+        report = self.plan()
+        if dry_run:
+            return report
+
+        cameras = dict((c._id, c) for c in (self.cameras
+            if self.cameras is not None else self._api.managed_cameras))
+        todo = [
+            camera_id for camera_id, entry in report.items()
+            if entry['changes'] and not entry['error']
+        ]
+
+        for camera_id, verified, error in imap_bounded(
+                lambda camera_id: self._apply(
+                    cameras[camera_id], report[camera_id]['changes']),
+                todo,
+                self.max_workers):
+            entry = report[camera_id]
+            if error is not None:
+                entry['error'] = str(error)
+            else:
+                entry['applied'] = True
+                entry['verified'] = verified
+
+        return report
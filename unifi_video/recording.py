@@ -1,7 +1,7 @@
 from __future__ import print_function, unicode_literals
 
 from .single import UnifiVideoSingle
-from datetime import datetime
+from .utils import ms_to_dt
 
 endpoints = {
     'recording': lambda x: 'recording/{}'.format(x),
@@ -41,14 +41,13 @@ class UnifiVideoRecording(UnifiVideoSingle):
         self.in_progress = data.get('inProgress', None)
         self.marked_for_deletion = data.get('markedForDeletion', None)
         self.cameras = data.get('cameras', [])
-        self.start_time = datetime.fromtimestamp(
-            int(data.get('startTime', 0) / 1000))
-        self.end_time = datetime.fromtimestamp(
-            int(data.get('endTime', 0) / 1000))
-        self.start_time_utc = datetime.utcfromtimestamp(
-            int(data.get('startTime', 0) / 1000))
-        self.end_time_utc = datetime.utcfromtimestamp(
-            int(data.get('endTime', 0) / 1000))
+        # Whole seconds, as UniFi Video shows them
+        start_ms = int(data.get('startTime', 0) / 1000) * 1000
+        end_ms = int(data.get('endTime', 0) / 1000) * 1000
+        self.start_time = ms_to_dt(start_ms)
+        self.end_time = ms_to_dt(end_ms)
+        self.start_time_utc = ms_to_dt(start_ms, utc=True)
+        self.end_time_utc = ms_to_dt(end_ms, utc=True)
 
     def download(self, filename=None):
         """Download recording
@@ -127,7 +126,14 @@ class UnifiVideoRecording(UnifiVideoSingle):
 
     def refresh(self):
         '''Refresh recording's data from UniFi Video
+
+        Refreshes may be batched with others (see
+        :class:`~unifi_video.batching.RefreshBatcher`).
         '''
+        if not self._deferred_refresh():
+            self._refresh()
+
+    def _refresh(self):
         self._load_data(
             self._extract_data(
                 self._api.get(endpoints['recording'](self._id))))
@@ -0,0 +1,225 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import time
+
+from datetime import timedelta
+
+from ._concurrency import monotonic
+from .camera import UnifiVideoCamera
+
+rec_types = {
+    'motion': ('motionRecording',),
+    'fulltime': ('fullTimeRecording',),
+    'all': ('motionRecording', 'fullTimeRecording'),
+}
+
+class RetentionRule(object):
+    """Single retention rule
+
+    Arguments:
+        max_age (timedelta or int or float):
+            How long to keep recordings for. Numbers are days.
+        rec_type (str, optional):
+            Type of recordings the rule applies to: *all*, *motion* or
+            *fulltime*
+        cameras (str or list, optional):
+            Cameras (:class:`~unifi_video.camera.UnifiVideoCamera` or camera
+            IDs) the rule applies to. ``*`` for all cameras.
+        keep_locked (bool, optional):
+            Whether to keep locked recordings regardless of age
+    """
+
+    def __init__(self, max_age, rec_type='all', cameras='*', keep_locked=True):
+        if rec_type not in rec_types:
+            raise ValueError('Unknown recording type "{}"'.format(rec_type))
+        self.max_age = max_age if isinstance(max_age, timedelta) \
+            else timedelta(days=max_age)
+        self.rec_type = rec_type
+        self.cameras = cameras if cameras == '*' else set(
+            c._id if isinstance(c, UnifiVideoCamera) else c for c in cameras)
+        self.keep_locked = keep_locked
+
+    @property
+    def max_age_ms(self):
+        return int(self.max_age.total_seconds() * 1000)
+
+    def applies_to(self, recording):
+        '''Whether the rule applies to a recording
+
+        :param recording: Recording to test
+        :type recording: :class:`~unifi_video.recording.UnifiVideoRecording`
+        :rtype: bool
+        '''
+
+        return recording.rec_type in rec_types[self.rec_type] and (
+            self.cameras == '*' or
+            any(c in self.cameras for c in recording.cameras))
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, {
+            'max_age': str(self.max_age),
+            'rec_type': self.rec_type,
+            'cameras': self.cameras if self.cameras == '*' \
+                else sorted(self.cameras),
+            'keep_locked': self.keep_locked,
+        })
+
+class RetentionEngine(object):
+    """Client-side recording retention
+
+    Walks the recording listing from the oldest recording onwards, one
+    ``page_size`` page at a time, so memory use stays bounded no matter
+    how many recordings there are. Only recordings that ended before
+    the youngest rule's cutoff are listed at all.
+
+    Each recording is judged by the first rule that applies to it; list
+    camera specific rules before general ones. Recordings no rule applies
+    to, recordings in progress and (unless a rule says otherwise) locked
+    recordings are always kept.
+
+    Deletion is a dry run by default. For real runs, recordings are
+    deleted in batches of ``batch_size`` with
+    :meth:`~unifi_video.api.UnifiVideoAPI.delete_recordings`, no faster
+    than ``max_rate`` recordings per second.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance to work on
+        rules (list): :class:`RetentionRule` objects
+        page_size (int, optional): Number of recordings per listing request
+        batch_size (int, optional): Number of recordings per deletion batch
+        max_rate (int or float or NoneType, optional): Maximum number of
+            recordings to delete per second. ``None`` for no limit.
+
+    Example:
+        >>> engine = RetentionEngine(uva, [
+        ...     RetentionRule(30, 'motion'),
+        ...     RetentionRule(7, 'fulltime'),
+        ... ])
+        >>> report = engine.run(dry_run=True)
+    """
+
+    def __init__(self, api, rules, page_size=500, batch_size=100,
+            max_rate=50):
+        if not rules:
+            raise ValueError('{} needs at least one rule'.format(
+                type(self).__name__))
+        self._api = api
+        self.rules = rules
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.max_rate = max_rate
+
+    def _listing(self, end_ms):
+        '''Page through recordings that ended before ``end_ms``, oldest
+        first, using the start time of the last recording of each page
+        as the start of the next one.
+        '''
+
+        cursor = None
+        seen = set()
+
+        while True:
+            page = list(self._api.get_recordings(
+                rec_type='all',
+                start_time=cursor,
+                end_time=end_ms // 1000,
+                order='asc',
+                limit=self.page_size))
+
+            fresh = [r for r in page if r._id not in seen]
+            for recording in fresh:
+                yield recording
+
+            if len(page) < self.page_size:
+                break
+
+            next_cursor = page[-1]._data.get('startTime', 0) // 1000
+            if not fresh:
+                next_cursor = max(next_cursor, cursor or 0) + 1
+            if next_cursor != cursor:
+                seen = set()
+
+            seen.update(
+                r._id for r in page
+                if r._data.get('startTime', 0) // 1000 >= next_cursor)
+            cursor = next_cursor
+
+    def expired(self, now=None):
+        '''Find recordings to delete
+
+        Arguments:
+            now (int or float, optional): Unix timestamp to measure
+                recording age against. Defaults to current time.
+
+        Returns:
+            Iterable of ``(recording, rule)`` tuples
+        '''
+
+        now_ms = int((time.time() if now is None else now) * 1000)
+        end_ms = now_ms - min(rule.max_age_ms for rule in self.rules)
+
+        for recording in self._listing(end_ms):
+            if recording.in_progress or recording.marked_for_deletion:
+                continue
+            for rule in self.rules:
+                if rule.applies_to(recording):
+                    if rule.keep_locked and recording.locked:
+                        break
+                    if recording._data.get('endTime', now_ms) \
+                            < now_ms - rule.max_age_ms:
+                        yield recording, rule
+                    break
+
+    def run(self, dry_run=True, now=None):
+        '''Apply retention rules
+
+        Arguments:
+            dry_run (bool, optional): Only report what would be deleted
+            now (int or float, optional): See :meth:`expired`
+
+        Returns:
+            dict: Report with keys ``expired`` (number of expired
+            recordings), ``deleted`` (list of deleted recording IDs;
+            would-be deleted on dry runs), ``failed`` (list of IDs that
+            failed to delete) and ``per_rule`` (number of expired
+            recordings per rule index)
+        '''
+
+        report = {
+            'expired': 0,
+            'deleted': [],
+            'failed': [],
+            'per_rule': [0] * len(self.rules),
+        }
+
+        batch = []
+        started = monotonic()
+
+        def flush():
+            for result in self._api.delete_recordings(
+                    batch, max_workers=1):
+                report['deleted' if result['success'] else 'failed']\
+                    .extend(result['ids'])
+            if self.max_rate:
+                done = len(report['deleted']) + len(report['failed'])
+                pause = done / float(self.max_rate) - \
+                    (monotonic() - started)
+                if pause > 0:
+                    time.sleep(pause)
+            del batch[:]
+
+        for recording, rule in self.expired(now):
+            report['expired'] += 1
+            report['per_rule'][self.rules.index(rule)] += 1
+            if dry_run:
+                report['deleted'].append(recording._id)
+                continue
+            batch.append(recording._id)
+            if len(batch) >= self.batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+        return report
@@ -26,6 +26,19 @@ class UnifiVideoSingle(object):
     def _load_data(self, data):
         raise NotImplementedError('Method is not implement in base class')
 
+    def _refresh(self):
+        raise NotImplementedError('Method is not implement in base class')
+
+    def _deferred_refresh(self):
+        '''Offer refresh to the API instance's refresh batcher
+
+        Returns:
+            bool: Whether the batcher took care of the refresh
+        '''
+
+        batcher = getattr(self._api, 'refresh_batcher', None)
+        return batcher is not None and batcher.defer(self)
+
     def _extract_data(self, data):
         if not isinstance(data, dict) or \
                 ('_id' not in data and 'data' not in data):
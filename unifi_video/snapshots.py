@@ -0,0 +1,392 @@
+from __future__ import absolute_import, print_function, unicode_literals
+
+import heapq
+import random
+import threading
+import time
+
+from collections import deque, OrderedDict
+
+from ._concurrency import Queue, SingleFlight, monotonic
+from .camera import UnifiVideoCamera, endpoints as camera_endpoints
+
+def _camera_id(camera):
+    return camera._id if isinstance(camera, UnifiVideoCamera) else camera
+
+class SnapshotFrame(object):
+    """Single snapshot held in memory
+
+    Attributes:
+        camera_id (str): ID of the camera the snapshot was taken from
+        width (int): Requested image width (``0`` for server default)
+        taken_at (float): Unix timestamp of when the snapshot was received
+        image (bytes): JPEG image data
+    """
+
+    def __init__(self, camera_id, width, taken_at, image):
+        self.camera_id = camera_id
+        self.width = width
+        self.taken_at = taken_at
+        self.image = image
+        # For expiry; unlike taken_at, immune to wall clock adjustments
+        self._received = monotonic()
+
+    def __str__(self):
+        return '{}: {}'.format(type(self).__name__, {
+            'camera_id': self.camera_id,
+            'width': self.width,
+            'taken_at': self.taken_at,
+            'size': len(self.image),
+        })
+
+class _PolledCamera(object):
+
+    def __init__(self, camera_id, interval, width, frames):
+        self.camera_id = camera_id
+        self.interval = interval
+        self.width = width
+        self.frames = deque(maxlen=frames)
+        self.in_flight = False
+        self.next_slot = None
+        self.fetched = 0
+        self.failed = 0
+        self.missed = 0
+
+class SnapshotPoller(object):
+    """Fetches camera snapshots for many cameras on a schedule and keeps
+    the most recent ones in memory.
+
+    Every camera gets its own target interval and image width. Fetches
+    are scheduled against fixed slots (``start + n * interval``) so the
+    schedule does not drift, and each fetch is shifted by a random jitter
+    of up to ``jitter * interval`` to spread the load on the UniFi Video
+    server. A slot is counted as missed when the previous fetch for the
+    same camera is still running or when the scheduler falls behind.
+
+    Nothing is written to disk; the last ``frames`` snapshots of each
+    camera are held in a ring buffer.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance to fetch snapshots through
+        interval (int or float, optional):
+            Default seconds between snapshots of a camera
+        width (int, optional):
+            Default image width (``0`` lets the server decide)
+        frames (int, optional):
+            Number of snapshots to keep per camera
+        jitter (float, optional):
+            Max jitter as a fraction of the interval
+        max_workers (int, optional):
+            Maximum number of concurrent snapshot requests
+    """
+
+    def __init__(self, api, interval=5, width=0, frames=10, jitter=0.1,
+            max_workers=4):
+        self._api = api
+        self.interval = interval
+        self.width = width
+        self.frames_per_camera = frames
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self._cameras = {}
+        self._schedule = []
+        self._lock = threading.Condition()
+        self._jobs = Queue()
+        self._threads = []
+        self._running = False
+
+    def add(self, camera, interval=None, width=None):
+        '''Start polling a camera
+
+        Arguments:
+            camera (:class:`~unifi_video.camera.UnifiVideoCamera` or str):
+                Camera or camera ID
+            interval (int or float, optional):
+                Seconds between snapshots. Defaults to :attr:`interval`.
+            width (int, optional):
+                Image width. Defaults to :attr:`width`.
+        '''
+
+        camera_id = _camera_id(camera)
+        with self._lock:
+            polled = _PolledCamera(
+                camera_id,
+                interval or self.interval,
+                self.width if width is None else int(width),
+                self.frames_per_camera)
+            self._cameras[camera_id] = polled
+            self._schedule_next(polled, monotonic() + \
+                random.uniform(0, polled.interval))
+            self._lock.notify()
+
+    def remove(self, camera):
+        '''Stop polling a camera and drop its snapshots
+        '''
+
+        with self._lock:
+            self._cameras.pop(_camera_id(camera), None)
+
+    def frames(self, camera):
+        '''Get buffered snapshots of a camera
+
+        Returns:
+            list: :class:`SnapshotFrame` objects, oldest first
+        '''
+
+        with self._lock:
+            polled = self._cameras.get(_camera_id(camera))
+            return list(polled.frames) if polled else []
+
+    def latest(self, camera):
+        '''Get most recent snapshot of a camera
+
+        Returns:
+            :class:`SnapshotFrame` or `NoneType`
+        '''
+
+        with self._lock:
+            polled = self._cameras.get(_camera_id(camera))
+            return polled.frames[-1] if polled and polled.frames else None
+
+    def stats(self):
+        '''Get per-camera counters
+
+        Returns:
+            dict: Camera IDs mapped to dicts of ``fetched``, ``failed``
+            and ``missed`` counts
+        '''
+
+        with self._lock:
+            return {
+                camera_id: {
+                    'fetched': polled.fetched,
+                    'failed': polled.failed,
+                    'missed': polled.missed,
+                }
+                for camera_id, polled in self._cameras.items()
+            }
+
+    def _schedule_next(self, polled, slot):
+        polled.next_slot = slot
+        jitter = random.uniform(-self.jitter, self.jitter) * polled.interval
+        heapq.heappush(
+            self._schedule, (slot + jitter, slot, polled.camera_id))
+
+    def _fetch(self, polled):
+        image = None
+        try:
+            image = self._api.get(
+                camera_endpoints['snapshot'](polled.camera_id, polled.width),
+                True)
+        except Exception:
+            pass
+        with self._lock:
+            polled.in_flight = False
+            if image:
+                polled.fetched += 1
+                polled.frames.append(SnapshotFrame(
+                    polled.camera_id, polled.width, time.time(), image))
+            else:
+                polled.failed += 1
+
+    def _work(self):
+        while True:
+            polled = self._jobs.get()
+            if polled is None:
+                break
+            self._fetch(polled)
+
+    def _dispatch(self):
+        with self._lock:
+            while self._running:
+                if not self._schedule:
+                    self._lock.wait()
+                    continue
+
+                due, slot, camera_id = self._schedule[0]
+                now = monotonic()
+                if due > now:
+                    self._lock.wait(due - now)
+                    continue
+
+                heapq.heappop(self._schedule)
+                polled = self._cameras.get(camera_id)
+                if polled is None or polled.next_slot != slot:
+                    continue
+
+                next_slot = slot + polled.interval
+                if next_slot <= now:
+                    skipped = int((now - slot) // polled.interval)
+                    polled.missed += skipped
+                    next_slot = slot + (skipped + 1) * polled.interval
+
+                if polled.in_flight:
+                    polled.missed += 1
+                else:
+                    polled.in_flight = True
+                    self._jobs.put(polled)
+
+                self._schedule_next(polled, next_slot)
+
+    def start(self):
+        '''Start polling in background threads
+        '''
+
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+
+        self._threads = [threading.Thread(target=self._dispatch)] + [
+            threading.Thread(target=self._work)
+            for _ in range(max(1, int(self.max_workers)))
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        '''Stop polling. Buffered snapshots are kept.
+        '''
+
+        with self._lock:
+            self._running = False
+            self._lock.notify_all()
+
+        for _ in range(len(self._threads) - 1):
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+class SnapshotCache(object):
+    """Caches camera snapshots in memory for a short while.
+
+    Snapshots are keyed by camera and width and expire ``ttl`` seconds
+    after they were received, by a monotonic clock. Concurrent requests for a
+    key that is not cached share a single request to the UniFi Video
+    server. When ``max_entries`` or ``max_bytes`` is exceeded, the least
+    recently used snapshots are evicted first.
+
+    Arguments:
+        api (:class:`~unifi_video.api.UnifiVideoAPI`):
+            API instance to fetch snapshots through
+        ttl (int or float, optional):
+            Seconds a snapshot stays fresh
+        max_entries (int, optional):
+            Maximum number of snapshots to keep
+        max_bytes (int or NoneType, optional):
+            Maximum total size of kept snapshots
+        allow_larger (bool, optional):
+            Whether a fresh snapshot of greater width (or of server default
+            width) may be served for a request of smaller width
+
+    Attributes:
+        hits (int): Number of requests served from the cache
+        misses (int): Number of requests that caused a fetch
+        shared (int): Number of requests that waited on another
+            request's fetch
+    """
+
+    def __init__(self, api, ttl=1, max_entries=64, max_bytes=None,
+            allow_larger=False):
+        self._api = api
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.allow_larger = allow_larger
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def _fresh(self, key, now):
+        frame = self._entries.get(key)
+        if frame is None:
+            return None
+        if frame._received + self.ttl <= now:
+            self._drop(key)
+            return None
+        return frame
+
+    def _lookup(self, camera_id, width, now):
+        frame = self._fresh((camera_id, width), now)
+        if frame is None and self.allow_larger and width:
+            for key in list(self._entries.keys()):
+                if key[0] == camera_id and (not key[1] or key[1] > width):
+                    frame = self._fresh(key, now)
+                    if frame is not None:
+                        break
+        if frame is not None:
+            key = (frame.camera_id, frame.width)
+            self._entries[key] = self._entries.pop(key)
+        return frame
+
+    def _drop(self, key):
+        self._size -= len(self._entries.pop(key).image)
+
+    def _store(self, frame):
+        key = (frame.camera_id, frame.width)
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = frame
+        self._size += len(frame.image)
+        while self._entries and (len(self._entries) > self.max_entries or \
+                (self.max_bytes is not None and self._size > self.max_bytes)):
+            self._drop(next(iter(self._entries)))
+
+    def _fetch(self, camera_id, width):
+        image = self._api.get(
+            camera_endpoints['snapshot'](camera_id, width), True)
+        if not image:
+            return None
+        frame = SnapshotFrame(camera_id, width, time.time(), image)
+        with self._lock:
+            self._store(frame)
+        return frame
+
+    def get(self, camera, width=0):
+        '''Get camera snapshot
+
+        Arguments:
+            camera (:class:`~unifi_video.camera.UnifiVideoCamera` or str):
+                Camera or camera ID
+            width (int, optional):
+                Image width (``0`` lets the server decide)
+
+        Returns:
+            bytes or bool: JPEG image data. ``False`` if the snapshot
+            could not be fetched.
+        '''
+
+        camera_id = _camera_id(camera)
+        width = int(width)
+
+        with self._lock:
+            frame = self._lookup(camera_id, width, monotonic())
+            if frame is not None:
+                self.hits += 1
+                return frame.image
+
+        frame, shared = self._flights.do(
+            (camera_id, width), lambda: self._fetch(camera_id, width))
+
+        with self._lock:
+            if shared:
+                self.shared += 1
+            else:
+                self.misses += 1
+
+        return frame.image if frame is not None else False
+
+    def clear(self):
+        '''Drop all cached snapshots
+        '''
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -2,6 +2,54 @@ from __future__ import print_function, unicode_literals
 from datetime import datetime, timedelta
 import re
 
+_iso8601 = re.compile(
+    r'([0-9]{4})-*([0-9]{2})-*([0-9]{2})[Tt\s]*'
+    r'(?:([0-9]{2}):*){0,1}'
+    r'(?:([0-9]{2}):*){0,1}'
+    r'(?:([0-9]{2}):*){0,1}')
+
+_epoch = datetime(1970, 1, 1)
+
+# UTC offsets (in seconds) of tzinfo objects whose offset doesn't depend on
+# the datetime they're attached to
+_tz_offsets = {}
+_tz_offsets_max = 1024
+
+try:
+    from datetime import timezone as _timezone
+except ImportError:
+    _timezone = None
+
+def _has_fixed_offset(tz):
+    # pytz tzinfo objects are bound to a single offset (localize() picks
+    # the right object for a datetime), as are datetime.timezone objects
+    return (_timezone is not None and isinstance(tz, _timezone)) or \
+        type(tz).__module__.split('.', 1)[0] == 'pytz'
+
+def _utc_offset_sec(dt):
+    tz = dt.tzinfo
+    if tz is None:
+        return None
+    try:
+        return _tz_offsets[tz]
+    except (KeyError, TypeError):
+        pass
+    offset = dt.utcoffset()
+    if offset is None:
+        return None
+    seconds = offset.days * 86400 + offset.seconds
+    if _has_fixed_offset(tz):
+        if len(_tz_offsets) >= _tz_offsets_max:
+            _tz_offsets.clear()
+        _tz_offsets[tz] = seconds
+    return seconds
+
+def _wall_clock_ms(dt):
+    # Milliseconds since the epoch for the datetime's wall clock reading
+    # taken as UTC
+    td = dt.replace(tzinfo=None) - _epoch
+    return (td.days * 86400 + td.seconds) * 1000 + td.microseconds // 1000
+
 def dt_resolvable_to_ms(resolvable, utc_offset=0, resolution=6e4):
     '''Convert datetime resolvable to milliseconds since the Unix epoch.
 
@@ -37,30 +85,19 @@ def dt_resolvable_to_ms(resolvable, utc_offset=0, resolution=6e4):
     '''
 
     if isinstance(resolvable, str):
-        iso8601_match = re.match(
-            (
-                r'([0-9]{4})-*([0-9]{2})-*([0-9]{2})[Tt\s]*'
-                r'(?:([0-9]{2}):*){0,1}'
-                r'(?:([0-9]{2}):*){0,1}'
-                r'(?:([0-9]{2}):*){0,1}'
-            ),
-            resolvable)
+        iso8601_match = _iso8601.match(resolvable)
         try:
-            return dt_resolvable_to_ms(
-                datetime(*[
-                    int(i) for i in iso8601_match.groups()
-                    if i is not None]),
-                utc_offset,
-                resolution)
+            resolvable = datetime(*[
+                int(i) for i in iso8601_match.groups() if i is not None])
         except (ValueError, AttributeError) as e:
             raise ValueError(
                 'Unable to parse date and time from "{}"'.format(resolvable))
-    elif isinstance(resolvable, datetime):
-        if resolvable.tzinfo and resolvable.tzinfo.utcoffset(resolvable):
-            utc_offset = resolvable.utcoffset().total_seconds()
-        ts = int(resolvable.strftime('%s'))
-        local_td = datetime.fromtimestamp(ts) - datetime.utcfromtimestamp(ts)
-        ms = (ts + local_td.total_seconds()) * 1000
+
+    if isinstance(resolvable, datetime):
+        tz_offset = _utc_offset_sec(resolvable)
+        if tz_offset is not None:
+            utc_offset = tz_offset
+        ms = _wall_clock_ms(resolvable)
     elif isinstance(resolvable, (int, float)):
         utc_offset = 0
         ms = resolvable * 1000
@@ -70,6 +107,121 @@ def dt_resolvable_to_ms(resolvable, utc_offset=0, resolution=6e4):
 
     return int(ms - (ms % resolution) + (-1 * (utc_offset * 1000)))
 
+def _is_ndarray(obj):
+    return type(obj).__module__ == 'numpy' and hasattr(obj, 'dtype')
+
+def dt_resolvables_to_ms(resolvables, utc_offset=0, resolution=6e4):
+    '''Convert many datetime resolvables to milliseconds since the Unix
+    epoch in one call.
+
+    Args:
+        resolvables (list or numpy.ndarray):
+            Resolvables (see :func:`dt_resolvable_to_ms`). NumPy arrays of
+            ``datetime64`` values (treated like naive datetimes) or of
+            numbers (Unix timestamps) are converted without a Python level
+            loop.
+
+        utc_offset (int):
+            UTC offset in seconds
+
+        resolution (int):
+            Max resolution (in ms) for the returned timestamps
+
+    Returns:
+        list or numpy.ndarray: Milliseconds since the Unix epoch (an
+        ``int64`` array for NumPy input)
+    '''
+
+    if not _is_ndarray(resolvables):
+        return [
+            dt_resolvable_to_ms(r, utc_offset, resolution)
+            for r in resolvables
+        ]
+
+    import numpy
+
+    kind = resolvables.dtype.kind
+    if kind == 'M':
+        ms = resolvables.astype('datetime64[ms]').astype(numpy.int64)
+    elif kind in 'iuf':
+        ms = resolvables * 1000
+        utc_offset = 0
+    else:
+        return numpy.array(
+            dt_resolvables_to_ms(resolvables.tolist(), utc_offset, resolution),
+            dtype=numpy.int64)
+
+    return (ms - (ms % resolution) - utc_offset * 1000).astype(numpy.int64)
+
+# Local UTC offsets change at most once per this many milliseconds (time
+# zone transitions fall on quarter hours, UTC)
+_local_offset_span = 900000
+
+def _local_offset_ms(ms):
+    key = (None, ms // _local_offset_span)
+    try:
+        return _tz_offsets[key]
+    except KeyError:
+        pass
+    seconds = key[1] * _local_offset_span // 1000
+    offset = _wall_clock_ms(datetime.fromtimestamp(seconds)) - seconds * 1000
+    if len(_tz_offsets) >= _tz_offsets_max:
+        _tz_offsets.clear()
+    _tz_offsets[key] = offset
+    return offset
+
+def ms_to_dt(ms, utc=False):
+    '''Convert milliseconds since the Unix epoch to a naive datetime
+
+    Args:
+        ms (int): Milliseconds since the Unix epoch
+
+        utc (bool): Whether to return UTC or local time
+
+    Returns:
+        datetime: With millisecond precision
+    '''
+
+    if not utc:
+        ms += _local_offset_ms(ms)
+    return _epoch + timedelta(0, 0, ms * 1000)
+
+def ms_to_dts(ms_list, utc=False):
+    '''Like :func:`ms_to_dt` but for a list of timestamps
+
+    Returns:
+        list: datetimes
+    '''
+
+    if utc:
+        return [_epoch + timedelta(0, 0, ms * 1000) for ms in ms_list]
+    return [
+        _epoch + timedelta(0, 0, (ms + _local_offset_ms(ms)) * 1000)
+        for ms in ms_list
+    ]
+
+_version_component = re.compile(r'(\d+|[a-z]+|\.)', re.I)
+
+def parse_version(version):
+    '''Split a version string into a tuple for comparisons
+
+    Numeric components become ints, other components are kept as
+    strings, the way :class:`distutils.version.LooseVersion` splits
+    versions.
+
+    Arguments:
+        version (str or NoneType): Version string, e.g., ``3.10.13``
+
+    Returns:
+        tuple: Version components, e.g., ``(3, 10, 13)``. Empty for
+        ``None``.
+    '''
+
+    return tuple(
+        int(c) if c.isdigit() else c
+        for c in _version_component.split(version or '')
+        if c and c != '.')
+
 def format_mac_addr(mac_addr):
     if len(mac_addr) != 12:
         return 'ffffffffffff'